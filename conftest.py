@@ -0,0 +1,13 @@
+"""
+Shared test setup.
+"""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolated_stores(monkeypatch, tmp_path):
+    """Keep the dedup index, post history and scheduler databases out of the home directory."""
+    monkeypatch.setenv("DEDUP_INDEX_PATH", str(tmp_path / "dedup_index.jsonl"))
+    monkeypatch.setenv("HISTORY_DB_PATH", str(tmp_path / "history.db"))
+    monkeypatch.setenv("SCHEDULER_DB_PATH", str(tmp_path / "scheduler.db"))
@@ -2,12 +2,9 @@
 Entry point for running the MCP server as a module.
 """
 
-from .server import mcp
-
 if __name__ == "__main__":
     import sys
     import argparse
-    import uvicorn
     
     parser = argparse.ArgumentParser(description="X Post Creator MCP Server")
     parser.add_argument(
@@ -28,10 +25,57 @@ if __name__ == "__main__":
         help="Port for SSE server (only used with --transport sse)"
     )
     
+    subparsers = parser.add_subparsers(dest="command")
+    bulk_parser = subparsers.add_parser(
+        "bulk",
+        help="Generate posts for every row of a JSONL or CSV file (resumable)"
+    )
+    bulk_parser.add_argument("input", help="Input JSONL or CSV file, one post per row")
+    bulk_parser.add_argument("output", help="Output JSONL file; a <output>.checkpoint file tracks progress")
+    bulk_parser.add_argument(
+        "--format",
+        choices=["jsonl", "csv"],
+        help="Input format (default: inferred from the file extension)"
+    )
+    bulk_parser.add_argument("--text-field", default="text", help="Row field holding the input text")
+    bulk_parser.add_argument("--concurrency", type=int, default=8, help="Maximum rows generated at once")
+    bulk_parser.add_argument("--style", default="professional", help="Style for rows that don't set one")
+    bulk_parser.add_argument("--max-length", type=int, default=280, help="Max length for rows that don't set one")
+    bulk_parser.add_argument("--no-hashtags", action="store_true", help="Don't add hashtags unless a row asks for them")
+    bulk_parser.add_argument("--overwrite", action="store_true", help="Replace an existing output file without a checkpoint")
+    bulk_parser.add_argument("--quiet", action="store_true", help="Don't report live throughput and ETA")
+    
     args = parser.parse_args()
     
+    if args.command == "bulk":
+        from .bulk import BulkGenerator
+        
+        generator = BulkGenerator(
+            args.input,
+            args.output,
+            concurrency=args.concurrency,
+            input_format=args.format,
+            text_field=args.text_field,
+            style=args.style,
+            include_hashtags=not args.no_hashtags,
+            max_length=args.max_length,
+            progress_stream=None if args.quiet else sys.stderr,
+            overwrite=args.overwrite
+        )
+        try:
+            summary = generator.run()
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            sys.exit(1)
+        print(f"✅ Generated {summary['processed']} posts ({summary['failed']} failed) "
+              f"at {summary['rows_per_second']} rows/s")
+        sys.exit(0)
+    
+    import uvicorn
+    from .server import mcp
+    
     if args.transport == "stdio":
         mcp.run()
     elif args.transport == "sse":
         print(f"🚀 Starting X Post Creator MCP Server on {args.host}:{args.port}")
-        uvicorn.run(mcp.sse_app, host=args.host, port=args.port)
+        uvicorn.run(mcp.sse_app(), host=args.host, port=args.port)
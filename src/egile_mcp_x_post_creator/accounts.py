@@ -0,0 +1,209 @@
+"""
+Pool of X accounts the service can publish as.
+
+The account configured through X_API_KEY/X_API_SECRET/X_ACCESS_TOKEN/
+X_ACCESS_TOKEN_SECRET is always available as "default". More accounts can
+be loaded from a JSON credentials file (X_ACCOUNTS_FILE):
+
+    {
+      "accounts": {
+        "acme": {
+          "consumer_key": "...",
+          "consumer_secret": "...",
+          "access_token": "...",
+          "access_token_secret": "..."
+        }
+      }
+    }
+
+Each account lazily creates its own API client and media uploader and has
+its own rate governor, since X rate limits are per user.
+"""
+
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from .rate_limit import RateGovernor
+
+logger = logging.getLogger(__name__)
+
+CREDENTIAL_KEYS = ("consumer_key", "consumer_secret", "access_token", "access_token_secret")
+
+_ENV_CREDENTIALS = {
+    "consumer_key": "X_API_KEY",
+    "consumer_secret": "X_API_SECRET",
+    "access_token": "X_ACCESS_TOKEN",
+    "access_token_secret": "X_ACCESS_TOKEN_SECRET",
+}
+
+
+class AccountConfigError(Exception):
+    """Raised when the accounts file cannot be loaded."""
+
+
+def media_options_from_env() -> Dict[str, Any]:
+    """
+    X_MEDIA_UPLOAD_URL, X_MEDIA_CHUNK_SIZE and X_MEDIA_MAX_PARALLEL for MediaUploader (None: its default).
+
+    Raises:
+        ValueError: If a size is not an integer
+    """
+    return {
+        "upload_url": os.getenv("X_MEDIA_UPLOAD_URL") or None,
+        "chunk_size": int(os.environ["X_MEDIA_CHUNK_SIZE"]) if os.getenv("X_MEDIA_CHUNK_SIZE") else None,
+        "max_parallel": int(os.environ["X_MEDIA_MAX_PARALLEL"]) if os.getenv("X_MEDIA_MAX_PARALLEL") else None,
+    }
+
+
+class XAccount:
+    """One X account: its credentials, API client, media uploader and rate-limit state."""
+
+    def __init__(
+        self,
+        name: str,
+        credentials: Dict[str, Optional[str]],
+        rate_governor: Optional[RateGovernor] = None
+    ):
+        """
+        Initialize the account; nothing is created until first use.
+
+        Args:
+            name: Account name used to select it in tool calls
+            credentials: consumer_key, consumer_secret, access_token, access_token_secret
+            rate_governor: Rate-limit state for this account's X calls (default: a new governor)
+        """
+        self.name = name
+        self.credentials = credentials
+        self.rate_governor = rate_governor or RateGovernor()
+        # Read now, so a config reload cannot change the settings of an upload in progress
+        self.media_options = media_options_from_env()
+        self._client = None
+        self._media_uploader = None
+        self._username: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def configured(self) -> bool:
+        """Whether all four credentials are set."""
+        return all(self.credentials.get(key) for key in CREDENTIAL_KEYS)
+
+    def client(self):
+        """The tweepy client for this account (lazy loaded)."""
+        with self._lock:
+            if self._client is None:
+                try:
+                    import tweepy
+                except ImportError:
+                    raise ImportError("tweepy is not installed. Run: pip install tweepy")
+                try:
+                    self._client = tweepy.Client(**{key: self.credentials.get(key) for key in CREDENTIAL_KEYS})
+                except Exception as e:
+                    raise Exception(f"Failed to initialize Twitter client: {str(e)}")
+            return self._client
+
+    def media_uploader(self):
+        """The chunked media uploader for this account (lazy loaded)."""
+        with self._lock:
+            if self._media_uploader is None:
+                from .media_upload import MediaUploader
+                self._media_uploader = MediaUploader(dict(self.credentials), **self.media_options)
+            return self._media_uploader
+
+    def username(self) -> str:
+        """The account's username, fetched once; "user" if it cannot be looked up."""
+        if self._username is not None:
+            return self._username
+        try:
+            self.rate_governor.acquire("x:users_me")
+            user = self.client().get_me()
+            self._username = user.data.username
+            return self._username
+        except Exception:
+            return "user"  # Fallback
+
+
+class AccountPool:
+    """The default account from the environment plus any accounts from X_ACCOUNTS_FILE."""
+
+    def __init__(self, path: Optional[str] = None, default_governor: Optional[RateGovernor] = None):
+        """
+        Load the account pool.
+
+        Args:
+            path: JSON credentials file (default: X_ACCOUNTS_FILE; none means only the default account)
+            default_governor: Rate governor for the environment-configured account
+
+        Raises:
+            AccountConfigError: If the file is unreadable or an account is incomplete
+        """
+        self.path = path or os.getenv("X_ACCOUNTS_FILE")
+        self.default_name = os.getenv("X_DEFAULT_ACCOUNT", "default")
+        self._accounts: Dict[str, XAccount] = {
+            "default": XAccount(
+                "default",
+                {key: os.getenv(var) for key, var in _ENV_CREDENTIALS.items()},
+                default_governor
+            )
+        }
+        if self.path:
+            self._load(self.path)
+        if self.default_name not in self._accounts:
+            raise AccountConfigError(f"X_DEFAULT_ACCOUNT '{self.default_name}' is not a configured account")
+
+    def get(self, name: Optional[str] = None) -> XAccount:
+        """
+        Look up an account by name (default: X_DEFAULT_ACCOUNT).
+
+        Raises:
+            KeyError: With a message listing the configured accounts
+        """
+        name = name or self.default_name
+        try:
+            return self._accounts[name]
+        except KeyError:
+            raise KeyError(f"Unknown account '{name}'. Configured accounts: {', '.join(self.names())}")
+
+    def names(self) -> List[str]:
+        """Names of the configured accounts."""
+        return [name for name, account in self._accounts.items() if account.configured or name != "default"]
+
+    def __iter__(self) -> Iterator[XAccount]:
+        return iter(self._accounts.values())
+
+    def adopt(self, previous: "AccountPool") -> None:
+        """
+        Carry state over from the pool this one replaces after a config reload.
+
+        Accounts with unchanged credentials and media settings keep their client,
+        media uploader and username; rate-limit state is kept by name, since X
+        limits are per user.
+        """
+        for name, account in self._accounts.items():
+            old = previous._accounts.get(name)
+            if old is None:
+                continue
+            if old.credentials == account.credentials and old.media_options == account.media_options:
+                self._accounts[name] = old
+            else:
+                account.rate_governor = old.rate_governor
+
+    def _load(self, path: str) -> None:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            raise AccountConfigError(f"Cannot load accounts file {path}: {e}")
+
+        accounts = data.get("accounts") if isinstance(data, dict) else None
+        if not isinstance(accounts, dict):
+            raise AccountConfigError(f"{path} must contain an \"accounts\" object")
+        for name, credentials in accounts.items():
+            missing = [key for key in CREDENTIAL_KEYS if not (credentials or {}).get(key)]
+            if missing:
+                raise AccountConfigError(f"Account '{name}' in {path} is missing {', '.join(missing)}")
+            governor = self._accounts["default"].rate_governor if name == "default" else None
+            self._accounts[name] = XAccount(name, {key: credentials[key] for key in CREDENTIAL_KEYS}, governor)
+        logger.info("Loaded %s X accounts from %s", len(accounts), path)
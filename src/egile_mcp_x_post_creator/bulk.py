@@ -0,0 +1,284 @@
+"""
+Resumable, streaming bulk post generation over JSONL or CSV corpora.
+
+Input rows are streamed (never loaded into memory), generated through
+XPostService with bounded concurrency, and appended to a JSONL output file.
+A checkpoint file records how far the output is consistent, so a crashed run
+can be resumed without regenerating or duplicating rows.
+"""
+
+import concurrent.futures
+import csv
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, Optional, Set, TextIO, Union
+
+from .x_service import XPostService
+
+CHECKPOINT_SUFFIX = ".checkpoint"
+
+
+class RowError(Exception):
+    """An input row that could not be parsed; it becomes a failed record instead of stopping the run."""
+
+
+def iter_rows(path: str, input_format: Optional[str] = None) -> Iterator[Union[Dict[str, Any], RowError]]:
+    """
+    Stream rows from a JSONL or CSV file (format inferred from the extension by default).
+
+    Malformed lines are yielded as RowError, so later rows keep their numbers.
+    """
+    input_format = input_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    with open(path, newline="" if input_format == "csv" else None, encoding="utf-8") as f:
+        if input_format == "csv":
+            reader = csv.DictReader(f)
+            while True:
+                try:
+                    yield next(reader)
+                except StopIteration:
+                    return
+                except csv.Error as e:
+                    yield RowError(f"Invalid CSV: {e}")
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except ValueError as e:
+                    yield RowError(f"Invalid JSON: {e}")
+                    continue
+                if isinstance(row, dict):
+                    yield row
+                else:
+                    yield RowError(f"Row is a JSON {type(row).__name__}, not an object")
+
+
+def count_rows(path: str, input_format: Optional[str] = None) -> int:
+    """Cheaply count rows by counting newlines in binary chunks (used for ETA only)."""
+    input_format = input_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+    lines = 0
+    last = b"\n"
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(0, lines - 1) if input_format == "csv" else lines
+
+
+def _parse_bool(value: Any, default: bool) -> bool:
+    if value is None or value == "":
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ("1", "true", "yes", "y")
+
+
+class BulkGenerator:
+    """Generates posts for every row of an input corpus, with checkpointing."""
+
+    def __init__(
+        self,
+        input_path: str,
+        output_path: str,
+        service: Optional[XPostService] = None,
+        concurrency: int = 8,
+        input_format: Optional[str] = None,
+        text_field: str = "text",
+        style: str = "professional",
+        include_hashtags: bool = True,
+        max_length: int = 280,
+        checkpoint_interval: float = 2.0,
+        progress_stream: Optional[TextIO] = sys.stderr,
+        overwrite: bool = False
+    ):
+        """
+        Initialize the bulk generator.
+
+        Args:
+            input_path: JSONL or CSV file with one input per row
+            output_path: JSONL file results are appended to
+            service: Service used for generation (default: a new XPostService)
+            concurrency: Maximum rows generated at once
+            input_format: "jsonl" or "csv" (default: inferred from the extension)
+            text_field: Row field holding the input text
+            style, include_hashtags, max_length: Defaults for rows that don't set them
+            checkpoint_interval: Seconds between checkpoint writes
+            progress_stream: Where live throughput/ETA is reported (None to disable)
+            overwrite: Replace an existing output file that has no checkpoint
+        """
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint_path = output_path + CHECKPOINT_SUFFIX
+        self.service = service or XPostService()
+        self.concurrency = max(1, concurrency)
+        self.input_format = input_format
+        self.text_field = text_field
+        self.style = style
+        self.include_hashtags = include_hashtags
+        self.max_length = max_length
+        self.checkpoint_interval = checkpoint_interval
+        self.progress_stream = progress_stream
+        self.overwrite = overwrite
+
+        # Every row < watermark is in the output; rows in done_ahead are too.
+        self._watermark = 0
+        self._done_ahead: Set[int] = set()
+
+    def run(self) -> Dict[str, Any]:
+        """Process the corpus (resuming from a checkpoint if present) and return a summary."""
+        offset = self._load_checkpoint()
+        total = count_rows(self.input_path, self.input_format) if self.progress_stream else None
+        resumed_from = self._watermark + len(self._done_ahead)
+
+        processed = failed = 0
+        started = last_report = last_checkpoint = time.monotonic()
+
+        with open(self.output_path, "a+b") as raw_output, \
+                concurrent.futures.ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # Drop anything written after the last checkpoint; those rows are redone
+            raw_output.truncate(offset)
+            pending: Dict[concurrent.futures.Future, int] = {}
+
+            def drain(block: bool) -> None:
+                nonlocal processed, failed
+                if not pending:
+                    return
+                done, _ = concurrent.futures.wait(
+                    pending,
+                    timeout=None if block else 0,
+                    return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                for future in done:
+                    index = pending.pop(future)
+                    record = future.result()
+                    raw_output.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                    self._mark_done(index)
+                    processed += 1
+                    if not record.get("success"):
+                        failed += 1
+
+            for index, row in enumerate(iter_rows(self.input_path, self.input_format)):
+                if index < self._watermark or index in self._done_ahead:
+                    continue
+                while len(pending) >= self.concurrency:
+                    drain(block=True)
+                pending[executor.submit(self._generate, index, row)] = index
+                drain(block=False)
+
+                now = time.monotonic()
+                if now - last_checkpoint >= self.checkpoint_interval:
+                    self._save_checkpoint(raw_output)
+                    last_checkpoint = now
+                if self.progress_stream and now - last_report >= 1.0:
+                    self._report(processed, resumed_from, total, now - started)
+                    last_report = now
+
+            while pending:
+                drain(block=True)
+            self._save_checkpoint(raw_output)
+
+        elapsed = time.monotonic() - started
+        if self.progress_stream:
+            self._report(processed, resumed_from, total, elapsed, final=True)
+        return {
+            "processed": processed,
+            "failed": failed,
+            "resumed_from": resumed_from,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": round(processed / elapsed, 2) if elapsed > 0 else 0.0
+        }
+
+    def _generate(self, index: int, row: Union[Dict[str, Any], RowError]) -> Dict[str, Any]:
+        """Generate one row; any failure becomes a failed record so the run continues."""
+        record: Dict[str, Any] = {"row": index}
+        if isinstance(row, RowError):
+            record.update({"success": False, "error": str(row)})
+            return record
+        if "id" in row:
+            record["id"] = row["id"]
+        text = row.get(self.text_field)
+        if not text:
+            record.update({"success": False, "error": f"Row has no '{self.text_field}' field"})
+            return record
+
+        style = row.get("style") or self.style
+        try:
+            max_length = int(row.get("max_length") or self.max_length)
+        except (TypeError, ValueError):
+            record.update({"success": False, "error": f"Invalid max_length: {row.get('max_length')!r}"})
+            return record
+        include_hashtags = _parse_bool(row.get("include_hashtags"), self.include_hashtags)
+        try:
+            # Bulk drafts stay out of the near-duplicate index and the post history
+            result = self.service.create_post(text, style, include_hashtags, max_length, record=False)
+        except Exception as e:
+            result = {"success": False, "error": f"Failed to create post: {str(e)}"}
+        record.update(result)
+        return record
+
+    def _mark_done(self, index: int) -> None:
+        self._done_ahead.add(index)
+        while self._watermark in self._done_ahead:
+            self._done_ahead.remove(self._watermark)
+            self._watermark += 1
+
+    def _load_checkpoint(self) -> int:
+        """Restore progress; returns the output offset known to be consistent."""
+        if not os.path.exists(self.checkpoint_path):
+            if os.path.exists(self.output_path) and os.path.getsize(self.output_path) and not self.overwrite:
+                raise ValueError(
+                    f"Output file {self.output_path} already exists and has no checkpoint; "
+                    "pass overwrite to replace it."
+                )
+            return 0
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            checkpoint = json.load(f)
+        if checkpoint.get("input_path") != os.path.abspath(self.input_path):
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} belongs to {checkpoint.get('input_path')}; "
+                "use a different output file or delete the checkpoint."
+            )
+        self._watermark = checkpoint["watermark"]
+        self._done_ahead = set(checkpoint["done_ahead"])
+        return checkpoint["output_offset"]
+
+    def _save_checkpoint(self, raw_output) -> None:
+        """Flush output, then atomically record the consistent offset and finished rows."""
+        raw_output.flush()
+        os.fsync(raw_output.fileno())
+        checkpoint = {
+            "input_path": os.path.abspath(self.input_path),
+            "output_offset": raw_output.tell(),
+            "watermark": self._watermark,
+            "done_ahead": sorted(self._done_ahead)
+        }
+        tmp_path = self.checkpoint_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def _report(self, processed: int, resumed_from: int, total: Optional[int], elapsed: float, final: bool = False) -> None:
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        done = resumed_from + processed
+        line = f"{done} rows"
+        if total:
+            line += f"/{total} ({done * 100 / total:.1f}%)"
+            if rate > 0 and not final:
+                line += f", ETA {_format_duration((total - done) / rate)}"
+        line += f", {rate:.1f} rows/s, elapsed {_format_duration(elapsed)}"
+        end = "\n" if final else "\r"
+        self.progress_stream.write(f"\r{line}{end}")
+        self.progress_stream.flush()
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    hours, remainder = divmod(seconds, 3600)
+    minutes, secs = divmod(remainder, 60)
+    return f"{hours:d}:{minutes:02d}:{secs:02d}"
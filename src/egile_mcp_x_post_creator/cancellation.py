@@ -0,0 +1,155 @@
+"""
+Propagating MCP request cancellation into worker threads and provider calls.
+
+Tool handlers run blocking service code in worker threads. run_cancellable
+gives each call a CancelToken, visible to the worker through a context
+variable. When the MCP client cancels the request (or disconnects), the
+token is cancelled and:
+
+- provider HTTP calls made through call_provider, which run on the event
+  loop with the SDKs' async clients, are aborted mid-request;
+- rate-limit queueing and single-flight waits stop waiting;
+- the worker unwinds with RequestCancelled, which is a BaseException so the
+  service's `except Exception` fallbacks never swallow it.
+"""
+
+import contextvars
+import threading
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+import anyio
+import anyio.from_thread
+import anyio.to_thread
+
+_current: contextvars.ContextVar[Optional["CancelToken"]] = contextvars.ContextVar("cancel_token", default=None)
+
+
+class RequestCancelled(BaseException):
+    """The MCP request this work belongs to was cancelled."""
+
+
+class CancelToken:
+    """Cancellation state for one request, shared between the event loop and its worker thread."""
+
+    def __init__(self, async_bridge: bool = False):
+        """
+        Args:
+            async_bridge: Whether the worker runs in an anyio worker thread, so
+                          provider calls can be run on the event loop
+        """
+        self.async_bridge = async_bridge
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._scopes: List[anyio.CancelScope] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        """Cancel the request. Call from the event loop thread."""
+        with self._lock:
+            self._event.set()
+            scopes = list(self._scopes)
+        for scope in scopes:
+            scope.cancel()
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise RequestCancelled()
+
+    def sleep(self, seconds: float) -> None:
+        """Sleep, waking up and raising RequestCancelled as soon as the request is cancelled."""
+        if self._event.wait(seconds):
+            raise RequestCancelled()
+
+    def run_async(self, async_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """From the worker thread, run async_fn on the event loop so cancelling the token aborts it."""
+
+        async def runner() -> Any:
+            with anyio.CancelScope() as scope:
+                with self._lock:
+                    self._scopes.append(scope)
+                    if self._event.is_set():
+                        scope.cancel()
+                try:
+                    return await async_fn()
+                finally:
+                    with self._lock:
+                        self._scopes.remove(scope)
+            raise RequestCancelled()
+
+        return anyio.from_thread.run(runner)
+
+
+def current_token() -> Optional[CancelToken]:
+    """The cancel token of the request the current code runs for, if any."""
+    return _current.get()
+
+
+def check_cancelled() -> None:
+    """Raise RequestCancelled if the current request has been cancelled."""
+    token = _current.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def sleep(seconds: float) -> None:
+    """time.sleep that is interrupted by cancellation of the current request."""
+    token = _current.get()
+    if token is None:
+        time.sleep(seconds)
+    else:
+        token.sleep(seconds)
+
+
+def wait_event(event: threading.Event, poll_interval: float = 0.005) -> None:
+    """Wait for event, raising RequestCancelled within poll_interval of the request being cancelled."""
+    token = _current.get()
+    if token is None:
+        event.wait()
+        return
+    while not event.wait(poll_interval):
+        token.raise_if_cancelled()
+
+
+def call_provider(sync_call: Callable[[], Any], async_call: Callable[[], Awaitable[Any]]) -> Any:
+    """
+    Make a provider API call that cancellation can abort.
+
+    Inside an MCP request the async variant runs on the event loop under the
+    request's cancel scope; elsewhere (CLI, scheduler, tests) the sync one runs.
+    """
+    token = _current.get()
+    if token is None or not token.async_bridge:
+        return sync_call()
+    token.raise_if_cancelled()
+    return token.run_async(async_call)
+
+
+async def run_cancellable(fn: Callable[..., Any], *args: Any, grace: float = 1.0) -> Any:
+    """
+    Run blocking fn(*args) in a worker thread, cancelling it with the calling task.
+
+    On cancellation the worker's token is cancelled and this waits (up to
+    `grace` seconds, shielded) for the worker to unwind, so the worker slot
+    is really free when the cancellation propagates.
+    """
+    token = CancelToken(async_bridge=True)
+    finished = anyio.Event()
+
+    def worker() -> Any:
+        _current.set(token)
+        try:
+            return fn(*args)
+        finally:
+            anyio.from_thread.run_sync(finished.set)
+
+    try:
+        return await anyio.to_thread.run_sync(worker, abandon_on_cancel=True)
+    except anyio.get_cancelled_exc_class():
+        token.cancel()
+        with anyio.move_on_after(grace, shield=True):
+            await finished.wait()
+        raise
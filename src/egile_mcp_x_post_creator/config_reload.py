@@ -0,0 +1,265 @@
+"""
+Hot reloading of the service configuration.
+
+ServiceReloader owns the current XPostService. A background thread polls the
+config files (.env, X_ACCOUNTS_FILE, POLICY_FILE and STYLE_PACKS) and, when
+one changes, builds a new service from them, creates its API clients, and
+only then swaps it in with a single reference assignment. Tool calls take the
+service once when they start, so in-flight calls finish on the old config
+while new calls get the new one, and no client connection is dropped.
+
+Process-wide state shared across services (usage meter, rate governors,
+near-duplicate index, profiler, log sampling) is reconfigured in place at the
+swap, keeping what it has recorded, and the new policy and style packs
+replace the process-wide ones then too. Every setting is parsed before
+anything is changed, so an invalid value leaves the current config untouched.
+Variables only read at startup (RESTART_REQUIRED) are reported, not applied.
+
+Values set in the process environment take precedence over .env, as at
+startup; only variables that came from .env are updated or removed.
+"""
+
+import logging
+import os
+import signal
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import dotenv_values, find_dotenv
+
+from . import log_config
+from .policy import set_policy
+from .profiling import get_profiler
+from .styles import set_style_registry, style_pack_paths
+from .x_service import XPostService
+
+logger = logging.getLogger(__name__)
+
+_Signature = Tuple[Tuple[str, Optional[Tuple[int, int]]], ...]
+
+# Read once at startup; a reload reports changes to these instead of applying them
+RESTART_REQUIRED = frozenset({
+    "FASTMCP_LOG_LEVEL", "LOG_LEVEL", "MCP_LOG_FILE", "MCP_LOG_FORMAT", "MCP_LOG_QUEUE_SIZE",
+    "MCP_OUTPUT_FORMAT", "SCHEDULER_ENABLED", "SCHEDULER_DB_PATH", "SCHEDULER_HEAP_WINDOW",
+    "SCHEDULER_MAX_ATTEMPTS", "SCHEDULER_RETRY_DELAY", "CONFIG_ENV_FILE", "CONFIG_RELOAD_INTERVAL",
+})
+
+
+class ServiceReloader:
+    """The current XPostService, swapped atomically when the config files change."""
+
+    def __init__(
+        self,
+        env_file: Optional[str] = None,
+        interval: Optional[float] = None,
+        factory: Callable[[Optional[XPostService]], XPostService] = XPostService
+    ):
+        """
+        Build the initial service.
+
+        Args:
+            env_file: The .env file to watch (default: CONFIG_ENV_FILE, or the .env found at startup)
+            interval: Seconds between checks for changed files; 0 disables watching
+                      (default: CONFIG_RELOAD_INTERVAL or 2)
+            factory: Builds a service, given the service it replaces (None at startup)
+        """
+        self.env_file = env_file or os.getenv("CONFIG_ENV_FILE") or find_dotenv() or None
+        self.interval = interval if interval is not None else float(os.getenv("CONFIG_RELOAD_INTERVAL", "2"))
+        self._factory = factory
+
+        # Variables .env may change; everything else in the environment was set by the process.
+        # Load the file like load_dotenv, in case it is not the .env found at import time.
+        self._env_values = self._read_env_file()
+        for key, value in self._env_values.items():
+            os.environ.setdefault(key, value)
+        self._env_owned = {key for key, value in self._env_values.items() if os.environ.get(key) == value}
+
+        self._service = factory(None)
+        self.generation = 1
+        self.last_reload: Optional[Dict[str, Any]] = None
+        self._signature = self._file_signature()
+
+        self._reload_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._force = False
+        self._thread: Optional[threading.Thread] = None
+
+    def current(self) -> XPostService:
+        """The service new calls should use. Take it once per call."""
+        return self._service
+
+    def watched_files(self) -> List[str]:
+        """The config files whose changes trigger a reload."""
+        paths = [self.env_file, os.getenv("X_ACCOUNTS_FILE"), os.getenv("POLICY_FILE")]
+        for pack_path in style_pack_paths():
+            if os.path.isdir(pack_path):
+                paths += sorted(os.path.join(pack_path, name) for name in os.listdir(pack_path))
+            paths.append(pack_path)
+        return [path for path in dict.fromkeys(paths) if path]
+
+    def start(self) -> None:
+        """Start watching the config files (no-op if the interval is 0)."""
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._watch, name="config-reload", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def install_signal_handler(self) -> bool:
+        """Reload on SIGHUP. Only possible from the main thread on POSIX; returns whether it was installed."""
+        if not hasattr(signal, "SIGHUP") or threading.current_thread() is not threading.main_thread():
+            return False
+
+        def on_sighup(signum, frame):
+            # Signal handlers must not block; the watcher thread does the reload
+            self._force = True
+            self._wake.set()
+
+        signal.signal(signal.SIGHUP, on_sighup)
+        return True
+
+    def check(self) -> Optional[Dict[str, Any]]:
+        """Reload if any watched file changed since the last check. Returns the reload result, if any."""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return None
+        return self.reload()
+
+    def reload(self) -> Dict[str, Any]:
+        """
+        Rebuild the service from the current config files and swap it in.
+
+        On failure (e.g. an invalid policy file) the current service stays in place.
+
+        Returns:
+            Dictionary with success, the new generation, changed .env variable
+            names (never values), the changed names that need a restart, and
+            how long the rebuild took
+        """
+        with self._reload_lock:
+            started = time.perf_counter()
+            env_state = (dict(self._env_values), set(self._env_owned))
+            changed: Dict[str, Optional[str]] = {}
+            try:
+                changed, restart_required = self._apply_env_file()
+                # Taken after .env is applied, which may point at other accounts/policy files
+                signature = self._file_signature()
+                service = self._factory(self._service)
+                service.warm_up()
+                # Parse all shared settings before applying any of them
+                shared = [(component, component.settings_from_env()) for component in _shared_components(service)]
+            except Exception as e:
+                self._restore_env(changed, env_state)
+                self._signature = self._file_signature()  # don't retry until the files change again
+                logger.error("Config reload failed, keeping the current config: %s", e)
+                self.last_reload = {"success": False, "error": str(e), "generation": self.generation, "at": time.time()}
+                return self.last_reload
+
+            self._service = service
+            set_policy(service.policy)  # also used outside the service, by log redaction
+            set_style_registry(service.styles)
+            for component, settings in shared:
+                component.apply_settings(settings)
+            self.generation += 1
+            self._signature = signature
+            self.last_reload = {
+                "success": True,
+                "generation": self.generation,
+                "changed_env": sorted(changed),
+                "restart_required": restart_required,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                "at": time.time(),
+            }
+            logger.info(
+                "Config reloaded",
+                extra={key: value for key, value in self.last_reload.items() if key != "success"}
+            )
+            return self.last_reload
+
+    def _watch(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                return
+            try:
+                if self._force:
+                    self._force = False
+                    self.reload()
+                else:
+                    self.check()
+            except Exception:
+                logger.exception("Config watcher error")
+
+    def _read_env_file(self) -> Dict[str, str]:
+        if not self.env_file or not os.path.exists(self.env_file):
+            return {}
+        return {key: value for key, value in dotenv_values(self.env_file).items() if value is not None}
+
+    def _apply_env_file(self) -> Tuple[Dict[str, Optional[str]], List[str]]:
+        """
+        Update os.environ from .env.
+
+        Returns:
+            The changed variables with their previous values, and the names of
+            changed RESTART_REQUIRED variables, which are left as they are
+        """
+        values = self._read_env_file()
+        changed: Dict[str, Optional[str]] = {}
+        restart_required: List[str] = []
+        for key in sorted(set(self._env_values) | set(values)):
+            if key not in self._env_owned and key in os.environ:
+                continue  # set by the process environment, which wins over .env
+            if key in RESTART_REQUIRED:
+                if values.get(key) != os.environ.get(key):
+                    restart_required.append(key)
+                continue
+            if key not in values:
+                if key in os.environ:
+                    changed[key] = os.environ.pop(key)
+                self._env_owned.discard(key)
+            else:
+                if os.environ.get(key) != values[key]:
+                    changed[key] = os.environ.get(key)
+                    os.environ[key] = values[key]
+                self._env_owned.add(key)
+        self._env_values = values
+        return changed, restart_required
+
+    def _restore_env(self, changed: Dict[str, Optional[str]], env_state: Tuple[Dict[str, str], set]) -> None:
+        """Undo _apply_env_file after a failed reload."""
+        for key, value in changed.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        self._env_values, self._env_owned = env_state
+
+    def _file_signature(self) -> _Signature:
+        signature = []
+        for path in self.watched_files():
+            try:
+                stat = os.stat(path)
+                signature.append((path, (stat.st_mtime_ns, stat.st_size)))
+            except OSError:
+                signature.append((path, None))
+        return tuple(signature)
+
+
+def _shared_components(service: XPostService) -> List[Any]:
+    """Process-wide state a service uses, each with settings_from_env() and apply_settings()."""
+    governors = [service.rate_governor] + [account.rate_governor for account in service.accounts]
+    components: List[Any] = [service.usage, get_profiler(), log_config]
+    components += list({id(governor): governor for governor in governors}.values())
+    index = service._get_dedup_index()
+    if index is not None:
+        components.append(index)
+    return components
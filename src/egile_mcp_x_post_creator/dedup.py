@@ -0,0 +1,202 @@
+"""
+Near-duplicate detection against post history with MinHash + LSH.
+
+Posts are reduced to character shingles and summarised by a one-permutation
+MinHash signature (each shingle is hashed once and binned, instead of hashed
+once per permutation), which keeps signing and querying well under a
+millisecond in pure Python. Signatures are split into LSH bands so a query
+only compares against posts sharing at least one band, and the index is
+persisted as an append-only log that is replayed on startup.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".egile_mcp_x_post_creator", "dedup_index.jsonl")
+
+_EMPTY = 0xFFFFFFFF
+_URL_PATTERN = re.compile(r"https?://\S+")
+
+
+def _shingles(text: str, size: int) -> Iterable[bytes]:
+    """Character shingles of the normalized text (lowercase, collapsed whitespace, URLs dropped)."""
+    normalized = " ".join(_URL_PATTERN.sub(" ", text.lower()).split())
+    if len(normalized) <= size:
+        return [normalized.encode("utf-8")] if normalized else []
+    return [normalized[i:i + size].encode("utf-8") for i in range(len(normalized) - size + 1)]
+
+
+class NearDuplicateIndex:
+    """Incremental, persistent MinHash/LSH index over published posts."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        threshold: Optional[float] = None,
+        num_perm: int = 128,
+        bands: int = 32,
+        shingle_size: int = 5
+    ):
+        """
+        Initialize the index, replaying any persisted entries.
+
+        Args:
+            path: Append-only index file (default: DEDUP_INDEX_PATH or
+                  ~/.egile_mcp_x_post_creator/dedup_index.jsonl); ":memory:" disables persistence
+            threshold: Estimated Jaccard similarity at which posts count as
+                       near-duplicates (default: DEDUP_THRESHOLD or 0.8)
+            num_perm: Signature length
+            bands: Number of LSH bands; num_perm must be divisible by it
+            shingle_size: Characters per shingle
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.path = path or os.getenv("DEDUP_INDEX_PATH", DEFAULT_INDEX_PATH)
+        self.threshold = threshold if threshold is not None else self.settings_from_env()["threshold"]
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+
+        self._lock = threading.Lock()
+        self._file_lock = threading.Lock()  # appends don't hold up queries
+        self._entries: List[Dict[str, Any]] = []
+        self._signatures: List[array] = []
+        self._buckets: List[Dict[Tuple[int, ...], List[int]]] = [{} for _ in range(bands)]
+        self._file = None
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._replay()
+            self._file = open(self.path, "a", encoding="utf-8")
+
+    def signature(self, text: str) -> array:
+        """One-permutation MinHash signature with rotation densification."""
+        num_perm = self.num_perm
+        mins = [_EMPTY] * num_perm
+        for shingle in _shingles(text, self.shingle_size):
+            h = zlib.crc32(shingle)
+            # Mix so the bin and the in-bin value use independent bits
+            h = (h * 0x9E3779B1) & 0xFFFFFFFF
+            bucket = h % num_perm
+            value = h // num_perm
+            if value < mins[bucket]:
+                mins[bucket] = value
+
+        if all(v == _EMPTY for v in mins):
+            return array("I", mins)
+        # Fill empty bins from the next non-empty bin (offset so they don't collide)
+        for i in range(num_perm):
+            if mins[i] == _EMPTY:
+                j, step = (i + 1) % num_perm, 1
+                while mins[j] == _EMPTY:
+                    j, step = (j + 1) % num_perm, step + 1
+                mins[i] = (mins[j] + step * 0x3C6EF372) & 0xFFFFFFFF
+        return array("I", mins)
+
+    def similarity(self, a: array, b: array) -> float:
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(1 for x, y in zip(a, b) if x == y) / self.num_perm
+
+    @staticmethod
+    def settings_from_env() -> Dict[str, Any]:
+        """Read DEDUP_THRESHOLD (raises ValueError if it is not a number)."""
+        return {"threshold": float(os.getenv("DEDUP_THRESHOLD", "0.8"))}
+
+    def apply_settings(self, settings: Dict[str, Any]) -> None:
+        """Apply settings from settings_from_env after a config reload; indexed posts are kept."""
+        self.threshold = settings["threshold"]
+
+    def query(
+        self,
+        text: str,
+        kinds: Optional[Iterable[str]] = None,
+        where: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Find indexed posts similar to text.
+
+        Args:
+            text: The post text to check
+            kinds: Only consider entries of these kinds (e.g. ["published"])
+            where: Only consider entries whose metadata has these values (e.g. {"account": "acme"})
+
+        Returns:
+            Matches at or above the threshold, most similar first
+        """
+        signature = self.signature(text)
+        allowed = set(kinds) if kinds is not None else None
+        with self._lock:
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+            matches = []
+            for position in candidates:
+                entry = self._entries[position]
+                if allowed is not None and entry["kind"] not in allowed:
+                    continue
+                if where and any(entry.get(key) != value for key, value in where.items()):
+                    continue
+                score = self.similarity(signature, self._signatures[position])
+                if score >= self.threshold:
+                    matches.append({**entry, "similarity": round(score, 3)})
+        matches.sort(key=lambda m: m["similarity"], reverse=True)
+        return matches
+
+    def add(self, text: str, kind: str, **metadata: Any) -> None:
+        """Index a post and append it to the persisted log."""
+        signature = self.signature(text)
+        entry = {"kind": kind, "text": text[:280], "created_at": time.time(), **metadata}
+        with self._lock:
+            self._insert(entry, signature)
+        if self._file is not None:
+            line = json.dumps(dict(entry, signature=signature.tobytes().hex()), ensure_ascii=False) + "\n"
+            with self._file_lock:
+                self._file.write(line)
+                self._file.flush()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _band_keys(self, signature: array) -> List[Tuple[int, ...]]:
+        rows = self.rows
+        return [tuple(signature[band * rows:(band + 1) * rows]) for band in range(self.bands)]
+
+    def _insert(self, entry: Dict[str, Any], signature: array) -> None:
+        position = len(self._entries)
+        self._entries.append(entry)
+        self._signatures.append(signature)
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, []).append(position)
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    signature = array("I", bytes.fromhex(record.pop("signature")))
+                except (ValueError, KeyError):
+                    continue  # torn write at the end of the log
+                if len(signature) == self.num_perm:
+                    self._insert(record, signature)
+
+
+_indexes: Dict[str, NearDuplicateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_dedup_index(path: Optional[str] = None) -> NearDuplicateIndex:
+    """Get the process-wide index for a path (default: DEDUP_INDEX_PATH)."""
+    path = path or os.getenv("DEDUP_INDEX_PATH", DEFAULT_INDEX_PATH)
+    with _indexes_lock:
+        if path not in _indexes:
+            _indexes[path] = NearDuplicateIndex(path)
+        return _indexes[path]
@@ -0,0 +1,299 @@
+"""
+Embedded post-history store.
+
+Every drafted and published post is recorded in SQLite (WAL mode, indexed
+on time, style and tweet id). Writes are queued and committed in batches by
+a background thread, so recording never adds disk I/O to the request path.
+The same database caches engagement metrics fetched for published tweets.
+"""
+
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".egile_mcp_x_post_creator", "history.db")
+
+COLUMNS = (
+    "created_at", "kind", "input_text", "post_text", "style", "provider",
+    "latency_ms", "success", "error", "tweet_id", "tweet_url", "stats", "account"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS post_history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at REAL NOT NULL,
+    kind TEXT NOT NULL,
+    input_text TEXT,
+    post_text TEXT,
+    style TEXT,
+    provider TEXT,
+    latency_ms REAL,
+    success INTEGER NOT NULL DEFAULT 1,
+    error TEXT,
+    tweet_id TEXT,
+    tweet_url TEXT,
+    stats TEXT,
+    account TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_post_history_created_at ON post_history (created_at);
+CREATE INDEX IF NOT EXISTS idx_post_history_style ON post_history (style, created_at);
+CREATE INDEX IF NOT EXISTS idx_post_history_tweet_id ON post_history (tweet_id);
+CREATE INDEX IF NOT EXISTS idx_post_history_account ON post_history (account, created_at);
+CREATE TABLE IF NOT EXISTS post_metrics (
+    tweet_id TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    metrics TEXT NOT NULL
+);
+"""
+
+# Stay well under SQLite's bound-parameter limit in IN (...) lookups
+_LOOKUP_CHUNK = 500
+
+
+class PostHistory:
+    """SQLite post history with a batched background writer."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        batch_size: int = 200,
+        flush_interval: float = 0.5,
+        max_queue: int = 10000
+    ):
+        """
+        Open (or create) the history database and start the writer thread.
+
+        Args:
+            db_path: SQLite file (default: HISTORY_DB_PATH or ~/.egile_mcp_x_post_creator/history.db)
+            batch_size: Maximum records committed per transaction
+            flush_interval: Longest a record waits in the queue before being committed
+            max_queue: Records beyond this many pending writes are dropped (and counted)
+        """
+        self.db_path = db_path or os.getenv("HISTORY_DB_PATH", DEFAULT_DB_PATH)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._writer_conn = self._connect()
+        self._migrate()
+        self._writer_conn.executescript(_SCHEMA)
+        self._local = threading.local()
+
+        self._queue: "queue.Queue[Optional[Dict[str, Any]]]" = queue.Queue(maxsize=max_queue)
+        self._flushed = threading.Condition()
+        self._pending = 0
+        self._thread = threading.Thread(target=self._run, name="post-history-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _migrate(self) -> None:
+        """Add columns introduced after a database was created."""
+        columns = {row["name"] for row in self._writer_conn.execute("PRAGMA table_info(post_history)")}
+        if columns and "account" not in columns:
+            with self._writer_conn:
+                self._writer_conn.execute("ALTER TABLE post_history ADD COLUMN account TEXT")
+
+    def record(self, kind: str, **fields: Any) -> None:
+        """
+        Queue a history record without blocking.
+
+        Args:
+            kind: "created" or "published"
+            **fields: Any of COLUMNS (stats may be a dict)
+        """
+        record = {column: fields.get(column) for column in COLUMNS}
+        record["kind"] = kind
+        record["created_at"] = fields.get("created_at") or time.time()
+        record["success"] = 1 if fields.get("success", True) else 0
+        if isinstance(record["stats"], dict):
+            record["stats"] = json.dumps(record["stats"])
+        with self._flushed:
+            self._pending += 1
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._flushed:
+                self._pending -= 1
+                self.dropped += 1
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Wait until every queued record has been committed."""
+        with self._flushed:
+            return self._flushed.wait_for(lambda: self._pending == 0, timeout)
+
+    def close(self) -> None:
+        """Commit pending records and stop the writer."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        style: Optional[str] = None,
+        kind: Optional[str] = None,
+        tweet_id: Optional[str] = None,
+        account: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = 20,
+        cursor: Optional[int] = None
+    ) -> Dict[str, Any]:
+        """
+        Search history, newest first.
+
+        Args:
+            query: Substring to look for in the input or post text
+            style, kind, tweet_id, account: Exact-match filters
+            since, until: UNIX timestamp bounds on created_at
+            limit: Page size
+            cursor: next_cursor from the previous page
+
+        Returns:
+            Dictionary with "records" and "next_cursor" (None on the last page)
+        """
+        clauses, params = [], []
+        if query:
+            clauses.append("(post_text LIKE ? OR input_text LIKE ?)")
+            params.extend([f"%{query}%", f"%{query}%"])
+        for column, value in (("style", style), ("kind", kind), ("tweet_id", tweet_id), ("account", account)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if cursor is not None:
+            clauses.append("id < ?")
+            params.append(cursor)
+
+        sql = "SELECT * FROM post_history"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY id DESC LIMIT ?"
+        params.append(limit + 1)
+
+        rows = self._thread_conn().execute(sql, params).fetchall()
+        records = [self._row_to_dict(row) for row in rows[:limit]]
+        next_cursor = records[-1]["id"] if len(rows) > limit else None
+        return {"records": records, "next_cursor": next_cursor}
+
+    def get_metrics(self, tweet_ids: List[str], max_age: float) -> Dict[str, Dict[str, Any]]:
+        """
+        Look up cached engagement metrics.
+
+        Args:
+            tweet_ids: Tweets to look up
+            max_age: Ignore entries fetched more than this many seconds ago
+
+        Returns:
+            Mapping of tweet id to its metrics plus "fetched_at" (UNIX time),
+            for the ids with a fresh enough entry
+        """
+        cutoff = time.time() - max_age
+        found: Dict[str, Dict[str, Any]] = {}
+        conn = self._thread_conn()
+        for start in range(0, len(tweet_ids), _LOOKUP_CHUNK):
+            chunk = tweet_ids[start:start + _LOOKUP_CHUNK]
+            rows = conn.execute(
+                f"SELECT tweet_id, fetched_at, metrics FROM post_metrics "
+                f"WHERE tweet_id IN ({', '.join('?' for _ in chunk)}) AND fetched_at >= ?",
+                [*chunk, cutoff]
+            ).fetchall()
+            for row in rows:
+                found[row["tweet_id"]] = dict(json.loads(row["metrics"]), fetched_at=row["fetched_at"])
+        return found
+
+    def store_metrics(self, metrics: Dict[str, Dict[str, Any]], fetched_at: Optional[float] = None) -> None:
+        """
+        Cache freshly fetched metrics, replacing older entries.
+
+        Written synchronously (unlike record) so the next poll reads them back;
+        callers have just spent a network round trip fetching them.
+        """
+        fetched_at = fetched_at or time.time()
+        conn = self._thread_conn()
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO post_metrics (tweet_id, fetched_at, metrics) VALUES (?, ?, ?)",
+                [(tweet_id, fetched_at, json.dumps(values)) for tweet_id, values in metrics.items()]
+            )
+
+    def _thread_conn(self) -> sqlite3.Connection:
+        """Per-thread connection; WAL lets readers run alongside the writer."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        record["created_at"] = datetime.fromtimestamp(record["created_at"], tz=timezone.utc).isoformat()
+        record["success"] = bool(record["success"])
+        if record["stats"]:
+            record["stats"] = json.loads(record["stats"])
+        return {key: value for key, value in record.items() if value is not None}
+
+    def _run(self) -> None:
+        insert = (
+            f"INSERT INTO post_history ({', '.join(COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in COLUMNS)})"
+        )
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            try:
+                with self._writer_conn:
+                    self._writer_conn.executemany(insert, [tuple(r[c] for c in COLUMNS) for r in batch])
+            except sqlite3.Error:
+                logger.exception("Failed to write %s history records", len(batch))
+            with self._flushed:
+                self._pending -= len(batch)
+                self._flushed.notify_all()
+
+
+_histories: Dict[str, PostHistory] = {}
+_histories_lock = threading.Lock()
+
+
+def get_post_history(db_path: Optional[str] = None) -> PostHistory:
+    """Get the process-wide history store for a path (default: HISTORY_DB_PATH)."""
+    db_path = db_path or os.getenv("HISTORY_DB_PATH", DEFAULT_DB_PATH)
+    with _histories_lock:
+        if db_path not in _histories:
+            _histories[db_path] = PostHistory(db_path)
+        return _histories[db_path]
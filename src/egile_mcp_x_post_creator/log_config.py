@@ -0,0 +1,191 @@
+"""
+Non-blocking, sampled, structured logging for the MCP server.
+
+Log records are put on a bounded in-memory queue and written to the real
+handler (stderr or MCP_LOG_FILE) by a background listener thread, so disk
+I/O never happens on the request path. Records are JSON by default, per-
+request INFO/DEBUG logs are sampled (warnings and errors always pass), and
+helpers keep user text out of the logs.
+"""
+
+import atexit
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import uuid
+from typing import Any, Dict, Optional
+
+from .policy import ContentPolicy, PolicyConfigError, get_policy
+
+# Attributes every LogRecord has; anything else came from `extra=` and is logged as a field
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_request_id: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_id", default=None)
+_request_tool: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("request_tool", default=None)
+_request_sampled: contextvars.ContextVar[bool] = contextvars.ContextVar("request_sampled", default=True)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Per-request settings, read from the environment on first use and updated by config reloads
+_settings: Optional[Dict[str, Any]] = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including request context and `extra=` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "ts": self.formatTime(record, "%Y-%m-%dT%H:%M:%S") + f".{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Attach request id/tool and drop low-severity records of unsampled requests."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        request_id = _request_id.get()
+        if request_id is not None:
+            if record.levelno < logging.WARNING and not _request_sampled.get():
+                return False
+            record.request_id = request_id
+            record.tool = _request_tool.get()
+        return True
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: when the queue is full the record is dropped and counted."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: str = "INFO", log_file: Optional[str] = None) -> DroppingQueueHandler:
+    """
+    Route all logging through a background queue listener.
+
+    Honours MCP_LOG_FORMAT ("json" or "text") and MCP_LOG_QUEUE_SIZE.
+    Calling it again replaces the previous configuration.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+
+    if log_file:
+        target: logging.Handler = logging.FileHandler(log_file)
+    else:
+        target = logging.StreamHandler()  # stderr; stdout belongs to the stdio transport
+    if os.getenv("MCP_LOG_FORMAT", "json").lower() == "json":
+        target.setFormatter(JsonFormatter())
+    else:
+        target.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=int(os.getenv("MCP_LOG_QUEUE_SIZE", "10000"))))
+    queue_handler.addFilter(RequestContextFilter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, level.upper(), logging.INFO))
+
+    _listener = logging.handlers.QueueListener(queue_handler.queue, target, respect_handler_level=True)
+    _listener.start()
+    return queue_handler
+
+
+def _stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()
+
+
+atexit.register(_stop_listener)
+
+
+def settings_from_env() -> Dict[str, Any]:
+    """
+    Read MCP_LOG_SAMPLE_RATE and MCP_LOG_TEXT_CHARS.
+
+    Raises:
+        ValueError: If a value is not a number
+    """
+    return {
+        "sample_rate": float(os.getenv("MCP_LOG_SAMPLE_RATE", "1.0")),
+        "text_chars": int(os.getenv("MCP_LOG_TEXT_CHARS", "40")),
+    }
+
+
+def apply_settings(settings: Dict[str, Any]) -> None:
+    """Apply settings from settings_from_env after a config reload."""
+    global _settings
+    _settings = settings
+
+
+def _get_settings() -> Dict[str, Any]:
+    global _settings
+    if _settings is None:
+        _settings = settings_from_env()
+    return _settings
+
+
+def start_request(tool: str, sample_rate: Optional[float] = None) -> str:
+    """
+    Begin a request scope for the current context and decide whether it is sampled.
+
+    Args:
+        tool: Name of the tool being served
+        sample_rate: Fraction of requests whose INFO/DEBUG logs are kept
+                     (default: MCP_LOG_SAMPLE_RATE or 1.0)
+
+    Returns:
+        The generated request id
+    """
+    if sample_rate is None:
+        sample_rate = _get_settings()["sample_rate"]
+    request_id = uuid.uuid4().hex[:12]
+    _request_id.set(request_id)
+    _request_tool.set(tool)
+    _request_sampled.set(sample_rate >= 1.0 or random.random() < sample_rate)
+    return request_id
+
+
+def redact_text(text: Optional[str], max_chars: Optional[int] = None) -> str:
+    """
+    Describe user text for logs without logging it in full.
+
+    Secrets the content policy detects are masked, then MCP_LOG_TEXT_CHARS
+    (default 40) characters are kept; 0 logs only the length.
+    """
+    if text is None:
+        return "<none>"
+    if max_chars is None:
+        max_chars = _get_settings()["text_chars"]
+    if max_chars <= 0:
+        return f"<{len(text)} chars>"
+    try:
+        policy = get_policy()
+    except PolicyConfigError:
+        policy = ContentPolicy()  # logging must not fail on a bad policy file
+    redacted = policy.redact_secrets(text)
+    if len(redacted) <= max_chars:
+        return redacted
+    return f"{redacted[:max_chars]}… <{len(text)} chars>"
@@ -0,0 +1,224 @@
+"""
+Chunked media upload for X/Twitter (INIT / APPEND / FINALIZE / STATUS).
+
+Files are memory-mapped and each APPEND segment is streamed to the socket as
+memoryview slices of the mapping, so even large videos are uploaded without
+reading the file into memory. A bounded number of segments are in flight at
+once, and video processing is awaited by polling STATUS asynchronously.
+"""
+
+import asyncio
+import concurrent.futures
+import mimetypes
+import mmap
+import os
+import secrets
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+DEFAULT_UPLOAD_URL = "https://upload.twitter.com/1.1/media/upload.json"
+
+# X accepts APPEND segments of up to 5 MB
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+
+# Size of the memoryview slices handed to the transport while streaming a segment
+_STREAM_PIECE_SIZE = 64 * 1024
+
+
+class MediaUploadError(Exception):
+    """Raised when X rejects or fails to process an upload."""
+
+
+def media_category_for(media_type: str) -> str:
+    """Map a MIME type to X's media_category."""
+    if media_type == "image/gif":
+        return "tweet_gif"
+    if media_type.startswith("video/"):
+        return "tweet_video"
+    return "tweet_image"
+
+
+class MediaUploader:
+    """Uploads media files to X using the chunked upload flow."""
+
+    def __init__(
+        self,
+        credentials: Dict[str, str],
+        upload_url: Optional[str] = None,
+        chunk_size: Optional[int] = None,
+        max_parallel: Optional[int] = None,
+        processing_timeout: float = 300.0
+    ):
+        """
+        Initialize the uploader.
+
+        Args:
+            credentials: OAuth 1.0a user credentials with consumer_key, consumer_secret,
+                         access_token and access_token_secret
+            upload_url: Media upload endpoint (default: X_MEDIA_UPLOAD_URL or X's v1.1 endpoint)
+            chunk_size: Bytes per APPEND segment (default: X_MEDIA_CHUNK_SIZE or 4 MiB)
+            max_parallel: Maximum APPEND segments in flight (default: X_MEDIA_MAX_PARALLEL or 4)
+            processing_timeout: Seconds to wait for X to finish processing a video
+        """
+        self.credentials = credentials
+        self.upload_url = upload_url or os.getenv("X_MEDIA_UPLOAD_URL", DEFAULT_UPLOAD_URL)
+        self.chunk_size = chunk_size or int(os.getenv("X_MEDIA_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE)))
+        self.max_parallel = max_parallel or int(os.getenv("X_MEDIA_MAX_PARALLEL", "4"))
+        self.processing_timeout = processing_timeout
+
+    def upload(self, path: str) -> str:
+        """Upload a file and return its media id (blocking wrapper around upload_async)."""
+        return _run_sync(self.upload_async(path))
+
+    def upload_many(self, paths: List[str]) -> List[str]:
+        """Upload several files concurrently and return their media ids in order."""
+        async def _upload_all() -> List[str]:
+            async with self._client() as client:
+                return list(await asyncio.gather(*(self._upload(client, p) for p in paths)))
+        return _run_sync(_upload_all())
+
+    async def upload_async(self, path: str) -> str:
+        """Upload a file and return its media id."""
+        async with self._client() as client:
+            return await self._upload(client, path)
+
+    def _client(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(max_connections=self.max_parallel + 1)
+        return httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(60.0, connect=10.0))
+
+    async def _upload(self, client: httpx.AsyncClient, path: str) -> str:
+        total_bytes = os.path.getsize(path)
+        if total_bytes == 0:
+            raise MediaUploadError(f"Media file is empty: {path}")
+
+        media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+        init = await self._command(client, "POST", {
+            "command": "INIT",
+            "total_bytes": str(total_bytes),
+            "media_type": media_type,
+            "media_category": media_category_for(media_type)
+        })
+        media_id = init["media_id_string"]
+
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            semaphore = asyncio.Semaphore(self.max_parallel)
+
+            async def append(segment_index: int, start: int) -> None:
+                async with semaphore:
+                    with view[start:start + self.chunk_size] as segment:
+                        await self._append(client, media_id, segment_index, segment)
+
+            tasks = [
+                asyncio.ensure_future(append(index, start))
+                for index, start in enumerate(range(0, total_bytes, self.chunk_size))
+            ]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # Segments still in flight hold slices of the mapping: stop them and let
+                # them unwind before the view is released and the file unmapped
+                for task in tasks:
+                    task.cancel()
+                await asyncio.wait(tasks)
+                view.release()
+
+        finalize = await self._command(client, "POST", {"command": "FINALIZE", "media_id": media_id})
+        await self._wait_for_processing(client, media_id, finalize.get("processing_info"))
+        return media_id
+
+    async def _append(self, client: httpx.AsyncClient, media_id: str, segment_index: int, segment: memoryview) -> None:
+        boundary = secrets.token_hex(16)
+        head = (
+            f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="media"; filename="blob"\r\n'
+            f"Content-Type: application/octet-stream\r\n\r\n"
+        ).encode()
+        tail = f"\r\n--{boundary}--\r\n".encode()
+
+        async def body() -> AsyncIterator[Any]:
+            yield head
+            for start in range(0, len(segment), _STREAM_PIECE_SIZE):
+                yield segment[start:start + _STREAM_PIECE_SIZE]
+            yield tail
+
+        await self._command(
+            client,
+            "POST",
+            {"command": "APPEND", "media_id": media_id, "segment_index": str(segment_index)},
+            content=body(),
+            headers={
+                "Content-Type": f"multipart/form-data; boundary={boundary}",
+                "Content-Length": str(len(head) + len(segment) + len(tail))
+            }
+        )
+
+    async def _wait_for_processing(
+        self,
+        client: httpx.AsyncClient,
+        media_id: str,
+        processing_info: Optional[Dict[str, Any]]
+    ) -> None:
+        """Poll STATUS until X has finished processing the media (videos and GIFs)."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.processing_timeout
+
+        while processing_info and processing_info.get("state") in ("pending", "in_progress"):
+            delay = float(processing_info.get("check_after_secs", 1))
+            if loop.time() + delay > deadline:
+                raise MediaUploadError(f"Timed out waiting for media {media_id} to be processed")
+            await asyncio.sleep(delay)
+            status = await self._command(client, "GET", {"command": "STATUS", "media_id": media_id})
+            processing_info = status.get("processing_info")
+
+        if processing_info and processing_info.get("state") == "failed":
+            error = processing_info.get("error", {})
+            raise MediaUploadError(f"X failed to process media {media_id}: {error.get('message', error)}")
+
+    async def _command(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        params: Dict[str, str],
+        content: Any = None,
+        headers: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """Send one signed upload command and return its JSON response (if any)."""
+        url = str(httpx.URL(self.upload_url, params=params))
+        request_headers = dict(headers or {})
+        request_headers["Authorization"] = self._authorization(method, url)
+
+        response = await client.request(method, url, content=content, headers=request_headers)
+        if response.status_code >= 400:
+            raise MediaUploadError(
+                f"{params['command']} failed with HTTP {response.status_code}: {response.text[:200]}"
+            )
+        return response.json() if response.content else {}
+
+    def _authorization(self, method: str, url: str) -> str:
+        """Build an OAuth 1.0a header. All upload parameters travel in the query string, so they are signed."""
+        try:
+            from oauthlib.oauth1 import Client
+        except ImportError:
+            raise ImportError("oauthlib is not installed. Run: pip install tweepy")
+
+        client = Client(
+            self.credentials["consumer_key"],
+            client_secret=self.credentials["consumer_secret"],
+            resource_owner_key=self.credentials["access_token"],
+            resource_owner_secret=self.credentials["access_token_secret"]
+        )
+        _, signed_headers, _ = client.sign(url, http_method=method)
+        return signed_headers["Authorization"]
+
+
+def _run_sync(coro):
+    """Run a coroutine to completion from synchronous code, even inside a running event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    # Called from a thread that already runs a loop (e.g. a sync MCP tool): use a helper thread
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
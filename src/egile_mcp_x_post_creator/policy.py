@@ -0,0 +1,314 @@
+"""
+Local pre-publish content policy.
+
+Text is checked before any LLM or X API call against three compiled rule
+sets: a blocklist of terms (one trie-shaped regex, so matching stays fast
+with thousands of terms), secret patterns (API keys, tokens, private keys,
+and email addresses if enabled) and link domains. Each check is a handful of regex scans
+over the text, which takes microseconds for post-sized input.
+
+Optional configuration comes from a JSON file (POLICY_FILE):
+
+    {
+      "blocked_terms": ["confidential", "internal only"],
+      "blocked_terms_action": "reject",
+      "secret_rules": {"email": true, "jwt": false},
+      "secret_patterns": {"ticket_id": "TICKET-\\\\d{4,}"},
+      "secret_action": "redact",
+      "allowed_domains": [],
+      "blocked_domains": ["bit.ly"],
+      "url_action": "reject"
+    }
+
+Actions are "reject" or "redact". Redaction only applies where the caller
+allows it (drafting); publishing never silently alters confirmed text.
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Tuple
+
+# Characters that may not come right before a secret (the match would be mid-token)
+_TOKEN_CHAR = r"[A-Za-z0-9_\-]"
+
+
+def _anchored(prefix: str, body: str) -> str:
+    """
+    prefix + body, not preceded by a token character.
+
+    The boundary check follows the literal prefix (as a lookbehind over it), so
+    the regex engine can still skip ahead to the prefix instead of trying
+    every offset, which a leading lookbehind would force.
+    """
+    return f"{prefix}(?<!{_TOKEN_CHAR}{prefix}){body}"
+
+
+SECRET_RULES = {
+    "private_key": r"-----BEGIN (?:[A-Z]+ )?PRIVATE KEY-----",
+    "anthropic_api_key": _anchored("sk-ant-", r"[A-Za-z0-9_\-]{20,}"),
+    # Project/service keys carry a type prefix; legacy keys are one unbroken alphanumeric run
+    "openai_api_key": _anchored("sk-", r"(?:(?:proj|svcacct|admin)-[A-Za-z0-9_\-]{20,}|[A-Za-z0-9]{32,})"),
+    "aws_access_key": _anchored("(?:AKIA|ASIA)", r"[0-9A-Z]{16}\b"),
+    "github_token": _anchored("gh[pousr]_", r"[A-Za-z0-9]{36,}") + "|" + _anchored("github_pat_", r"[A-Za-z0-9_]{22,}"),
+    "slack_token": _anchored("xox[abprs]-", r"[A-Za-z0-9\-]{10,}"),
+    "google_api_key": _anchored("AIza", r"[0-9A-Za-z_\-]{35}\b"),
+    "jwt": _anchored("eyJ", r"[A-Za-z0-9_\-]{10,}\.eyJ[A-Za-z0-9_\-]{10,}\.[A-Za-z0-9_\-]{10,}"),
+    "email": r"(?<![A-Za-z0-9._%+\-])[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}\b",
+}
+
+# Rules that only apply when enabled in "secret_rules": posts often carry a contact address
+OPT_IN_RULES = {"email"}
+
+# A character every match contains, for rules without a literal prefix
+_SECRET_HINTS = {"email": "@"}
+
+ACTIONS = ("reject", "redact")
+
+_LABEL = r"[A-Za-z0-9](?:[A-Za-z0-9\-]*[A-Za-z0-9])?"
+
+# A URL with a scheme (any user@ prefix is skipped, it is not the host), or a
+# bare name.tld token; _is_link decides which bare tokens X turns into links
+_URL_PATTERN = re.compile(
+    r"(?<![\w@.\-])(?P<scheme>https?://(?:[^\s/?#@]+@)?)?"
+    rf"(?P<host>{_LABEL}(?:\.{_LABEL})*)(?P<port>:\d+)?(?P<path>[/?#][^\s]*)?",
+    re.IGNORECASE
+)
+
+# Generic TLDs X links without a scheme; any two-letter TLD is treated as a country code
+_GENERIC_TLDS = frozenset({
+    "com", "net", "org", "info", "biz", "edu", "gov", "mil", "int", "name", "pro", "mobi", "app", "dev",
+    "xyz", "online", "site", "tech", "store", "shop", "blog", "cloud", "live", "news", "link", "click",
+})
+
+# Country-code domains X links without a scheme or path
+_SPECIAL_CC_TLDS = frozenset({"co", "tv"})
+
+
+def _is_link(match: "re.Match[str]") -> bool:
+    """
+    Whether X's autolinker would turn a _URL_PATTERN match into a link.
+
+    Bare domains need a known TLD, and a single name under a country code
+    (bit.ly) is only linked with a path (bit.ly/abc), as on X.
+    """
+    if match.group("scheme"):
+        return True
+    labels = match.group("host").lower().split(".")
+    if len(labels) < 2:
+        return False
+    tld = labels[-1]
+    if tld in _GENERIC_TLDS:
+        return True
+    if len(tld) != 2 or not tld.isalpha():
+        return False
+    return len(labels) > 2 or tld in _SPECIAL_CC_TLDS or bool(match.group("path"))
+
+
+class PolicyConfigError(Exception):
+    """Raised when the policy file is invalid."""
+
+
+class PolicyVerdict:
+    """Outcome of a policy check."""
+
+    __slots__ = ("allowed", "text", "violations", "redactions")
+
+    def __init__(self, allowed: bool, text: str, violations: List[Dict[str, str]], redactions: List[Dict[str, str]]):
+        self.allowed = allowed
+        self.text = text
+        self.violations = violations
+        self.redactions = redactions
+
+    @property
+    def error(self) -> str:
+        """One-line description of why the text was rejected."""
+        return "; ".join(f"{v['category']} {v['rule']}: {v['match']}" for v in self.violations)
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Regex alternation shaped as a prefix trie, so the engine never re-scans shared prefixes.
+
+    A space in a term matches any run of whitespace.
+    """
+    trie: Dict[str, Any] = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        optional = "" in node
+        branches = [
+            (r"\s+" if char == " " else re.escape(char)) + build(child)
+            for char, child in sorted(node.items()) if char
+        ]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if optional:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+def _mask(value: str) -> str:
+    """Show enough of a secret to recognize it, never the secret itself."""
+    return f"{value[:4]}… ({len(value)} chars)"
+
+
+class ContentPolicy:
+    """Compiled blocklist, secret and link rules."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        """
+        Compile a policy.
+
+        Args:
+            config: Policy settings (see the module docstring); None uses the defaults:
+                    the built-in secret rules except OPT_IN_RULES, with redaction, and no
+                    term or domain rules
+
+        Raises:
+            PolicyConfigError: If a setting or pattern is invalid
+        """
+        config = config or {}
+        self.blocked_terms_action = self._action(config, "blocked_terms_action", "reject")
+        self.secret_action = self._action(config, "secret_action", "redact")
+        self.url_action = self._action(config, "url_action", "reject")
+
+        terms = sorted({" ".join(term.lower().split()) for term in config.get("blocked_terms", []) if term.strip()})
+        self._blocklist = (
+            re.compile(r"(?<!\w)" + _trie_pattern(terms) + r"(?!\w)", re.IGNORECASE) if terms else None
+        )
+
+        enabled = config.get("secret_rules", {})
+        rules = {
+            name: pattern for name, pattern in SECRET_RULES.items() if enabled.get(name, name not in OPT_IN_RULES)
+        }
+        rules.update(config.get("secret_patterns", {}))
+        self._secrets: List[Tuple[str, Optional[str], Pattern]] = []
+        for name, pattern in rules.items():
+            try:
+                self._secrets.append((name, _SECRET_HINTS.get(name), re.compile(pattern)))
+            except re.error as e:
+                raise PolicyConfigError(f"Invalid secret pattern {name!r}: {e}")
+
+        self.allowed_domains = tuple(d.lower().lstrip(".") for d in config.get("allowed_domains", []))
+        self.blocked_domains = tuple(d.lower().lstrip(".") for d in config.get("blocked_domains", []))
+
+    @staticmethod
+    def _action(config: Dict[str, Any], key: str, default: str) -> str:
+        action = config.get(key, default)
+        if action not in ACTIONS:
+            raise PolicyConfigError(f"{key} must be one of {', '.join(ACTIONS)}, not {action!r}")
+        return action
+
+    def check(self, text: str, redact: bool = False) -> PolicyVerdict:
+        """
+        Check text against the policy.
+
+        Args:
+            text: Input or post text
+            redact: Apply "redact" actions (mask secrets, drop links) instead of rejecting
+
+        Returns:
+            PolicyVerdict; when allowed, .text is the (possibly redacted) text to use
+        """
+        violations: List[Dict[str, str]] = []
+        redactions: List[Dict[str, str]] = []
+
+        if self._blocklist is not None:
+            for match in self._blocklist.finditer(text):
+                entry = {"category": "blocked_term", "rule": "blocklist", "match": match.group(0)}
+                if redact and self.blocked_terms_action == "redact":
+                    redactions.append(entry)
+                else:
+                    violations.append(entry)
+            if redactions:
+                text = self._blocklist.sub("[removed]", text)
+
+        redact_secrets = redact and self.secret_action == "redact"
+        for name, hint, pattern in self._secrets:
+            if hint is not None and hint not in text:
+                continue
+            matches = [match.group(0) for match in pattern.finditer(text)]
+            if not matches:
+                continue
+            entries = [{"category": "secret", "rule": name, "match": _mask(value)} for value in matches]
+            if redact_secrets:
+                text = pattern.sub(lambda _, name=name: f"[{name} redacted]", text)
+                redactions.extend(entries)
+            else:
+                violations.extend(entries)
+
+        if self.allowed_domains or self.blocked_domains:
+            bad_links = [m for m in _URL_PATTERN.finditer(text) if self._bad_link(m)]
+            for match in bad_links:
+                entry = {"category": "link", "rule": "domain", "match": match.group("host").lower()}
+                (redactions if redact and self.url_action == "redact" else violations).append(entry)
+            if redact and self.url_action == "redact" and bad_links:
+                text = _URL_PATTERN.sub(lambda m: "[link removed]" if self._bad_link(m) else m.group(0), text)
+
+        return PolicyVerdict(not violations, text, violations, redactions)
+
+    def redact_secrets(self, text: str) -> str:
+        """Mask every secret the policy detects, whatever its secret_action (for logs)."""
+        for name, hint, pattern in self._secrets:
+            if hint is None or hint in text:
+                text = pattern.sub(lambda _, name=name: f"[{name} redacted]", text)
+        return text
+
+    def _bad_link(self, match: "re.Match[str]") -> bool:
+        return _is_link(match) and not self._domain_allowed(match.group("host"))
+
+    def _domain_allowed(self, host: str) -> bool:
+        host = host.lower().rstrip(".")
+        if host.startswith("www."):
+            host = host[4:]
+
+        def matches(domains):
+            return any(host == d or host.endswith("." + d) for d in domains)
+
+        if matches(self.blocked_domains):
+            return False
+        return not self.allowed_domains or matches(self.allowed_domains)
+
+
+def load_policy(path: Optional[str] = None) -> ContentPolicy:
+    """Compile the policy from a JSON file (default: POLICY_FILE; none means the defaults)."""
+    path = path or os.getenv("POLICY_FILE")
+    if not path:
+        return ContentPolicy()
+    try:
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+    except (OSError, ValueError) as e:
+        raise PolicyConfigError(f"Cannot load policy file {path}: {e}")
+    if not isinstance(config, dict):
+        raise PolicyConfigError(f"{path} must contain a JSON object")
+    return ContentPolicy(config)
+
+
+_policy: Optional[ContentPolicy] = None
+_policy_lock = threading.Lock()
+
+
+def get_policy() -> ContentPolicy:
+    """The process-wide policy, compiled from POLICY_FILE on first use."""
+    global _policy
+    with _policy_lock:
+        if _policy is None:
+            _policy = load_policy()
+        return _policy
+
+
+def set_policy(policy: ContentPolicy) -> None:
+    """Replace the process-wide policy (a config reload does this at the swap)."""
+    global _policy
+    with _policy_lock:
+        _policy = policy
@@ -0,0 +1,296 @@
+"""
+On-demand, low-overhead profiling of live tool calls.
+
+A configurable fraction of requests is profiled. Sampled requests record
+exact wall time per named phase (prompt building, provider calls,
+truncation, formatting, ...), and a background thread samples their Python
+stacks at a fixed interval. Both are aggregated into per-minute buckets over
+a rolling window and exported in the collapsed-stack ("folded") format read
+by flamegraph.pl, speedscope and similar tools.
+
+Requests that are not sampled pay for one context-variable lookup per phase.
+"""
+
+import contextvars
+import functools
+import inspect
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional, Tuple
+
+_current: contextvars.ContextVar[Optional["_RequestProfile"]] = contextvars.ContextVar("profile", default=None)
+
+
+class _RequestProfile:
+    __slots__ = ("tool", "stacks")
+
+    def __init__(self, tool: str):
+        self.tool = tool
+        # Phase stack per thread; a request may hop from the event loop to a worker thread
+        self.stacks: Dict[int, List[Tuple[str, float, float]]] = {}
+
+
+class Profiler:
+    """Samples requests and aggregates phase timings and stack samples over a rolling window."""
+
+    def __init__(
+        self,
+        sample_rate: Optional[float] = None,
+        window_minutes: Optional[int] = None,
+        interval_ms: Optional[float] = None
+    ):
+        """
+        Initialize the profiler.
+
+        Args:
+            sample_rate: Fraction of requests to profile, 0 disables (default: PROFILE_SAMPLE_RATE or 0)
+            window_minutes: Minutes of aggregated profiles to keep (default: PROFILE_WINDOW_MINUTES or 15)
+            interval_ms: Stack sampling interval (default: PROFILE_INTERVAL_MS or 5)
+        """
+        settings = self.settings_from_env()
+        self.sample_rate = sample_rate if sample_rate is not None else settings["sample_rate"]
+        self.window_minutes = window_minutes or settings["window_minutes"]
+        self.interval = (interval_ms or settings["interval_ms"]) / 1000.0
+        self._env_settings = settings
+
+        self._lock = threading.Lock()
+        # (minute, {"phases": Counter, "samples": Counter, "requests": Counter, "latency_us": Counter})
+        self._buckets: Deque[Tuple[int, Dict[str, Counter]]] = deque()
+        self._active: Dict[int, _RequestProfile] = {}
+        self._sampler: Optional[threading.Thread] = None
+        self._ensure_sampler()
+
+    @property
+    def enabled(self) -> bool:
+        return self.sample_rate > 0
+
+    @staticmethod
+    def settings_from_env() -> Dict[str, Any]:
+        """
+        Read PROFILE_SAMPLE_RATE, PROFILE_WINDOW_MINUTES and PROFILE_INTERVAL_MS.
+
+        Raises:
+            ValueError: If a value is not a number
+        """
+        return {
+            "sample_rate": float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+            "window_minutes": int(os.getenv("PROFILE_WINDOW_MINUTES", "15")),
+            "interval_ms": float(os.getenv("PROFILE_INTERVAL_MS", "5")),
+        }
+
+    def apply_settings(self, settings: Dict[str, Any]) -> None:
+        """
+        Apply settings from settings_from_env after a config reload.
+
+        Only values whose environment setting changed are applied, so a rate
+        set at runtime with configure() survives unrelated reloads.
+        """
+        previous, self._env_settings = self._env_settings, settings
+        if settings["window_minutes"] != previous["window_minutes"]:
+            self.window_minutes = settings["window_minutes"]
+        if settings["interval_ms"] != previous["interval_ms"]:
+            self.interval = settings["interval_ms"] / 1000.0
+        if settings["sample_rate"] != previous["sample_rate"]:
+            self.configure(settings["sample_rate"])
+
+    def configure(self, sample_rate: float) -> None:
+        """Change the sampling rate at runtime (0 disables profiling)."""
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self._ensure_sampler()
+
+    def reset(self) -> None:
+        """Drop all aggregated profiles."""
+        with self._lock:
+            self._buckets.clear()
+
+    @contextmanager
+    def request(self, tool: str) -> Iterator[None]:
+        """Scope a tool call; decides whether this call is profiled."""
+        if not self.enabled or random.random() >= self.sample_rate:
+            yield
+            return
+        profile = _RequestProfile(tool)
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            with self.phase(tool, _root=True):
+                yield
+        finally:
+            _current.reset(token)
+            self._add("requests", tool, 1)
+            self._add("latency_us", tool, int((time.perf_counter() - started) * 1e6))
+
+    @contextmanager
+    def phase(self, name: str, _root: bool = False) -> Iterator[None]:
+        """Attribute the enclosed wall time to a named phase of the current request."""
+        profile = _current.get()
+        if profile is None:
+            yield
+            return
+
+        thread_id = threading.get_ident()
+        stack = profile.stacks.setdefault(thread_id, [])
+        # The request hopped to a worker thread; root this thread's spans under the tool name
+        synthetic_root = not stack and not _root
+        if synthetic_root:
+            stack.append((profile.tool, time.perf_counter(), 0.0))
+        stack.append((name, time.perf_counter(), 0.0))
+        if not _root:
+            # Only explicit phases are stack-sampled: while a request awaits, the
+            # event loop thread is running other requests
+            with self._lock:
+                self._active[thread_id] = profile
+        try:
+            yield
+        finally:
+            phase_name, started, child_time = stack.pop()
+            elapsed = time.perf_counter() - started
+            path = ";".join([entry[0] for entry in stack] + [phase_name])
+            self._add("phases", path, int((elapsed - child_time) * 1e6))
+            if stack:
+                parent_name, parent_started, parent_child = stack[-1]
+                stack[-1] = (parent_name, parent_started, parent_child + elapsed)
+            if synthetic_root:
+                stack.pop()
+            if not _root and len(stack) <= 1:
+                with self._lock:
+                    if self._active.get(thread_id) is profile:
+                        del self._active[thread_id]
+            if not stack:
+                profile.stacks.pop(thread_id, None)
+
+    def folded(self, kind: str = "phases", minutes: Optional[int] = None) -> str:
+        """
+        Export aggregated profiles in collapsed-stack format ("frame;frame value" per line).
+
+        Args:
+            kind: "phases" (exact microseconds per phase) or "samples" (microseconds of sampled stacks)
+            minutes: Only include the most recent minutes (default: the whole window)
+        """
+        totals = self._aggregate(kind, minutes)
+        return "\n".join(f"{stack} {value}" for stack, value in sorted(totals.items()) if value > 0) + "\n"
+
+    def summary(self, minutes: Optional[int] = None) -> Dict[str, Any]:
+        """Per-tool request counts and mean latency, and total self-time per phase."""
+        phases = self._aggregate("phases", minutes)
+        requests = self._aggregate("requests", minutes)
+        latency = self._aggregate("latency_us", minutes)
+        per_phase: Counter = Counter()
+        for stack, value in phases.items():
+            per_phase[stack.rsplit(";", 1)[-1]] += value
+        return {
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "window_minutes": self.window_minutes,
+            "requests": {
+                tool: {"profiled": count, "mean_ms": round(latency[tool] / count / 1000, 3)}
+                for tool, count in requests.items() if count
+            },
+            "phase_self_ms": {name: round(value / 1000, 3) for name, value in per_phase.most_common()},
+        }
+
+    def _aggregate(self, kind: str, minutes: Optional[int]) -> Counter:
+        cutoff = int(time.time() // 60) - (minutes or self.window_minutes) + 1
+        totals: Counter = Counter()
+        with self._lock:
+            for minute, bucket in self._buckets:
+                if minute >= cutoff:
+                    totals.update(bucket[kind])
+        return totals
+
+    def _add(self, kind: str, key: str, value: int) -> None:
+        with self._lock:
+            self._bucket()[kind][key] += value
+
+    def _bucket(self) -> Dict[str, Counter]:
+        """The current minute's bucket; callers hold self._lock."""
+        minute = int(time.time() // 60)
+        if not self._buckets or self._buckets[-1][0] != minute:
+            self._buckets.append((minute, {
+                "phases": Counter(), "samples": Counter(), "requests": Counter(), "latency_us": Counter()
+            }))
+            while self._buckets and self._buckets[0][0] <= minute - self.window_minutes:
+                self._buckets.popleft()
+        return self._buckets[-1][1]
+
+    def _ensure_sampler(self) -> None:
+        if self.enabled and (self._sampler is None or not self._sampler.is_alive()):
+            self._sampler = threading.Thread(target=self._sample_loop, name="profiler-sampler", daemon=True)
+            self._sampler.start()
+
+    def _sample_loop(self) -> None:
+        own_file = __file__
+        while self.enabled:
+            time.sleep(self.interval)
+            with self._lock:
+                active = list(self._active.items())
+            if not active:
+                continue
+            frames = sys._current_frames()
+            weight = int(self.interval * 1e6)
+            for thread_id, profile in active:
+                frame = frames.get(thread_id)
+                stack = profile.stacks.get(thread_id)
+                if frame is None or not stack:
+                    continue
+                code_frames = []
+                while frame is not None:
+                    code = frame.f_code
+                    if code.co_filename != own_file and "contextlib" not in code.co_filename:
+                        code_frames.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                path = [entry[0] for entry in list(stack)] + code_frames[::-1]
+                self._add("samples", ";".join(path), weight)
+
+
+_profiler: Optional[Profiler] = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler() -> Profiler:
+    """The process-wide profiler."""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = Profiler()
+    return _profiler
+
+
+_NO_PHASE = nullcontext()
+
+
+def profile_phase(name: str):
+    """
+    Shorthand for get_profiler().phase(name).
+
+    Outside a sampled request this is one contextvar lookup, with no lock taken.
+    """
+    if _current.get() is None:
+        return _NO_PHASE
+    return get_profiler().phase(name)
+
+
+def profiled(tool: str) -> Callable[[Callable], Callable]:
+    """Decorator that scopes each call of a (sync or async) tool function as a profiled request."""
+
+    def decorator(fn: Callable) -> Callable:
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with get_profiler().request(tool):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with get_profiler().request(tool):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
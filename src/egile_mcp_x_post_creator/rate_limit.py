@@ -0,0 +1,354 @@
+"""
+Token-bucket rate governor shared by LLM and X API calls.
+
+Each provider endpoint (e.g. "anthropic:messages") gets a requests-per-minute
+bucket and, for LLMs, a tokens-per-minute bucket. Callers reserve capacity up
+front and sleep for the deficit, so bursts queue in arrival order with a
+bounded wait instead of hitting provider 429s. Limits adapt to the rate-limit
+headers returned by each provider.
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Mapping, Optional
+
+from . import cancellation
+
+DEFAULT_LIMITS = {
+    "anthropic": {"rpm": 50, "tpm": 40000},
+    "openai": {"rpm": 500, "tpm": 30000},
+    "x": {"rpm": 50, "tpm": 0},
+}
+
+# Limits for providers not in DEFAULT_LIMITS
+FALLBACK_LIMITS = {"rpm": 60, "tpm": 0}
+
+# X reports x-rate-limit-limit per 15-minute window
+X_RATE_LIMIT_WINDOW = 900.0
+
+_LIMIT_VARIABLE = re.compile(r"RATE_LIMIT_([A-Z0-9]+)_(RPM|TPM)")
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call would have to wait longer than the allowed queueing time."""
+
+
+class TokenBucket:
+    """A token bucket whose level may go negative to represent queued reservations."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.capacity / 60.0
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount: float, now: float) -> float:
+        """Seconds until `amount` could be taken (caller must refill first)."""
+        amount = min(amount, self.capacity)
+        deficit = amount - self.level
+        wait = deficit / self.rate if deficit > 0 else 0.0
+        return max(wait, self.blocked_until - now)
+
+    def set_limit(
+        self,
+        limit: float,
+        remaining: Optional[float],
+        reset_in: Optional[float],
+        now: float,
+        window: float = 60.0
+    ) -> None:
+        """Adapt to provider-reported limits; `limit` counts calls per `window` seconds."""
+        if limit > 0:
+            self.capacity = float(limit) * 60.0 / window
+        if remaining is not None:
+            self.level = min(self.level, float(remaining))
+            if remaining <= 0 and reset_in:
+                self.blocked_until = max(self.blocked_until, now + reset_in)
+
+    def resize(self, per_minute: float) -> None:
+        """Change the configured capacity, keeping queued reservations."""
+        self.capacity = float(per_minute)
+        self.level = min(self.level, self.capacity)
+
+
+class RateGovernor:
+    """Per-endpoint request and token buckets with bounded queueing."""
+
+    def __init__(self, max_wait: Optional[float] = None):
+        """
+        Initialize the governor.
+
+        Args:
+            max_wait: Longest a caller may queue before RateLimitExceeded
+                      (default: RATE_LIMIT_MAX_WAIT or 30 seconds)
+        """
+        settings = self.settings_from_env()
+        self.max_wait = max_wait if max_wait is not None else settings["max_wait"]
+        self.limits: Dict[str, Dict[str, float]] = settings["limits"]
+        self._lock = threading.Lock()
+        self._requests: Dict[str, TokenBucket] = {}
+        self._tokens: Dict[str, TokenBucket] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    @staticmethod
+    def settings_from_env() -> Dict[str, Any]:
+        """
+        Read RATE_LIMIT_MAX_WAIT and the RATE_LIMIT_<PROVIDER>_RPM/_TPM limits.
+
+        Raises:
+            ValueError: If a value is not a number
+        """
+        limits = {provider: dict(values) for provider, values in DEFAULT_LIMITS.items()}
+        for name, value in os.environ.items():
+            match = _LIMIT_VARIABLE.fullmatch(name)
+            if match:
+                provider_limits = limits.setdefault(match.group(1).lower(), dict(FALLBACK_LIMITS))
+                provider_limits[match.group(2).lower()] = float(value)
+        return {"max_wait": float(os.getenv("RATE_LIMIT_MAX_WAIT", "30")), "limits": limits}
+
+    def apply_settings(self, settings: Dict[str, Any]) -> None:
+        """
+        Apply settings from settings_from_env after a config reload.
+
+        Buckets whose configured limit changed are resized; the others keep the
+        limits learned from provider headers and their queued reservations.
+        """
+        with self._lock:
+            old_limits, self.limits = self.limits, settings["limits"]
+            self.max_wait = settings["max_wait"]
+            for key, request_bucket in self._requests.items():
+                provider = key.split(":", 1)[0]
+                old = old_limits.get(provider, FALLBACK_LIMITS)
+                new = self.limits.get(provider, FALLBACK_LIMITS)
+                if new["rpm"] != old["rpm"]:
+                    request_bucket.resize(new["rpm"])
+                if new["tpm"] == old["tpm"]:
+                    continue
+                if new["tpm"] <= 0:
+                    self._tokens.pop(key, None)
+                elif key in self._tokens:
+                    self._tokens[key].resize(new["tpm"])
+                else:
+                    self._tokens[key] = TokenBucket(new["tpm"])
+
+    def _buckets(self, key: str):
+        """Get (or create) the buckets for an endpoint key (caller holds the lock)."""
+        if key not in self._requests:
+            limits = self.limits.get(key.split(":", 1)[0], FALLBACK_LIMITS)
+            self._requests[key] = TokenBucket(limits["rpm"])
+            if limits["tpm"] > 0:
+                self._tokens[key] = TokenBucket(limits["tpm"])
+            self._stats[key] = {"calls": 0, "throttled": 0, "rejected": 0, "queued": 0, "wait_seconds": 0.0}
+        return self._requests[key], self._tokens.get(key)
+
+    def acquire(self, key: str, tokens: int = 0, max_wait: Optional[float] = None) -> float:
+        """
+        Reserve one request (and `tokens` tokens) for an endpoint, sleeping if needed.
+
+        Args:
+            key: Endpoint key, "<provider>:<endpoint>"
+            tokens: Estimated tokens the call will consume
+            max_wait: Override for the maximum queueing time
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            RateLimitExceeded: If the call would wait longer than max_wait
+            RequestCancelled: If the MCP request is cancelled while queued
+        """
+        limit = self.max_wait if max_wait is None else max_wait
+        with self._lock:
+            request_bucket, token_bucket = self._buckets(key)
+            stats = self._stats[key]
+            now = time.monotonic()
+            request_bucket.refill(now)
+            wait = request_bucket.wait_for(1, now)
+            if token_bucket is not None and tokens:
+                token_bucket.refill(now)
+                wait = max(wait, token_bucket.wait_for(tokens, now))
+
+            if wait > limit:
+                stats["rejected"] += 1
+                raise RateLimitExceeded(
+                    f"Rate limit for {key} would require waiting {wait:.1f}s (max {limit:.1f}s)"
+                )
+
+            request_bucket.level -= 1
+            reserved_tokens = 0.0
+            if token_bucket is not None and tokens:
+                reserved_tokens = min(tokens, token_bucket.capacity)
+                token_bucket.level -= reserved_tokens
+            stats["calls"] += 1
+            if wait > 0:
+                stats["throttled"] += 1
+                stats["queued"] += 1
+                stats["wait_seconds"] += wait
+
+        if wait > 0:
+            try:
+                cancellation.sleep(wait)
+            except cancellation.RequestCancelled:
+                # The request was cancelled while queued: hand its reservation back
+                with self._lock:
+                    request_bucket.level += 1
+                    if reserved_tokens:
+                        token_bucket.level += reserved_tokens
+                raise
+            finally:
+                with self._lock:
+                    self._stats[key]["queued"] -= 1
+        return wait
+
+    def update_from_headers(self, key: str, headers: Mapping[str, str]) -> None:
+        """Adapt bucket sizes from Anthropic, OpenAI or X rate-limit response headers."""
+        headers = {k.lower(): v for k, v in headers.items()}
+        now = time.monotonic()
+
+        request_info = _parse_limit_headers(headers, "requests")
+        token_info = _parse_limit_headers(headers, "tokens")
+        retry_after = _parse_seconds(headers.get("retry-after"))
+
+        with self._lock:
+            request_bucket, token_bucket = self._buckets(key)
+            request_bucket.refill(now)
+            if request_info:
+                limit, remaining, reset_in, window = request_info
+                request_bucket.set_limit(limit, remaining, reset_in, now, window)
+            if token_info and token_bucket is not None:
+                token_bucket.refill(now)
+                limit, remaining, reset_in, window = token_info
+                token_bucket.set_limit(limit, remaining, reset_in, now, window)
+            if retry_after:
+                request_bucket.blocked_until = max(request_bucket.blocked_until, now + retry_after)
+
+    def record_error(self, key: str, error: Exception) -> None:
+        """Learn from a failed call; 429 responses carry the headers needed to back off."""
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None)
+        if headers is None:
+            return
+        self.update_from_headers(key, headers)
+        status = getattr(response, "status_code", None)
+        if status == 429 and "retry-after" not in {k.lower() for k in headers.keys()}:
+            # No explicit hint: hold the endpoint for one refill interval
+            with self._lock:
+                request_bucket, _ = self._buckets(key)
+                now = time.monotonic()
+                request_bucket.blocked_until = max(request_bucket.blocked_until, now + 60.0 / max(request_bucket.capacity, 1))
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Current bucket levels, queue depth and throttling counters per endpoint."""
+        now = time.monotonic()
+        result = {}
+        with self._lock:
+            for key, request_bucket in self._requests.items():
+                request_bucket.refill(now)
+                entry: Dict[str, Any] = dict(self._stats[key])
+                entry["requests_per_minute"] = request_bucket.capacity
+                entry["requests_available"] = round(request_bucket.level, 2)
+                entry["blocked_for_seconds"] = round(max(0.0, request_bucket.blocked_until - now), 2)
+                token_bucket = self._tokens.get(key)
+                if token_bucket is not None:
+                    token_bucket.refill(now)
+                    entry["tokens_per_minute"] = token_bucket.capacity
+                    entry["tokens_available"] = round(token_bucket.level, 2)
+                entry["wait_seconds"] = round(entry["wait_seconds"], 3)
+                result[key] = entry
+        return result
+
+
+def _parse_limit_headers(headers: Dict[str, str], kind: str):
+    """
+    Return (limit, remaining, reset_in_seconds, window_seconds) for "requests"
+    or "tokens", or None. The limit counts calls per window.
+    """
+    candidates = [
+        # Anthropic
+        (f"anthropic-ratelimit-{kind}-limit", f"anthropic-ratelimit-{kind}-remaining", f"anthropic-ratelimit-{kind}-reset", 60.0),
+        # OpenAI
+        (f"x-ratelimit-limit-{kind}", f"x-ratelimit-remaining-{kind}", f"x-ratelimit-reset-{kind}", 60.0),
+    ]
+    if kind == "requests":
+        # X API v2 limits are per 15-minute window
+        candidates.append(("x-rate-limit-limit", "x-rate-limit-remaining", "x-rate-limit-reset", X_RATE_LIMIT_WINDOW))
+
+    for limit_header, remaining_header, reset_header, window in candidates:
+        if limit_header in headers or remaining_header in headers:
+            try:
+                limit = float(headers.get(limit_header, 0))
+                remaining = float(headers[remaining_header]) if remaining_header in headers else None
+            except ValueError:
+                return None
+            return limit, remaining, _parse_seconds(headers.get(reset_header)), window
+    return None
+
+
+def _parse_seconds(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a reset/retry hint into seconds from now.
+
+    Accepts plain seconds ("30"), UNIX timestamps (X), durations like "6m0s"
+    or "20ms" (OpenAI), RFC 3339 timestamps (Anthropic) and HTTP dates.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        number = float(value)
+        # X sends an absolute epoch timestamp
+        return max(0.0, number - time.time()) if number > 1e9 else number
+    except ValueError:
+        pass
+
+    total, number, i = 0.0, "", 0
+    units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+    while i < len(value):
+        char = value[i]
+        if char.isdigit() or char == ".":
+            number += char
+            i += 1
+            continue
+        unit = "ms" if value[i:i + 2] == "ms" else char
+        if unit not in units or not number:
+            break
+        total += float(number) * units[unit]
+        number = ""
+        i += len(unit)
+    else:
+        if not number:
+            return total
+
+    try:
+        moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            moment = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    return max(0.0, moment.timestamp() - time.time())
+
+
+_default_governor: Optional[RateGovernor] = None
+_default_lock = threading.Lock()
+
+
+def default_governor() -> RateGovernor:
+    """The process-wide governor shared by every XPostService instance."""
+    global _default_governor
+    with _default_lock:
+        if _default_governor is None:
+            _default_governor = RateGovernor()
+        return _default_governor
@@ -0,0 +1,334 @@
+"""
+Persistent scheduler for publishing X/Twitter posts at a future time.
+
+Pending posts live in a SQLite table indexed by due time. Only a window of the
+earliest entries is kept in an in-memory min-heap, so the scheduler thread can
+sleep until the next due item no matter how many entries are pending, and a
+restarted process catches up on missed items with an indexed range query
+instead of a full table scan.
+
+A publish that fails before the post reaches X (rate limited, media upload
+error, ...) is retried with exponential backoff; one whose outcome is unknown
+or that X rejected is marked failed.
+"""
+
+import heapq
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(os.path.expanduser("~"), ".egile_mcp_x_post_creator", "scheduler.db")
+
+STATUSES = ("pending", "publishing", "published", "failed", "cancelled")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scheduled_posts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    post_text TEXT NOT NULL,
+    publish_at REAL NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    created_at REAL NOT NULL,
+    attempted_at REAL,
+    tweet_id TEXT,
+    tweet_url TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_scheduled_posts_due ON scheduled_posts (status, publish_at, id);
+"""
+
+
+def parse_publish_at(value: str) -> float:
+    """
+    Parse an ISO 8601 timestamp into a UNIX timestamp.
+
+    Naive timestamps (no offset) are interpreted as UTC.
+    """
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _isoformat(timestamp: Optional[float]) -> Optional[str]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat()
+
+
+class PostScheduler:
+    """Durable timer-heap scheduler that publishes posts when they fall due."""
+
+    def __init__(
+        self,
+        publish_fn: Callable[[str], Dict[str, Any]],
+        db_path: Optional[str] = None,
+        heap_window: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        retry_delay: Optional[float] = None
+    ):
+        """
+        Initialize the scheduler.
+
+        Args:
+            publish_fn: Called with the post text when an entry is due; must return
+                        a publish result dictionary (see XPostService.publish_post)
+            db_path: SQLite database file (default: SCHEDULER_DB_PATH or ~/.egile_mcp_x_post_creator/scheduler.db)
+            heap_window: Maximum number of due entries held in memory at once
+            max_attempts: Publish attempts before a retryable failure is marked failed
+                          (default: SCHEDULER_MAX_ATTEMPTS or 5)
+            retry_delay: Seconds before the first retry, doubling on each further attempt
+                         (default: SCHEDULER_RETRY_DELAY or 60)
+        """
+        self.publish_fn = publish_fn
+        self.db_path = db_path or os.getenv("SCHEDULER_DB_PATH", DEFAULT_DB_PATH)
+        self.heap_window = heap_window or int(os.getenv("SCHEDULER_HEAP_WINDOW", "1024"))
+        self.max_attempts = max_attempts or int(os.getenv("SCHEDULER_MAX_ATTEMPTS", "5"))
+        self.retry_delay = retry_delay if retry_delay is not None else float(os.getenv("SCHEDULER_RETRY_DELAY", "60"))
+
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._migrate()
+        self._conn.executescript(_SCHEMA)
+        self._db_lock = threading.Lock()
+
+        # Heap of (publish_at, id). It always holds every pending entry whose
+        # key is <= self._horizon; entries beyond the horizon stay on disk.
+        self._heap: List[Tuple[float, int]] = []
+        self._horizon: Tuple[float, int] = (float("-inf"), 0)
+        self._exhausted = False
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def _migrate(self) -> None:
+        """Add columns introduced after a database was created."""
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(scheduled_posts)")}
+        if columns and "attempts" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE scheduled_posts ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def start(self) -> None:
+        """Recover from any interrupted run and start the background thread."""
+        if self._thread is not None:
+            return
+        with self._db_lock, self._conn:
+            # A row still marked "publishing" means the process died mid-publish.
+            # The tweet may or may not have gone out, so never retry it blindly.
+            self._conn.execute(
+                "UPDATE scheduled_posts SET status = 'failed', "
+                "error = 'Interrupted by restart; publish outcome unknown' "
+                "WHERE status = 'publishing'"
+            )
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="x-post-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """Stop the background thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def schedule(self, post_text: str, publish_at: float) -> Dict[str, Any]:
+        """
+        Schedule a post for publishing.
+
+        Args:
+            post_text: The text to publish
+            publish_at: UNIX timestamp; times in the past are published right away
+
+        Returns:
+            Dictionary with the schedule id and normalized publish time
+        """
+        if not post_text or not post_text.strip():
+            return {"success": False, "error": "Cannot schedule an empty post."}
+
+        with self._db_lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO scheduled_posts (post_text, publish_at, created_at) VALUES (?, ?, ?)",
+                (post_text, publish_at, time.time())
+            )
+            schedule_id = cursor.lastrowid
+
+        self._enqueue(publish_at, schedule_id)
+        return {
+            "success": True,
+            "schedule_id": schedule_id,
+            "publish_at": _isoformat(publish_at),
+            "status": "pending"
+        }
+
+    def cancel(self, schedule_id: int) -> Dict[str, Any]:
+        """Cancel a pending post. Entries already published or failed are left untouched."""
+        with self._db_lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE scheduled_posts SET status = 'cancelled' WHERE id = ? AND status = 'pending'",
+                (schedule_id,)
+            )
+        if cursor.rowcount == 0:
+            entry = self.get(schedule_id)
+            if entry is None:
+                return {"success": False, "error": f"No scheduled post with id {schedule_id}."}
+            return {
+                "success": False,
+                "error": f"Scheduled post {schedule_id} is already {entry['status']} and cannot be cancelled."
+            }
+        # The heap entry is dropped lazily when it comes due.
+        return {"success": True, "schedule_id": schedule_id, "status": "cancelled"}
+
+    def get(self, schedule_id: int) -> Optional[Dict[str, Any]]:
+        """Return a single scheduled entry, or None if it does not exist."""
+        with self._db_lock:
+            row = self._conn.execute("SELECT * FROM scheduled_posts WHERE id = ?", (schedule_id,)).fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list(self, status: str = "pending", limit: int = 20, offset: int = 0) -> List[Dict[str, Any]]:
+        """
+        List scheduled entries ordered by publish time.
+
+        Args:
+            status: One of STATUSES, or "all"
+            limit: Maximum number of entries to return
+            offset: Number of entries to skip (for pagination)
+        """
+        if status != "all" and status not in STATUSES:
+            raise ValueError(f"Unknown status '{status}'. Use one of: all, {', '.join(STATUSES)}")
+
+        query = "SELECT * FROM scheduled_posts"
+        params: List[Any] = []
+        if status != "all":
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY publish_at, id LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+
+        with self._db_lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._row_to_dict(row) for row in rows]
+
+    def _row_to_dict(self, row: sqlite3.Row) -> Dict[str, Any]:
+        entry = dict(row)
+        entry["schedule_id"] = entry.pop("id")
+        for key in ("publish_at", "created_at", "attempted_at"):
+            entry[key] = _isoformat(entry[key])
+        return entry
+
+    def _enqueue(self, publish_at: float, schedule_id: int) -> None:
+        """Add a pending entry to the heap if it falls inside the loaded window."""
+        with self._cond:
+            if self._exhausted or (publish_at, schedule_id) <= self._horizon:
+                heapq.heappush(self._heap, (publish_at, schedule_id))
+                if len(self._heap) > self.heap_window:
+                    self._trim()
+                self._cond.notify_all()
+
+    def _trim(self) -> None:
+        """
+        Shrink the heap back to heap_window entries (caller holds self._cond).
+
+        The latest entries are dropped from memory only; they stay pending on
+        disk, past the new horizon, and _refill loads them again in turn.
+        """
+        self._heap = heapq.nsmallest(self.heap_window, self._heap)  # sorted, so still a heap
+        self._horizon = self._heap[-1]
+        self._exhausted = False
+
+    def _refill(self) -> None:
+        """Load the next window of pending entries past the horizon (caller holds self._cond)."""
+        last_at, last_id = self._horizon
+        with self._db_lock:
+            rows = self._conn.execute(
+                "SELECT publish_at, id FROM scheduled_posts "
+                "WHERE status = 'pending' AND (publish_at > ? OR (publish_at = ? AND id > ?)) "
+                "ORDER BY publish_at, id LIMIT ?",
+                (last_at, last_at, last_id, self.heap_window)
+            ).fetchall()
+        for publish_at, schedule_id in rows:
+            heapq.heappush(self._heap, (publish_at, schedule_id))
+        if rows:
+            self._horizon = (rows[-1][0], rows[-1][1])
+        self._exhausted = len(rows) < self.heap_window
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopping:
+                    return
+                if not self._heap and not self._exhausted:
+                    self._refill()
+                if not self._heap:
+                    # Nothing pending; schedule() wakes us when new work arrives
+                    self._cond.wait()
+                    continue
+                publish_at, schedule_id = self._heap[0]
+                delay = publish_at - time.time()
+                if delay > 0:
+                    # Cap the sleep so wall-clock adjustments are picked up
+                    self._cond.wait(timeout=min(delay, 60.0))
+                    continue
+                heapq.heappop(self._heap)
+            self._fire(schedule_id)
+
+    def _fire(self, schedule_id: int) -> None:
+        """Claim a due entry and publish it."""
+        with self._db_lock, self._conn:
+            claimed = self._conn.execute(
+                "UPDATE scheduled_posts SET status = 'publishing', attempted_at = ?, attempts = attempts + 1 "
+                "WHERE id = ? AND status = 'pending'",
+                (time.time(), schedule_id)
+            ).rowcount
+            row = self._conn.execute(
+                "SELECT post_text, attempts FROM scheduled_posts WHERE id = ?", (schedule_id,)
+            ).fetchone() if claimed else None
+        if row is None:
+            return  # cancelled since it was loaded
+
+        try:
+            result = self.publish_fn(row["post_text"])
+        except Exception as e:
+            # publish_post reports failures from the X call itself in its result,
+            # so anything raised here happened before the post was sent
+            result = {"success": False, "error": f"Failed to publish post: {str(e)}", "retryable": True}
+
+        retry_at = None
+        with self._db_lock, self._conn:
+            if result.get("success"):
+                self._conn.execute(
+                    "UPDATE scheduled_posts SET status = 'published', tweet_id = ?, tweet_url = ?, error = NULL "
+                    "WHERE id = ?",
+                    (str(result.get("tweet_id", "")), result.get("tweet_url", ""), schedule_id)
+                )
+            elif result.get("retryable") and row["attempts"] < self.max_attempts:
+                retry_at = time.time() + self.retry_delay * 2 ** (row["attempts"] - 1)
+                self._conn.execute(
+                    "UPDATE scheduled_posts SET status = 'pending', publish_at = ?, error = ? WHERE id = ?",
+                    (retry_at, result.get("error", "Unknown error"), schedule_id)
+                )
+            else:
+                self._conn.execute(
+                    "UPDATE scheduled_posts SET status = 'failed', error = ? WHERE id = ?",
+                    (result.get("error", "Unknown error"), schedule_id)
+                )
+        if retry_at is not None:
+            self._enqueue(retry_at, schedule_id)
+            logger.warning(
+                "Scheduled post %s failed before reaching X (attempt %s), retrying at %s",
+                schedule_id, row["attempts"], _isoformat(retry_at)
+            )
+            return
+        logger.info("Scheduled post %s fired success=%s", schedule_id, bool(result.get("success")))
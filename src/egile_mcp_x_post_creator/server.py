@@ -2,36 +2,107 @@
 MCP Server for creating and publishing X/Twitter posts.
 """
 
+import hmac
+import json
 import logging
 import os
+import time
+from typing import Any, Callable, Dict, Optional
 
+import anyio
 from mcp.server.fastmcp import FastMCP
-from .x_service import XPostService
+from mcp.types import CallToolResult, TextContent
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from .cancellation import run_cancellable
+from .config_reload import ServiceReloader
+from .log_config import configure_logging, redact_text, start_request
+from .profiling import get_profiler, profile_phase, profiled
+from .scheduler import PostScheduler, parse_publish_at
+from .usage import get_usage_meter, set_caller
 
 log_level = os.getenv("FASTMCP_LOG_LEVEL", os.getenv("LOG_LEVEL", "INFO")).upper()
 log_file = os.getenv("MCP_LOG_FILE")
 
-logging.basicConfig(
-    level=getattr(logging, log_level, logging.INFO),
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    filename=log_file if log_file else None,
-)
+# Logs go through a queue to a background writer; see log_config
+configure_logging(log_level, log_file)
 logger = logging.getLogger(__name__)
 
 # Initialize FastMCP server
 mcp = FastMCP("X Post Creator")
-x_service = XPostService()
+
+# The service is rebuilt and swapped in when its config files change (see config_reload).
+# Each tool call takes services.current() once, so in-flight calls finish on their config.
+services = ServiceReloader()
+services.start()
+services.install_signal_handler()
+
+# Durable scheduler for schedule_post; it publishes through the current service
+scheduler = None
+if os.getenv("SCHEDULER_ENABLED", "true").lower() == "true":
+    scheduler = PostScheduler(lambda text: services.current().publish_post(text, confirm=True))
+    scheduler.start()
+
+# Default response format for create_post/publish_post: "text", "json" or "terse"
+OUTPUT_FORMATS = ("text", "json", "terse")
+default_output_format = os.getenv("MCP_OUTPUT_FORMAT", "text").lower()
+
 logger.info("MCP server module loaded (log_level=%s, log_file=%s)", log_level, log_file)
 
 
+def _tool_result(
+    output_format: str | None,
+    payload: Dict[str, Any],
+    render_text: Callable[[], str],
+    render_terse: Callable[[], str]
+) -> CallToolResult:
+    """
+    Build a tool response in the requested format.
+
+    "text" returns the decorated human-readable output only. "json" and "terse"
+    return the payload as structuredContent, alongside compact JSON or a
+    one-line summary for clients that only read text content.
+    """
+    fmt = (output_format or default_output_format).lower()
+    if fmt not in OUTPUT_FORMATS:
+        fmt = "text"
+
+    with profile_phase("format"):
+        if fmt == "text":
+            return CallToolResult(content=[TextContent(type="text", text=render_text())])
+
+        if fmt == "json":
+            text = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        else:
+            text = render_terse()
+        return CallToolResult(content=[TextContent(type="text", text=text)], structuredContent=payload)
+
+
+def _caller_name() -> str:
+    """Identify the MCP client making the current request, for usage accounting."""
+    try:
+        ctx = mcp.get_context()
+        if ctx.client_id:
+            return ctx.client_id
+        client_params = ctx.session.client_params
+    except (LookupError, ValueError, AttributeError):
+        return "local"
+    if client_params is not None and client_params.clientInfo is not None:
+        return client_params.clientInfo.name
+    return "local"
+
+
 @mcp.tool()
-def create_post(
+@profiled("create_post")
+async def create_post(
     text: str | None = None,
     post_text: str | None = None,
     style: str = "professional",
-    include_hashtags: bool = True,
-    max_length: int = 280
-) -> str:
+    include_hashtags: bool | None = None,
+    max_length: int | None = None,
+    languages: list[str] | None = None,
+    output_format: str | None = None
+) -> CallToolResult:
     """
     Create an attractive X/Twitter post from input text.
     
@@ -48,12 +119,22 @@ def create_post(
                - "inspirational": Motivational, uplifting tone
                Default: "professional"
         include_hashtags: Whether to include relevant hashtags (optional).
-                         Default: True
+                         Default: INCLUDE_HASHTAGS env var, or True
         max_length: Maximum character length for the post (optional).
-                   Default: 280 (X's character limit)
+                   Default: DEFAULT_MAX_LENGTH env var, or 280 (X's character limit)
+        languages: Language codes to write the post in, e.g. ["en", "de", "ja"]
+                  (optional). All languages are generated in a single LLM request;
+                  max_length applies to each post's length as X counts it (CJK
+                  characters and emojis count 2). Requires an LLM API key.
+                  Default: None (one post in the input's language)
+        output_format: Response format (optional). Options:
+               - "text": Human-readable output with statistics and tips
+               - "json": Structured post_text/stats payload, compact JSON text
+               - "terse": Structured payload, text is the post plus one stats line
+               Default: MCP_OUTPUT_FORMAT env var, or "text"
     
     Returns:
-        A formatted string containing the created post and its statistics.
+        The created post and its statistics, in the requested format.
         The post is ready to be published or further edited.
     
     Example:
@@ -68,47 +149,108 @@ def create_post(
         
         #AI #Innovation"
     """
-    logger.info("🎬 create_post CALLED! text=%s, style=%s", text or post_text, style)
-    
+    start_request("create_post")
+    set_caller(_caller_name())
     effective_text = text or post_text
     if not effective_text:
-        logger.info("❌ No text provided")
-        return "❌ Error: No text provided. Pass either 'text' or 'post_text' with the content to draft."
+        logger.info("create_post rejected: no text provided")
+        error = "No text provided. Pass either 'text' or 'post_text' with the content to draft."
+        return _tool_result(
+            output_format,
+            {"success": False, "error": error},
+            lambda: f"❌ Error: {error}",
+            lambda: f"error: {error}"
+        )
 
+    service = services.current()
+    if include_hashtags is None:
+        include_hashtags = service.include_hashtags_default
+    max_length = max_length or service.max_length
+
+    started = time.perf_counter()
+    # Run in a worker thread so concurrent requests (and coalescing) don't block the event loop.
+    # If the client cancels or disconnects, the provider call is aborted and the worker freed.
+    result = await run_cancellable(
+        service.create_post, effective_text, style, include_hashtags, max_length, languages
+    )
     logger.info(
-        "create_post called len=%s style=%s include_hashtags=%s max_length=%s",
-        len(effective_text),
-        style,
-        include_hashtags,
-        max_length,
+        "create_post done",
+        extra={
+            "input": redact_text(effective_text),
+            "input_len": len(effective_text),
+            "style": style,
+            "include_hashtags": include_hashtags,
+            "max_length": max_length,
+            "languages": languages,
+            "success": result["success"],
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        },
     )
     
-    logger.info("🔄 Calling x_service.create_post...")
-    result = x_service.create_post(effective_text, style, include_hashtags, max_length)
-    logger.info("✅ x_service.create_post returned!")
-    
     if not result["success"]:
-        return f"❌ Error: {result['error']}"
+        return _tool_result(
+            output_format,
+            {key: result[key] for key in ("success", "error", "policy_violations") if key in result},
+            lambda: f"❌ Error: {result['error']}",
+            lambda: f"error: {result['error']}"
+        )
+    
+    if "posts" in result:
+        return _multilingual_create_result(output_format, result, max_length)
     
     stats = result["stats"]
-    output = f"✅ Post Created Successfully!\n\n"
-    output += f"📝 POST TEXT:\n{'-' * 60}\n"
-    output += f"{result['post_text']}\n"
-    output += f"{'-' * 60}\n\n"
-    output += f"📊 STATISTICS:\n"
-    output += f"  • Characters: {stats['character_count']}/{max_length}\n"
-    output += f"  • Hashtags: {stats['hashtag_count']}\n"
-    output += f"  • Emojis: {stats['emoji_count']}\n"
-    output += f"  • URLs: {stats['url_count']}\n"
-    output += f"  • Style: {result['style']}\n\n"
-    output += f"💡 TIP: To publish this post, use the publish_post tool with confirm=True\n"
-    
-    logger.info("📤 Returning output to client")
-    return output
+    
+    def render_text() -> str:
+        output = f"✅ Post Created Successfully!\n\n"
+        output += f"📝 POST TEXT:\n{'-' * 60}\n"
+        output += f"{result['post_text']}\n"
+        output += f"{'-' * 60}\n\n"
+        output += f"📊 STATISTICS:\n"
+        output += f"  • Characters: {stats['character_count']}/{max_length}\n"
+        output += f"  • Hashtags: {stats['hashtag_count']}\n"
+        output += f"  • Emojis: {stats['emoji_count']}\n"
+        output += f"  • URLs: {stats['url_count']}\n"
+        output += f"  • Style: {result['style']}\n\n"
+        for match in result.get("near_duplicates", []):
+            output += f"⚠️  NEAR-DUPLICATE: {match['similarity']:.0%} similar to a {match['kind']} post:\n"
+            output += f"  {match['text']}\n\n"
+        for redaction in result.get("policy_redactions", []):
+            output += f"🔒 REDACTED from input: {redaction['rule']} ({redaction['match']})\n"
+        for violation in result.get("policy_violations", []):
+            output += f"🚫 POLICY: {violation['category']} {violation['rule']}: {violation['match']}\n"
+        if not result["ready_to_publish"]:
+            output += f"\n⚠️  This draft violates the content policy and would be rejected by publish_post.\n"
+        else:
+            output += f"💡 TIP: To publish this post, use the publish_post tool with confirm=True\n"
+        return output
+    
+    return _tool_result(
+        output_format,
+        {
+            "success": True,
+            "post_text": result["post_text"],
+            "stats": stats,
+            "style": result["style"],
+            "max_length": max_length,
+            "near_duplicates": result.get("near_duplicates", []),
+            "ready_to_publish": result["ready_to_publish"],
+            "policy_redactions": result.get("policy_redactions", []),
+            "policy_violations": result.get("policy_violations", [])
+        },
+        render_text,
+        lambda: f"{result['post_text']}\n[{stats['character_count']}/{max_length} chars, style={result['style']}]"
+    )
 
 
 @mcp.tool()
-def publish_post(post_text: str, confirm: bool = False) -> str:
+@profiled("publish_post")
+async def publish_post(
+    post_text: str,
+    confirm: bool = False,
+    media_paths: list[str] | None = None,
+    account: str | list[str] | None = None,
+    output_format: str | None = None
+) -> CallToolResult:
     """
     Publish a post to X/Twitter.
     
@@ -125,9 +267,18 @@ def publish_post(post_text: str, confirm: bool = False) -> str:
                 Must be set to True to actually post. If False or omitted,
                 the tool will return an error.
                 Default: False
+        media_paths: Local image or video files to attach (optional).
+                    Up to 4 images, or a single video/GIF. Files are
+                    uploaded in chunks, so large videos are supported.
+                    Default: None
+        account: Account to publish as, or a list of accounts to publish
+                to concurrently (optional). See list_accounts.
+                Default: X_DEFAULT_ACCOUNT, or the account from .env
+        output_format: Response format (optional): "text", "json" or "terse"
+                      (see create_post). Default: MCP_OUTPUT_FORMAT env var, or "text"
     
     Returns:
-        A formatted string with the publish status, including:
+        The publish status in the requested format, including:
         - Success/failure status
         - Link to the published post (if successful)
         - Error messages (if failed)
@@ -154,47 +305,740 @@ def publish_post(post_text: str, confirm: bool = False) -> str:
         - Ensure your API credentials are kept secure in the .env file
         - Never share your .env file or commit it to version control
     """
-    logger.info("publish_post called confirm=%s len_post=%s", confirm, len(post_text))
-
-    result = x_service.publish_post(post_text, confirm)
+    start_request("publish_post")
+    started = time.perf_counter()
+    # Not cancellable: once confirmed, a publish runs to completion so the outcome is recorded
+    result = await anyio.to_thread.run_sync(
+        services.current().publish_post, post_text, confirm, media_paths, account
+    )
+    logger.info(
+        "publish_post done",
+        extra={
+            "post": redact_text(post_text),
+            "post_len": len(post_text),
+            "confirm": confirm,
+            "media": len(media_paths or []),
+            "account": account,
+            "success": result["success"],
+            "tweet_id": result.get("tweet_id"),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        },
+    )
     
-    if not result["success"]:
-        output = f"❌ Publish Failed\n\n"
+    if "results" in result:
+        return _fan_out_publish_result(output_format, result)
+    
+    def render_text() -> str:
+        if not result["success"]:
+            output = f"❌ Publish Failed\n\n"
         
-        if result.get("requires_confirmation"):
-            output += f"⚠️  CONFIRMATION REQUIRED\n"
-            output += f"Error: {result['error']}\n\n"
-            output += f"To publish this post, you must explicitly set confirm=True:\n"
-            output += f"  publish_post(post_text=\"{post_text[:50]}...\", confirm=True)\n\n"
-            output += f"⚠️  This is a safety feature to prevent accidental publishing!\n"
+            if result.get("requires_confirmation"):
+                output += f"⚠️  CONFIRMATION REQUIRED\n"
+                output += f"Error: {result['error']}\n\n"
+                output += f"To publish this post, you must explicitly set confirm=True:\n"
+                output += f"  publish_post(post_text=\"{post_text[:50]}...\", confirm=True)\n\n"
+                output += f"⚠️  This is a safety feature to prevent accidental publishing!\n"
             
-        elif result.get("requires_setup"):
-            output += f"🔧 SETUP REQUIRED\n"
-            output += f"Error: {result['error']}\n\n"
-            output += f"To publish posts, you need to:\n"
-            output += f"1. Get X/Twitter API credentials from: https://developer.twitter.com/\n"
-            output += f"2. Add them to your .env file:\n"
-            output += f"   X_API_KEY=your_api_key\n"
-            output += f"   X_API_SECRET=your_api_secret\n"
-            output += f"   X_ACCESS_TOKEN=your_access_token\n"
-            output += f"   X_ACCESS_TOKEN_SECRET=your_access_token_secret\n"
+            elif result.get("requires_setup"):
+                output += f"🔧 SETUP REQUIRED\n"
+                output += f"Error: {result['error']}\n\n"
+                output += f"To publish posts, you need to:\n"
+                output += f"1. Get X/Twitter API credentials from: https://developer.twitter.com/\n"
+                output += f"2. Add them to your .env file:\n"
+                output += f"   X_API_KEY=your_api_key\n"
+                output += f"   X_API_SECRET=your_api_secret\n"
+                output += f"   X_ACCESS_TOKEN=your_access_token\n"
+                output += f"   X_ACCESS_TOKEN_SECRET=your_access_token_secret\n"
             
-        else:
-            output += f"Error: {result['error']}\n"
-            if "details" in result:
-                output += f"Details: {result['details']}\n"
+            else:
+                output += f"Error: {result['error']}\n"
+                if "details" in result:
+                    output += f"Details: {result['details']}\n"
+                for match in result.get("near_duplicates", []):
+                    output += f"Similar published post ({match['similarity']:.0%}): {match['text']}\n"
         
+            return output
+    
+        # Success!
+        output = f"✅ POST PUBLISHED SUCCESSFULLY!\n\n"
+        output += f"📝 Post Text:\n{post_text}\n\n"
+        output += f"🔗 View your post at:\n{result['tweet_url']}\n\n"
+        output += f"Tweet ID: {result['tweet_id']}\n"
+        if result.get("media_ids"):
+            output += f"Media IDs: {', '.join(result['media_ids'])}\n"
+        for match in result.get("near_duplicates", []):
+            output += f"⚠️  Near-duplicate ({match['similarity']:.0%}) of an earlier post: {match['text']}\n"
+        return output
+
+    if result["success"]:
+        payload = {
+            "success": True,
+            "tweet_id": result["tweet_id"],
+            "tweet_url": result["tweet_url"],
+            "media_ids": result.get("media_ids", [])
+        }
+        if result.get("dry_run"):
+            payload["dry_run"] = True
+        if result.get("near_duplicates"):
+            payload["near_duplicates"] = result["near_duplicates"]
+        terse = f"published {result['tweet_id']} {result['tweet_url']}".rstrip()
+    else:
+        payload = {
+            key: result[key]
+            for key in ("success", "error", "requires_confirmation", "requires_setup", "near_duplicates")
+            if key in result
+        }
+        terse = f"error: {result['error']}"
+    
+    return _tool_result(output_format, payload, render_text, lambda: terse)
+
+
+def _multilingual_create_result(output_format: str | None, result: Dict[str, Any], max_length: int) -> CallToolResult:
+    """Build the create_post response for a post written in several languages."""
+    posts = result["posts"]
+
+    def render_text() -> str:
+        output = f"✅ Posts Created in {len(posts)} Languages!\n\n"
+        for language, post in posts.items():
+            notes = []
+            if language in result["repaired"]:
+                notes.append("shortened")
+            if language in result["truncated"]:
+                notes.append("truncated")
+            note = f" ({', '.join(notes)})" if notes else ""
+            output += f"🌐 {language} [{post['stats']['weighted_length']}/{max_length}]{note}:\n{'-' * 60}\n"
+            output += f"{post['post_text']}\n{'-' * 60}\n"
+            for violation in post.get("policy_violations", []):
+                output += f"🚫 POLICY: {violation['category']} {violation['rule']}: {violation['match']}\n"
+            for match in post.get("near_duplicates", []):
+                output += f"⚠️  NEAR-DUPLICATE: {match['similarity']:.0%} similar to a {match['kind']} post\n"
+            output += "\n"
+        for redaction in result.get("policy_redactions", []):
+            output += f"🔒 REDACTED from input: {redaction['rule']} ({redaction['match']})\n"
+        output += f"📊 LLM requests: {result['llm_calls']}, style: {result['style']}\n\n"
+        output += f"💡 TIP: Publish each post with the publish_post tool and confirm=True\n"
+        return output
+
+    payload = {
+        "success": True,
+        "posts": posts,
+        "style": result["style"],
+        "max_length": max_length,
+        "llm_calls": result["llm_calls"],
+        "repaired": result["repaired"],
+        "truncated": result["truncated"],
+        "policy_redactions": result.get("policy_redactions", [])
+    }
+    terse = "\n".join(
+        f"[{language} {post['stats']['weighted_length']}/{max_length}] {post['post_text']}"
+        for language, post in posts.items()
+    )
+    return _tool_result(output_format, payload, render_text, lambda: terse)
+
+
+def _fan_out_publish_result(output_format: str | None, result: Dict[str, Any]) -> CallToolResult:
+    """Build the publish_post response for a post published to several accounts."""
+    results = result["results"]
+
+    def render_text() -> str:
+        if result["success"]:
+            output = f"✅ POST PUBLISHED TO {result['published']} ACCOUNTS!\n\n"
+        else:
+            output = f"⚠️  Published to {result['published']} of {len(results)} accounts\n\n"
+        for entry in results:
+            if entry["success"]:
+                output += f"✅ {entry['account']}: {entry['tweet_url'] or entry['tweet_id']}\n"
+            else:
+                output += f"❌ {entry['account']}: {entry['error']}\n"
+            for match in entry.get("near_duplicates", []):
+                output += f"   ⚠️  Near-duplicate ({match['similarity']:.0%}) of an earlier post: {match['text']}\n"
+        return output
+
+    fields = (
+        "account", "success", "tweet_id", "tweet_url", "media_ids", "dry_run", "error", "requires_setup",
+        "near_duplicates"
+    )
+    payload = {
+        "success": result["success"],
+        "published": result["published"],
+        "failed": result["failed"],
+        "results": [{key: entry[key] for key in fields if key in entry} for entry in results]
+    }
+    terse = "\n".join(
+        f"{entry['account']} published {entry['tweet_id']} {entry['tweet_url']}".rstrip()
+        if entry["success"] else f"{entry['account']} error: {entry['error']}"
+        for entry in results
+    )
+    return _tool_result(output_format, payload, render_text, lambda: terse)
+
+
+@mcp.tool()
+def list_accounts() -> str:
+    """
+    List the X accounts posts can be published as.
+    
+    Accounts come from the .env credentials ("default") and from the
+    X_ACCOUNTS_FILE credentials file. Each account has its own rate limits.
+    
+    Returns:
+        A formatted list of account names, marking the default account.
+    """
+    accounts = services.current().accounts
+    names = accounts.names()
+    if not names:
+        return "📭 No X accounts configured. Set X_API_KEY etc. in .env or point X_ACCOUNTS_FILE at a credentials file."
+    output = "👥 X ACCOUNTS:\n"
+    for name in names:
+        marker = " (default)" if name == accounts.default_name else ""
+        output += f"  • {name}{marker}\n"
+    return output
+
+
+@mcp.tool()
+def schedule_post(post_text: str, publish_at: str, confirm: bool = False) -> str:
+    """
+    Schedule a post to be published to X/Twitter at a later time.
+    
+    ⚠️ IMPORTANT: The post will be published automatically when it falls due!
+    
+    Scheduled posts are stored on disk, so they survive server restarts. Posts
+    that fell due while the server was down are published when it comes back.
+    
+    Args:
+        post_text: The complete text of the post to publish (required).
+        publish_at: When to publish, as an ISO 8601 timestamp (required),
+                   e.g. "2025-03-01T09:30:00+01:00". Timestamps without an
+                   offset are treated as UTC.
+        confirm: Explicit confirmation to schedule (required).
+                Must be set to True, like publish_post.
+                Default: False
+    
+    Returns:
+        A formatted string with the schedule id and publish time.
+    
+    Example:
+        schedule_post(
+            post_text="🚀 Our launch event starts now! #Launch",
+            publish_at="2025-03-01T09:00:00Z",
+            confirm=True
+        )
+    """
+    start_request("schedule_post")
+    logger.info("schedule_post called", extra={"confirm": confirm, "publish_at": publish_at, "post_len": len(post_text)})
+
+    if scheduler is None:
+        return "❌ Error: Scheduling is disabled (SCHEDULER_ENABLED=false)."
+    if not confirm:
+        return (
+            "❌ Schedule Failed\n\n"
+            "⚠️  CONFIRMATION REQUIRED\n"
+            "To schedule this post, you must explicitly set confirm=True.\n"
+        )
+
+    try:
+        timestamp = parse_publish_at(publish_at)
+    except ValueError:
+        return f"❌ Error: Invalid publish_at '{publish_at}'. Use an ISO 8601 timestamp like 2025-03-01T09:30:00Z."
+
+    # Fail now rather than when the post falls due
+    verdict = services.current().policy.check(post_text)
+    if not verdict.allowed:
+        return f"❌ Error: Post violates the content policy: {verdict.error}"
+
+    result = scheduler.schedule(post_text, timestamp)
+    if not result["success"]:
+        return f"❌ Error: {result['error']}"
+
+    output = f"✅ Post Scheduled!\n\n"
+    output += f"🆔 Schedule ID: {result['schedule_id']}\n"
+    output += f"🕒 Publish at: {result['publish_at']}\n\n"
+    output += f"💡 TIP: Use cancel_scheduled_post with this id to cancel it\n"
+    return output
+
+
+@mcp.tool()
+def list_scheduled_posts(status: str = "pending", limit: int = 20, offset: int = 0) -> str:
+    """
+    List scheduled posts ordered by publish time.
+    
+    Args:
+        status: Which posts to list (optional). Options: "pending", "published",
+               "failed", "cancelled", "all". Default: "pending"
+        limit: Maximum number of posts to return (optional). Default: 20
+        offset: Number of posts to skip, for paging (optional). Default: 0
+    
+    Returns:
+        A formatted list of scheduled posts with their ids, times and status.
+    """
+    if scheduler is None:
+        return "❌ Error: Scheduling is disabled (SCHEDULER_ENABLED=false)."
+
+    try:
+        entries = scheduler.list(status=status, limit=limit, offset=offset)
+    except ValueError as e:
+        return f"❌ Error: {str(e)}"
+
+    if not entries:
+        return f"📭 No {status} scheduled posts."
+
+    output = f"📅 SCHEDULED POSTS ({status}):\n"
+    for entry in entries:
+        output += f"\n[{entry['schedule_id']}] {entry['publish_at']} - {entry['status']}\n"
+        output += f"  {entry['post_text']}\n"
+        if entry.get("tweet_url"):
+            output += f"  🔗 {entry['tweet_url']}\n"
+        if entry.get("error"):
+            output += f"  ⚠️  {entry['error']}\n"
+    return output
+
+
+@mcp.tool()
+def cancel_scheduled_post(schedule_id: int) -> str:
+    """
+    Cancel a pending scheduled post.
+    
+    Args:
+        schedule_id: The id returned by schedule_post (required).
+    
+    Returns:
+        A formatted string with the cancellation status.
+    """
+    start_request("cancel_scheduled_post")
+    logger.info("cancel_scheduled_post called", extra={"schedule_id": schedule_id})
+
+    if scheduler is None:
+        return "❌ Error: Scheduling is disabled (SCHEDULER_ENABLED=false)."
+
+    result = scheduler.cancel(schedule_id)
+    if not result["success"]:
+        return f"❌ Error: {result['error']}"
+    return f"✅ Scheduled post {schedule_id} cancelled.\n"
+
+
+@mcp.tool()
+@profiled("search_history")
+def search_history(
+    query: str | None = None,
+    style: str | None = None,
+    kind: str | None = None,
+    tweet_id: str | None = None,
+    account: str | None = None,
+    since: str | None = None,
+    until: str | None = None,
+    limit: int = 20,
+    cursor: int | None = None,
+    output_format: str | None = None
+) -> CallToolResult:
+    """
+    Search the history of drafted and published posts, newest first.
+    
+    Args:
+        query: Text to look for in the input or post text (optional).
+        style: Only posts in this style (optional).
+        kind: "created" for drafts or "published" for publish attempts (optional).
+        tweet_id: Only the post with this tweet id (optional).
+        account: Only posts published as this account (optional).
+        since: ISO 8601 timestamp; only posts at or after it (optional).
+        until: ISO 8601 timestamp; only posts before it (optional).
+        limit: Page size (optional). Default: 20
+        cursor: The next_cursor value from the previous page (optional).
+        output_format: "text", "json" or "terse" (see create_post).
+    
+    Returns:
+        Matching history records and a next_cursor for the following page.
+    """
+    history = services.current().history
+    if history is None:
+        error = "Post history is disabled (HISTORY_ENABLED=false)."
+        return _tool_result(output_format, {"success": False, "error": error},
+                            lambda: f"❌ Error: {error}", lambda: f"error: {error}")
+
+    try:
+        since_ts = parse_publish_at(since) if since else None
+        until_ts = parse_publish_at(until) if until else None
+    except ValueError:
+        error = "since/until must be ISO 8601 timestamps, e.g. 2025-03-01T00:00:00Z."
+        return _tool_result(output_format, {"success": False, "error": error},
+                            lambda: f"❌ Error: {error}", lambda: f"error: {error}")
+
+    page = history.search(
+        query=query,
+        style=style,
+        kind=kind,
+        tweet_id=tweet_id,
+        account=account,
+        since=since_ts,
+        until=until_ts,
+        limit=max(1, min(limit, 200)),
+        cursor=cursor
+    )
+    records = page["records"]
+
+    def render_text() -> str:
+        if not records:
+            return "📭 No matching history."
+        output = f"🗂️  POST HISTORY ({len(records)} records):\n"
+        for record in records:
+            status = "✅" if record["success"] else "❌"
+            output += f"\n[{record['id']}] {record['created_at']} {record['kind']} {status}"
+            if record.get("style"):
+                output += f" style={record['style']}"
+            if record.get("provider"):
+                output += f" provider={record['provider']}"
+            if record.get("account"):
+                output += f" account={record['account']}"
+            if record.get("latency_ms") is not None:
+                output += f" {record['latency_ms']:.0f}ms"
+            output += "\n"
+            if record.get("post_text"):
+                output += f"  {record['post_text']}\n"
+            if record.get("tweet_url"):
+                output += f"  🔗 {record['tweet_url']}\n"
+            if record.get("error"):
+                output += f"  ⚠️  {record['error']}\n"
+        if page["next_cursor"] is not None:
+            output += f"\n💡 More results: call search_history again with cursor={page['next_cursor']}\n"
+        return output
+
+    def render_terse() -> str:
+        lines = [f"{r['id']} {r['kind']} {r.get('tweet_id', '-')} {r.get('post_text', '')[:60]!r}" for r in records]
+        lines.append(f"next_cursor={page['next_cursor']}")
+        return "\n".join(lines)
+
+    return _tool_result(
+        output_format,
+        {"success": True, "records": records, "next_cursor": page["next_cursor"]},
+        render_text,
+        render_terse
+    )
+
+
+@mcp.tool()
+@profiled("get_post_metrics")
+async def get_post_metrics(
+    tweet_ids: list[str],
+    max_age_seconds: float | None = None,
+    account: str | None = None,
+    output_format: str | None = None
+) -> CallToolResult:
+    """
+    Get engagement metrics (likes, reposts, replies, quotes, impressions) for published posts.
+    
+    Ids are looked up 100 at a time with concurrent requests within the X rate
+    limits. Metrics are cached in the post history store, so polling the same
+    posts again within the cache TTL makes no API calls.
+    
+    Args:
+        tweet_ids: Ids of the posts to look up (required).
+        max_age_seconds: Accept cached metrics up to this old (optional).
+                        0 always fetches fresh metrics.
+                        Default: X_METRICS_TTL env var, or 60
+        account: Account whose credentials and rate limits are used (optional).
+        output_format: "text", "json" or "terse" (see create_post).
+    
+    Returns:
+        Metrics per post, and which ids were not found.
+    """
+    start_request("get_post_metrics")
+    started = time.perf_counter()
+    result = await run_cancellable(services.current().get_post_metrics, tweet_ids, max_age_seconds, account)
+    logger.info(
+        "get_post_metrics done",
+        extra={
+            "ids": len(tweet_ids),
+            "success": result["success"],
+            "cached": result.get("cached"),
+            "api_calls": result.get("api_calls"),
+            "latency_ms": round((time.perf_counter() - started) * 1000, 2),
+        },
+    )
+
+    if not result["success"]:
+        return _tool_result(
+            output_format,
+            {key: result[key] for key in ("success", "error", "requires_setup") if key in result},
+            lambda: f"❌ Error: {result['error']}",
+            lambda: f"error: {result['error']}"
+        )
+
+    metrics = result["metrics"]
+
+    def render_text() -> str:
+        output = f"📈 POST METRICS ({len(metrics)} posts, {result['cached']} from cache, {result['api_calls']} API calls):\n"
+        for tweet_id, entry in metrics.items():
+            output += f"\n[{tweet_id}]\n"
+            output += f"  • Likes: {entry.get('like_count', 0)}  Reposts: {entry.get('retweet_count', 0)}"
+            output += f"  Replies: {entry.get('reply_count', 0)}  Quotes: {entry.get('quote_count', 0)}\n"
+            if "impression_count" in entry:
+                output += f"  • Impressions: {entry['impression_count']}\n"
+        if result["not_found"]:
+            output += f"\n⚠️  Not found (deleted or private): {', '.join(result['not_found'])}\n"
+        for error in result.get("errors", []):
+            output += f"\n⚠️  Some lookups failed: {error}\n"
+        return output
+
+    def render_terse() -> str:
+        lines = [
+            f"{tweet_id} likes={e.get('like_count', 0)} reposts={e.get('retweet_count', 0)} "
+            f"replies={e.get('reply_count', 0)} impressions={e.get('impression_count', '-')}"
+            for tweet_id, e in metrics.items()
+        ]
+        if result["not_found"]:
+            lines.append(f"not_found={','.join(result['not_found'])}")
+        return "\n".join(lines)
+
+    payload = {key: result[key] for key in ("success", "metrics", "not_found", "cached", "fetched", "api_calls")}
+    if result.get("errors"):
+        payload["errors"] = result["errors"]
+    return _tool_result(output_format, payload, render_text, render_terse)
+
+
+@mcp.tool()
+def get_rate_limit_status() -> str:
+    """
+    Show the rate governor state for LLM and X API calls.
+    
+    Every provider endpoint has a requests-per-minute bucket (and a
+    tokens-per-minute bucket for LLMs). Calls queue for a bounded time when a
+    bucket is empty instead of failing with provider 429 errors. X endpoints of
+    accounts from X_ACCOUNTS_FILE are listed as "<account>/<endpoint>".
+    
+    Returns:
+        A formatted string with, per endpoint: available capacity, current
+        queue depth, how many calls were throttled or rejected, and total
+        time spent waiting.
+    """
+    service = services.current()
+    snapshot = service.rate_governor.snapshot()
+    for x_account in service.accounts:
+        if x_account.rate_governor is not service.rate_governor:
+            for key, entry in x_account.rate_governor.snapshot().items():
+                snapshot[f"{x_account.name}/{key}"] = entry
+    if not snapshot:
+        return "📊 No rate-limited calls yet."
+
+    output = "📊 RATE LIMITS:\n"
+    for key, entry in sorted(snapshot.items()):
+        output += f"\n{key}\n"
+        output += f"  • Requests: {entry['requests_available']}/{entry['requests_per_minute']:g} per minute\n"
+        if "tokens_per_minute" in entry:
+            output += f"  • Tokens: {entry['tokens_available']}/{entry['tokens_per_minute']:g} per minute\n"
+        output += f"  • Queued now: {entry['queued']}\n"
+        output += f"  • Calls: {entry['calls']} (throttled {entry['throttled']}, rejected {entry['rejected']})\n"
+        output += f"  • Total wait: {entry['wait_seconds']}s\n"
+        if entry["blocked_for_seconds"]:
+            output += f"  • Blocked by provider for {entry['blocked_for_seconds']}s\n"
+    return output
+
+
+@mcp.tool()
+def get_usage(minutes: int | None = None, output_format: str | None = None) -> CallToolResult:
+    """
+    Show LLM token usage, estimated spend and budget state.
+    
+    Usage is broken down by provider/model and by calling MCP client. When a
+    budget (LLM_BUDGET_USD, LLM_BUDGET_TOKENS or LLM_CALLER_BUDGET_USD) passes
+    LLM_DOWNGRADE_AT, create_post switches to a cheaper model; once it is
+    exhausted, posts are generated without an LLM until the window rolls over.
+    
+    Args:
+        minutes: Window to report (optional).
+                Default: the budget window (LLM_BUDGET_WINDOW_MINUTES, 60)
+        output_format: "text", "json" or "terse" (see create_post).
+    
+    Returns:
+        Tokens, calls and cost per model and per caller, plus the budget tier.
+    """
+    snapshot = get_usage_meter().snapshot(minutes)
+
+    def render_text() -> str:
+        budgets = snapshot["budgets"]
+        output = f"💰 LLM USAGE (last {snapshot['window_minutes']} minutes):\n"
+        output += f"  • Spend: ${snapshot['cost_usd']:.4f}"
+        output += f" of ${budgets['usd']:g}\n" if budgets["usd"] else "\n"
+        output += f"  • Tokens: {snapshot['tokens']}"
+        output += f" of {budgets['tokens']}\n" if budgets["tokens"] else "\n"
+        output += f"  • Tier: {snapshot['tier']}\n"
+        degraded = snapshot["degraded_calls"]
+        if degraded["cheap"] or degraded["simple"]:
+            output += f"  • Downgraded: {degraded['cheap']} to the cheaper model, {degraded['simple']} to simple generation\n"
+        for title, group in (("By model", snapshot["by_model"]), ("By caller", snapshot["by_caller"])):
+            if group:
+                output += f"\n{title}:\n"
+                for name, entry in sorted(group.items()):
+                    output += (
+                        f"  • {name}: {entry['calls']} calls, {entry['input_tokens']} in / "
+                        f"{entry['output_tokens']} out tokens, ${entry['cost_usd']:.4f}\n"
+                    )
         return output
+
+    return _tool_result(
+        output_format,
+        dict(snapshot, success=True),
+        render_text,
+        lambda: f"spend=${snapshot['cost_usd']:.4f} tokens={snapshot['tokens']} tier={snapshot['tier']}"
+    )
+
+
+# Clients allowed on /metrics and /profile when no route token is set
+LOCAL_HOSTS = ("127.0.0.1", "::1", "localhost")
+
+
+def _route_access_denied(request: Request, token_variable: str) -> Optional[Response]:
+    """
+    Check access to an HTTP route; returns the 403 response, or None if allowed.
+
+    When the token variable is set, the same value must be passed as ?token=;
+    without it, only requests from this machine are served, since the server
+    binds 0.0.0.0 by default.
+    """
+    token = os.getenv(token_variable)
+    if token:
+        if not hmac.compare_digest(request.query_params.get("token", "").encode(), token.encode()):
+            return PlainTextResponse("forbidden\n", status_code=403)
+    elif request.client is None or request.client.host not in LOCAL_HOSTS:
+        return PlainTextResponse(f"forbidden: set {token_variable} to allow remote access\n", status_code=403)
+    return None
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def metrics_route(request: Request) -> Response:
+    """
+    LLM usage counters in the Prometheus text format (SSE transport only).
+
+    Protected by METRICS_ROUTE_TOKEN like /profile, since it exposes spend per caller.
+    """
+    denied = _route_access_denied(request, "METRICS_ROUTE_TOKEN")
+    if denied is not None:
+        return denied
+    return PlainTextResponse(get_usage_meter().prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@mcp.tool()
+async def reload_config() -> str:
+    """
+    Reload the configuration without restarting the server.
+
+    Re-reads .env, X_ACCOUNTS_FILE, POLICY_FILE and STYLE_PACKS, builds the
+    API clients for the new settings, and swaps them in. Calls already running
+    finish on the previous configuration. The server also reloads by itself
+    when these files change (every CONFIG_RELOAD_INTERVAL seconds) and on SIGHUP.
+
+    Returns:
+        A formatted string with the configuration generation, the changed .env
+        variable names and those that only take effect after a restart, or the
+        error that kept the current configuration.
+    """
+    result = await anyio.to_thread.run_sync(services.reload)
+    if not result["success"]:
+        return f"❌ Reload Failed — still running configuration #{result['generation']}\n\nError: {result['error']}\n"
+    output = f"🔄 Configuration #{result['generation']} loaded in {result['duration_ms']:.0f} ms\n"
+    if result["changed_env"]:
+        output += f"  • Changed: {', '.join(result['changed_env'])}\n"
+    else:
+        output += f"  • No .env changes\n"
+    if result["restart_required"]:
+        output += f"  • Not applied until restart: {', '.join(result['restart_required'])}\n"
+    return output
+
+
+@mcp.tool()
+def set_profiling(sample_rate: float, reset: bool = False) -> str:
+    """
+    Turn on-demand profiling of tool calls on or off.
+    
+    A sampled fraction of create_post, publish_post and search_history calls
+    records time per phase (prompt building, rate-limit waits, provider calls,
+    truncation, formatting, ...) and periodic stack samples. Unsampled calls
+    are not measured.
     
-    # Success!
-    output = f"✅ POST PUBLISHED SUCCESSFULLY!\n\n"
-    output += f"📝 Post Text:\n{post_text}\n\n"
-    output += f"🔗 View your post at:\n{result['tweet_url']}\n\n"
-    output += f"Tweet ID: {result['tweet_id']}\n"
+    Args:
+        sample_rate: Fraction of calls to profile, from 0.0 (off) to 1.0 (all) (required).
+        reset: Drop profiles collected so far (optional). Default: False
     
+    Returns:
+        A formatted string with the new profiling settings.
+    """
+    profiler = get_profiler()
+    profiler.configure(sample_rate)
+    if reset:
+        profiler.reset()
+    logger.info("Profiling configured", extra={"sample_rate": profiler.sample_rate, "reset": reset})
+    if not profiler.enabled:
+        return "⏸️  Profiling disabled."
+    return (
+        f"⏱️  Profiling {profiler.sample_rate:.0%} of tool calls "
+        f"(keeping the last {profiler.window_minutes} minutes).\n\n"
+        f"💡 TIP: Use get_profile to read the aggregated profile\n"
+    )
+
+
+@mcp.tool()
+def get_profile(kind: str = "summary", minutes: int | None = None) -> str:
+    """
+    Read the aggregated profile of recent tool calls.
+    
+    Args:
+        kind: What to return (optional). Options:
+              - "summary": Profiled calls per tool and time per phase
+              - "phases": Collapsed stacks of phase self-time in microseconds
+              - "samples": Collapsed Python stacks from the sampler in microseconds
+              The collapsed formats can be fed to flamegraph.pl or speedscope.
+              Default: "summary"
+        minutes: Only include the most recent minutes (optional).
+                Default: the whole window (PROFILE_WINDOW_MINUTES)
+    
+    Returns:
+        The profile in the requested form.
+    """
+    profiler = get_profiler()
+    if kind in ("phases", "samples"):
+        folded = profiler.folded(kind, minutes)
+        return folded if folded.strip() else "📭 No profiles collected."
+    if kind != "summary":
+        return f"❌ Error: Unknown kind '{kind}'. Use summary, phases or samples."
+
+    summary = profiler.summary(minutes)
+    state = f"{summary['sample_rate']:.0%} of calls" if summary["enabled"] else "disabled"
+    output = f"⏱️  PROFILE (sampling {state}, last {minutes or summary['window_minutes']} minutes):\n"
+    if not summary["requests"]:
+        return output + "\n📭 No profiled calls yet.\n"
+    output += "\nCalls:\n"
+    for tool, entry in summary["requests"].items():
+        output += f"  • {tool}: {entry['profiled']} profiled, mean {entry['mean_ms']}ms\n"
+    output += "\nTime per phase (self time):\n"
+    for phase, ms in summary["phase_self_ms"].items():
+        output += f"  • {phase}: {ms}ms\n"
     return output
 
 
+@mcp.custom_route("/profile", methods=["GET"])
+async def profile_route(request: Request) -> Response:
+    """
+    Serve the aggregated profile over HTTP (SSE transport only).
+    
+    Query parameters: kind ("phases", "samples" or "summary") and minutes.
+    When PROFILE_ROUTE_TOKEN is set, the same value must be passed as ?token=;
+    without it, only requests from this machine are served, since profiles
+    expose code paths and timings and the server binds 0.0.0.0 by default.
+    """
+    denied = _route_access_denied(request, "PROFILE_ROUTE_TOKEN")
+    if denied is not None:
+        return denied
+    kind = request.query_params.get("kind", "phases")
+    try:
+        minutes = int(request.query_params["minutes"]) if "minutes" in request.query_params else None
+    except ValueError:
+        return PlainTextResponse("minutes must be an integer\n", status_code=400)
+
+    profiler = get_profiler()
+    if kind == "summary":
+        return JSONResponse(profiler.summary(minutes))
+    if kind not in ("phases", "samples"):
+        return PlainTextResponse("kind must be phases, samples or summary\n", status_code=400)
+    return PlainTextResponse(profiler.folded(kind, minutes))
+
+
 if __name__ == "__main__":
     import argparse
     import uvicorn
@@ -230,4 +1074,4 @@ if __name__ == "__main__":
         print(f"🚀 Starting X Post Creator MCP Server on {args.host}:{args.port}")
         print(f"📡 Transport: Server-Sent Events (SSE)")
         print(f"🔗 Access at: http://{args.host}:{args.port}")
-        uvicorn.run(mcp.sse_app, host=args.host, port=args.port)
+        uvicorn.run(mcp.sse_app(), host=args.host, port=args.port)
@@ -0,0 +1,76 @@
+"""
+Single-flight coalescing of identical in-flight calls.
+
+When several threads ask for the same key at the same time, only the first
+(the leader) runs the function; the others wait and share its result or its
+exception. Nothing is cached: once the call finishes, the next request for
+the key runs again.
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .cancellation import wait_event
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.stats = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn once for all concurrent callers with the same key.
+
+        If the leader fails with an ordinary exception, every waiter receives that
+        exception. If the leader is cancelled (an exception outside the Exception
+        hierarchy, e.g. asyncio.CancelledError or KeyboardInterrupt), waiters are
+        not cancelled with it: one of them takes over as the new leader. A waiter
+        whose own request is cancelled stops waiting (RequestCancelled).
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is None:
+                    call = self._calls[key] = _Call()
+                    self.stats["leaders"] += 1
+                    leader = True
+                else:
+                    call.waiters += 1
+                    self.stats["coalesced"] += 1
+                    leader = False
+
+            if leader:
+                try:
+                    call.result = fn()
+                except BaseException as e:
+                    call.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        del self._calls[key]
+                    call.done.set()
+                return call.result
+
+            wait_event(call.done)
+            if call.error is None:
+                return call.result
+            if isinstance(call.error, Exception):
+                raise call.error
+            # The leader was cancelled; retry so a surviving caller leads
+
+    def in_flight(self) -> int:
+        """Number of distinct keys currently being computed."""
+        with self._lock:
+            return len(self._calls)
@@ -0,0 +1,177 @@
+"""
+Style packs for the rule-based (no-LLM) generation path.
+
+A style pack is a JSON file describing, per style, the prefix, emoji,
+sentence template, default hashtags, hashtag limits and the description
+given to LLMs. Packs are compiled once into small render closures, so the
+fast path does no dict building or branching per post.
+
+The built-in pack lives in styles/default.json; brand packs listed in the
+STYLE_PACKS environment variable (comma-separated files or directories) are
+layered on top and may add new styles or override built-in ones.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+BUILTIN_PACK = os.path.join(os.path.dirname(__file__), "styles", "default.json")
+
+_TEXT_MARKER = "\x00"
+
+
+class StylePackError(Exception):
+    """Raised when a style pack cannot be loaded or compiled."""
+
+
+class CompiledStyle:
+    """A style with its template and hashtag rules precompiled."""
+
+    __slots__ = (
+        "name", "description", "emoji", "max_hashtags", "hashtag_separator",
+        "_render", "_default_hashtags", "_keyword_hashtags"
+    )
+
+    def __init__(self, name: str, spec: Dict[str, Any], keyword_hashtags: Tuple[Tuple[str, str], ...]):
+        self.name = name
+        self.description = spec["description"]
+        self.emoji = spec["emoji"]
+        self.max_hashtags = int(spec["max_hashtags"])
+        self.hashtag_separator = spec["hashtag_separator"]
+        self._default_hashtags = " ".join(spec["hashtags"][:self.max_hashtags])
+        self._keyword_hashtags = keyword_hashtags
+
+        render = _compile_template(spec["template"], spec)
+        if spec.get("template_if_starts_with_emoji") and self.emoji:
+            render_plain = _compile_template(spec["template_if_starts_with_emoji"], spec)
+            emoji = self.emoji
+            self._render = lambda text: render_plain(text) if text.startswith(emoji) else render(text)
+        else:
+            self._render = render
+
+    def apply(self, text: str) -> str:
+        """Render the text with this style's prefix, emoji and template."""
+        return self._render(text)
+
+    def hashtags(self, text: str) -> str:
+        """Pick hashtags for keywords found in the text, or fall back to the style defaults."""
+        text_lower = text.lower()
+        found: List[str] = []
+        for keyword, hashtag in self._keyword_hashtags:
+            if keyword in text_lower and hashtag not in found:
+                found.append(hashtag)
+                if len(found) >= self.max_hashtags:
+                    break
+        return " ".join(found) if found else self._default_hashtags
+
+
+def _compile_template(template: str, spec: Dict[str, Any]) -> Callable[[str], str]:
+    """Pre-fill everything except {text}, leaving a two-piece string concatenation."""
+    try:
+        filled = template.format(prefix=spec["prefix"], emoji=spec["emoji"], text=_TEXT_MARKER)
+    except (KeyError, IndexError, ValueError) as e:
+        raise StylePackError(f"Invalid template {template!r}: {e}")
+    if filled.count(_TEXT_MARKER) != 1:
+        raise StylePackError(f"Template {template!r} must contain {{text}} exactly once")
+    head, tail = filled.split(_TEXT_MARKER)
+    return lambda text: head + text + tail
+
+
+class StyleRegistry:
+    """All styles from the loaded packs, compiled."""
+
+    def __init__(self, pack_paths: Optional[List[str]] = None):
+        """
+        Load and compile style packs.
+
+        Args:
+            pack_paths: Extra pack files or directories, applied after the built-in pack
+        """
+        self.pack_paths = list(pack_paths or [])
+        defaults: Dict[str, Any] = {}
+        keyword_hashtags: Dict[str, str] = {}
+        styles: Dict[str, Dict[str, Any]] = {}
+
+        for path in [BUILTIN_PACK] + _expand_paths(pack_paths or []):
+            pack = _load_pack(path)
+            defaults.update(pack.get("defaults", {}))
+            keyword_hashtags.update(pack.get("keyword_hashtags", {}))
+            for name, spec in pack.get("styles", {}).items():
+                styles[name] = {**styles.get(name, {}), **spec}
+
+        keywords = tuple(keyword_hashtags.items())
+        self.fallback = CompiledStyle("default", defaults, keywords)
+        self._styles = {
+            name: CompiledStyle(name, {**defaults, **spec}, keywords)
+            for name, spec in styles.items()
+        }
+
+    def get(self, style: str) -> CompiledStyle:
+        """Return the compiled style, or the pack defaults for unknown styles."""
+        return self._styles.get(style, self.fallback)
+
+    def names(self) -> List[str]:
+        return list(self._styles)
+
+
+def _expand_paths(paths: List[str]) -> List[str]:
+    expanded = []
+    for path in paths:
+        path = os.path.expanduser(path.strip())
+        if not path:
+            continue
+        if os.path.isdir(path):
+            expanded.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith(".json")
+            ))
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def _load_pack(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            pack = json.load(f)
+    except (OSError, ValueError) as e:
+        raise StylePackError(f"Could not load style pack {path}: {e}")
+    if not isinstance(pack, dict):
+        raise StylePackError(f"Style pack {path} must contain a JSON object")
+    for key in ("defaults", "keyword_hashtags", "styles"):
+        if not isinstance(pack.get(key, {}), dict):
+            raise StylePackError(f"Style pack {path}: {key!r} must be an object")
+    for name, spec in pack.get("styles", {}).items():
+        if not isinstance(spec, dict):
+            raise StylePackError(f"Style pack {path}: style {name!r} must be an object")
+    return pack
+
+
+_registries: Dict[Tuple[str, ...], StyleRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_style_registry(pack_paths: Optional[List[str]] = None) -> StyleRegistry:
+    """
+    Get the compiled registry for a list of packs (default: STYLE_PACKS).
+
+    Registries are cached, so packs are compiled once per process.
+    """
+    if pack_paths is None:
+        pack_paths = style_pack_paths()
+    key = tuple(pack_paths)
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = StyleRegistry(list(key))
+        return _registries[key]
+
+
+def set_style_registry(registry: StyleRegistry) -> None:
+    """Cache a registry for its packs, replacing any older one (a config reload does this at the swap)."""
+    with _registries_lock:
+        _registries[tuple(registry.pack_paths)] = registry
+
+
+def style_pack_paths() -> List[str]:
+    """The pack files and directories listed in STYLE_PACKS."""
+    return [p.strip() for p in os.getenv("STYLE_PACKS", "").split(",") if p.strip()]
@@ -0,0 +1,83 @@
+"""
+Post length as X counts it.
+
+X limits posts by weighted length, not by characters: Latin, Greek, Cyrillic
+and common punctuation count 1, everything else (CJK, Hangul, Thai, emoji)
+counts 2, and every link counts 23 whatever its length. A 140-character
+Japanese post is therefore already at the 280 limit.
+"""
+
+import re
+import unicodedata
+from typing import Iterator, Tuple
+
+# Code point ranges weighted 1; everything else is weighted 2
+_LIGHT_RANGES = ((0, 4351), (8192, 8205), (8208, 8223), (8242, 8247))
+
+URL_LENGTH = 23
+EMOJI_LENGTH = 2
+
+_PICTOGRAPH = "[\u2600-\u27bf\U0001f000-\U0001faff]"
+_MODIFIERS = "[\U0001f3fb-\U0001f3ff]?\ufe0f?"  # skin tone, emoji presentation
+_EMOJI = (
+    "[\U0001f1e6-\U0001f1ff]{2}"  # flags
+    f"|{_PICTOGRAPH}{_MODIFIERS}(?:\u200d{_PICTOGRAPH}{_MODIFIERS})*"  # ZWJ sequences count as one emoji
+)
+_TOKEN = re.compile(rf"(?P<url>https?://\S+|www\.\S+)|(?P<emoji>{_EMOJI})", re.IGNORECASE)
+
+
+def _char_length(char: str) -> int:
+    code = ord(char)
+    for low, high in _LIGHT_RANGES:
+        if low <= code <= high:
+            return 1
+    return 2
+
+
+def _pieces(text: str) -> Iterator[Tuple[int, int]]:
+    """(end offset, weighted length) of each unit X counts: a link, an emoji or a character."""
+    pos = 0
+    for match in _TOKEN.finditer(text):
+        for i in range(pos, match.start()):
+            yield i + 1, _char_length(text[i])
+        yield match.end(), URL_LENGTH if match.lastgroup == "url" else EMOJI_LENGTH
+        pos = match.end()
+    for i in range(pos, len(text)):
+        yield i + 1, _char_length(text[i])
+
+
+def weighted_length(text: str) -> int:
+    """Length of text as counted against X's limit."""
+    text = unicodedata.normalize("NFC", text)
+    if text.isascii() and "://" not in text and "www." not in text.lower():
+        return len(text)
+    return sum(length for _, length in _pieces(text))
+
+
+def truncate_weighted(text: str, max_length: int) -> str:
+    """
+    Truncate text to a weighted length, preserving word boundaries, links and emoji.
+
+    Args:
+        text: Text to truncate
+        max_length: Weighted length limit, including the "..." appended
+
+    Returns:
+        text unchanged if it fits, otherwise a prefix ending in "..."
+    """
+    text = unicodedata.normalize("NFC", text)
+    if weighted_length(text) <= max_length:
+        return text
+
+    budget = max_length - 3
+    cut, used = 0, 0
+    for end, length in _pieces(text):
+        if used + length > budget:
+            break
+        cut, used = end, used + length
+
+    truncated = text[:cut]
+    last_space = truncated.rfind(" ")
+    if last_space > cut * 0.8:
+        truncated = truncated[:last_space]
+    return truncated.rstrip() + "..."
@@ -0,0 +1,304 @@
+"""
+LLM token and cost metering with budget-driven degradation.
+
+Every LLM response's token usage is recorded per provider, model and caller
+into per-minute buckets. Spend over the budget window decides the tier for
+the next generation: the configured model, a cheaper model once spend passes
+LLM_DOWNGRADE_AT of a budget, and template-based generation once a budget is
+exhausted. A runaway agent loop therefore degrades gracefully instead of
+running up the bill or saturating provider quota.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+# USD per million input/output tokens; override or extend with LLM_PRICING
+DEFAULT_PRICING = {
+    "claude-3-5-sonnet-20241022": (3.0, 15.0),
+    "claude-3-5-haiku-20241022": (0.8, 4.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+}
+
+# Model per provider and tier; override with <PROVIDER>_MODEL / <PROVIDER>_CHEAP_MODEL
+DEFAULT_MODELS = {
+    "anthropic": {"full": "claude-3-5-sonnet-20241022", "cheap": "claude-3-5-haiku-20241022"},
+    "openai": {"full": "gpt-4o", "cheap": "gpt-4o-mini"},
+}
+
+_caller: contextvars.ContextVar[str] = contextvars.ContextVar("usage_caller", default="local")
+
+# Callers past LLM_MAX_CALLERS are accounted under this label
+OTHER_CALLER = "other"
+
+# (provider, model, caller) -> [input_tokens, output_tokens, cost_usd, calls]
+_Totals = Dict[Tuple[str, str, str], list]
+
+
+def set_caller(caller: str) -> None:
+    """Attribute LLM usage in the current context (and threads started from it) to caller."""
+    _caller.set(caller or "local")
+
+
+def current_caller() -> str:
+    return _caller.get()
+
+
+class UsageMeter:
+    """Rolling-window token and cost accounting with budgets."""
+
+    def __init__(
+        self,
+        window_minutes: Optional[int] = None,
+        budget_usd: Optional[float] = None,
+        budget_tokens: Optional[int] = None,
+        caller_budget_usd: Optional[float] = None,
+        downgrade_at: Optional[float] = None,
+        max_callers: Optional[int] = None
+    ):
+        """
+        Initialize the meter; budgets of 0 are unlimited.
+
+        Args:
+            window_minutes: Budget window (default: LLM_BUDGET_WINDOW_MINUTES or 60)
+            budget_usd: Spend allowed per window across all callers (default: LLM_BUDGET_USD or 0)
+            budget_tokens: Tokens allowed per window across all callers (default: LLM_BUDGET_TOKENS or 0)
+            caller_budget_usd: Spend allowed per window for each caller (default: LLM_CALLER_BUDGET_USD or 0)
+            downgrade_at: Fraction of a budget after which the cheaper model is used
+                          (default: LLM_DOWNGRADE_AT or 0.8)
+            max_callers: Distinct callers tracked; later ones share OTHER_CALLER, since
+                         caller names come from clients (default: LLM_MAX_CALLERS or 100)
+        """
+        settings = self.settings_from_env()
+        self.window_minutes = window_minutes or settings["window_minutes"]
+        self.budget_usd = budget_usd if budget_usd is not None else settings["budget_usd"]
+        self.budget_tokens = budget_tokens if budget_tokens is not None else settings["budget_tokens"]
+        self.caller_budget_usd = caller_budget_usd if caller_budget_usd is not None else settings["caller_budget_usd"]
+        self.downgrade_at = downgrade_at if downgrade_at is not None else settings["downgrade_at"]
+        self.max_callers = max_callers if max_callers is not None else settings["max_callers"]
+        self.pricing = settings["pricing"]
+        self.models = settings["models"]
+
+        self._lock = threading.Lock()
+        self._buckets: Deque[Tuple[int, _Totals]] = deque()
+        # Monotonic totals since start, for Prometheus counters
+        self._lifetime: _Totals = {}
+        self._degraded = {"cheap": 0, "simple": 0}
+        self._callers: Set[str] = set()
+
+    @staticmethod
+    def settings_from_env() -> Dict[str, Any]:
+        """
+        Read the LLM_BUDGET_*, LLM_PRICING and model settings.
+
+        Raises:
+            ValueError: If a value cannot be parsed
+        """
+        pricing = dict(DEFAULT_PRICING)
+        if os.getenv("LLM_PRICING"):
+            pricing.update({model: tuple(prices) for model, prices in json.loads(os.getenv("LLM_PRICING")).items()})
+        return {
+            "window_minutes": int(os.getenv("LLM_BUDGET_WINDOW_MINUTES", "60")),
+            "budget_usd": float(os.getenv("LLM_BUDGET_USD", "0")),
+            "budget_tokens": int(os.getenv("LLM_BUDGET_TOKENS", "0")),
+            "caller_budget_usd": float(os.getenv("LLM_CALLER_BUDGET_USD", "0")),
+            "downgrade_at": float(os.getenv("LLM_DOWNGRADE_AT", "0.8")),
+            "max_callers": int(os.getenv("LLM_MAX_CALLERS", "100")),
+            "pricing": pricing,
+            "models": {
+                provider: {
+                    "full": os.getenv(f"{provider.upper()}_MODEL", models["full"]),
+                    "cheap": os.getenv(f"{provider.upper()}_CHEAP_MODEL", models["cheap"]),
+                }
+                for provider, models in DEFAULT_MODELS.items()
+            },
+        }
+
+    def apply_settings(self, settings: Dict[str, Any]) -> None:
+        """Apply settings from settings_from_env after a config reload; recorded usage is kept."""
+        with self._lock:
+            for name, value in settings.items():
+                setattr(self, name, value)
+
+    def cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
+        """Cost in USD of a call; models without a price cost 0."""
+        input_price, output_price = self.pricing.get(model, (0.0, 0.0))
+        return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+    def record(self, provider: str, model: str, input_tokens: int, output_tokens: int,
+               caller: Optional[str] = None) -> float:
+        """
+        Record one LLM call's usage.
+
+        Args:
+            provider: "anthropic" or "openai"
+            model: The model that served the call
+            input_tokens, output_tokens: Usage reported by the provider
+            caller: Who to charge (default: the caller set for the current context)
+
+        Returns:
+            The call's cost in USD
+        """
+        cost = self.cost(model, input_tokens, output_tokens)
+        with self._lock:
+            key = (provider, model, self._caller_label(caller or current_caller(), track=True))
+            for totals in (self._bucket(), self._lifetime):
+                entry = totals.setdefault(key, [0, 0, 0.0, 0])
+                entry[0] += input_tokens
+                entry[1] += output_tokens
+                entry[2] += cost
+                entry[3] += 1
+        return cost
+
+    def tier(self, caller: Optional[str] = None) -> str:
+        """Which tier the next generation for caller may use: "full", "cheap" or "simple"."""
+        with self._lock:
+            caller = self._caller_label(caller or current_caller())
+        totals = self.window_totals()
+        ratios = []
+        if self.budget_usd > 0:
+            ratios.append(sum(entry[2] for entry in totals.values()) / self.budget_usd)
+        if self.budget_tokens > 0:
+            ratios.append(sum(entry[0] + entry[1] for entry in totals.values()) / self.budget_tokens)
+        if self.caller_budget_usd > 0:
+            caller_cost = sum(entry[2] for key, entry in totals.items() if key[2] == caller)
+            ratios.append(caller_cost / self.caller_budget_usd)
+
+        usage = max(ratios, default=0.0)
+        if usage >= 1.0:
+            return "simple"
+        if usage >= self.downgrade_at:
+            return "cheap"
+        return "full"
+
+    def record_degraded(self, tier: str) -> None:
+        """Count a generation that ran below the full tier."""
+        with self._lock:
+            self._degraded[tier] += 1
+
+    def model_for(self, provider: str, tier: str) -> str:
+        """The model to call for a provider at a tier."""
+        return self.models[provider]["cheap" if tier == "cheap" else "full"]
+
+    def window_totals(self, minutes: Optional[int] = None) -> _Totals:
+        """Usage per (provider, model, caller) over the last `minutes` (default: the budget window)."""
+        cutoff = int(time.time() // 60) - (minutes or self.window_minutes) + 1
+        totals: _Totals = {}
+        with self._lock:
+            for minute, bucket in self._buckets:
+                if minute < cutoff:
+                    continue
+                for key, values in bucket.items():
+                    entry = totals.setdefault(key, [0, 0, 0.0, 0])
+                    for i, value in enumerate(values):
+                        entry[i] += value
+        return totals
+
+    def snapshot(self, minutes: Optional[int] = None) -> Dict[str, Any]:
+        """Usage over a window grouped by provider/model and by caller, plus budget state."""
+        totals = self.window_totals(minutes)
+        by_model: Dict[str, Dict[str, Any]] = {}
+        by_caller: Dict[str, Dict[str, Any]] = {}
+        for (provider, model, caller), (input_tokens, output_tokens, cost, calls) in totals.items():
+            for group, name in ((by_model, f"{provider}/{model}"), (by_caller, caller)):
+                entry = group.setdefault(name, {"calls": 0, "input_tokens": 0, "output_tokens": 0, "cost_usd": 0.0})
+                entry["calls"] += calls
+                entry["input_tokens"] += input_tokens
+                entry["output_tokens"] += output_tokens
+                entry["cost_usd"] += cost
+        for group in (by_model, by_caller):
+            for entry in group.values():
+                entry["cost_usd"] = round(entry["cost_usd"], 6)
+
+        with self._lock:
+            degraded = dict(self._degraded)
+        return {
+            "window_minutes": minutes or self.window_minutes,
+            "cost_usd": round(sum(entry[2] for entry in totals.values()), 6),
+            "tokens": sum(entry[0] + entry[1] for entry in totals.values()),
+            "by_model": by_model,
+            "by_caller": by_caller,
+            "budgets": {
+                "usd": self.budget_usd or None,
+                "tokens": self.budget_tokens or None,
+                "caller_usd": self.caller_budget_usd or None,
+                "downgrade_at": self.downgrade_at,
+            },
+            "tier": self.tier(),
+            "degraded_calls": degraded,
+        }
+
+    def prometheus(self) -> str:
+        """Lifetime counters in the Prometheus text exposition format."""
+        with self._lock:
+            lifetime = {key: list(values) for key, values in self._lifetime.items()}
+            degraded = dict(self._degraded)
+        lines = [
+            "# HELP llm_tokens_total LLM tokens used.",
+            "# TYPE llm_tokens_total counter",
+        ]
+        for (provider, model, caller), (input_tokens, output_tokens, _, _) in sorted(lifetime.items()):
+            labels = f'provider="{provider}",model="{model}",caller="{_escape(caller)}"'
+            lines.append(f'llm_tokens_total{{{labels},direction="input"}} {input_tokens}')
+            lines.append(f'llm_tokens_total{{{labels},direction="output"}} {output_tokens}')
+        lines += ["# HELP llm_cost_usd_total Estimated LLM spend in USD.", "# TYPE llm_cost_usd_total counter"]
+        for (provider, model, caller), (_, _, cost, _) in sorted(lifetime.items()):
+            lines.append(f'llm_cost_usd_total{{provider="{provider}",model="{model}",caller="{_escape(caller)}"}} {cost:.6f}')
+        lines += ["# HELP llm_requests_total LLM calls.", "# TYPE llm_requests_total counter"]
+        for (provider, model, caller), (_, _, _, calls) in sorted(lifetime.items()):
+            lines.append(f'llm_requests_total{{provider="{provider}",model="{model}",caller="{_escape(caller)}"}} {calls}')
+        lines += [
+            "# HELP llm_degraded_generations_total Generations downgraded by the budget.",
+            "# TYPE llm_degraded_generations_total counter",
+        ]
+        for tier, count in degraded.items():
+            lines.append(f'llm_degraded_generations_total{{tier="{tier}"}} {count}')
+        if self.budget_usd:
+            window_cost = sum(entry[2] for entry in self.window_totals().values())
+            lines += [
+                "# HELP llm_budget_remaining_usd Spend left in the current budget window.",
+                "# TYPE llm_budget_remaining_usd gauge",
+                f"llm_budget_remaining_usd {max(0.0, self.budget_usd - window_cost):.6f}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def _caller_label(self, caller: str, track: bool = False) -> str:
+        """The label caller is accounted under; callers hold self._lock."""
+        if caller in self._callers:
+            return caller
+        if len(self._callers) >= self.max_callers:
+            return OTHER_CALLER
+        if track:
+            self._callers.add(caller)
+        return caller
+
+    def _bucket(self) -> _Totals:
+        """The current minute's bucket; callers hold self._lock."""
+        minute = int(time.time() // 60)
+        if not self._buckets or self._buckets[-1][0] != minute:
+            self._buckets.append((minute, {}))
+            while self._buckets and self._buckets[0][0] <= minute - self.window_minutes:
+                self._buckets.popleft()
+        return self._buckets[-1][1]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_meter: Optional[UsageMeter] = None
+_meter_lock = threading.Lock()
+
+
+def get_usage_meter() -> UsageMeter:
+    """The process-wide usage meter."""
+    global _meter
+    with _meter_lock:
+        if _meter is None:
+            _meter = UsageMeter()
+        return _meter
@@ -2,41 +2,138 @@
 X/Twitter service for creating and publishing posts.
 """
 
+import contextvars
+import inspect
+import json
+import logging
+import mimetypes
 import os
 import re
-from typing import Optional, Dict, Any
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Union
 from dotenv import load_dotenv
 
+from .accounts import AccountPool, XAccount
+from .cancellation import call_provider, check_cancelled
+from .dedup import DEFAULT_INDEX_PATH, get_dedup_index
+from .history import get_post_history
+from .policy import get_policy, load_policy
+from .profiling import profile_phase
+from .rate_limit import default_governor
+from .single_flight import SingleFlight
+from .styles import StyleRegistry, get_style_registry, style_pack_paths
+from .text_length import truncate_weighted, weighted_length
+from .usage import current_caller, get_usage_meter
+
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# X's tweet lookup endpoint accepts at most this many ids per request
+METRICS_BATCH_SIZE = 100
+
+# Multi-language generation: languages per request, and completion tokens per language
+MAX_LANGUAGES = 10
+TOKENS_PER_LANGUAGE = 400
+LANGUAGE_CODE = re.compile(r"[A-Za-z]{2,3}(?:-[A-Za-z0-9]{2,8})*")
+
+
+def _parse_raw(raw_response) -> Tuple[Any, Any]:
+    """(headers, parsed body) of a with_raw_response call."""
+    return raw_response.headers, raw_response.parse()
+
+
+async def _parse_raw_async(raw_response_coro) -> Tuple[Any, Any]:
+    """(headers, parsed body) of an async with_raw_response call."""
+    raw_response = await raw_response_coro
+    parsed = raw_response.parse()
+    if inspect.isawaitable(parsed):
+        parsed = await parsed
+    return raw_response.headers, parsed
+
 
 class XPostService:
     """Service for creating and publishing X/Twitter posts."""
     
-    def __init__(self):
-        """Initialize the X post service."""
+    def __init__(self, previous: Optional["XPostService"] = None):
+        """
+        Initialize the X post service from the current environment.
+        
+        Args:
+            previous: The service this one replaces on a config reload. Policy and
+                      style files are re-read, and API clients and per-account
+                      rate-limit state are kept wherever credentials are unchanged.
+        """
         self.max_length = int(os.getenv("DEFAULT_MAX_LENGTH", "280"))
         self.include_hashtags_default = os.getenv("INCLUDE_HASHTAGS", "true").lower() == "true"
         self.dry_run = os.getenv("X_PUBLISH_DRY_RUN", "false").lower() == "true"
         
-        # X API credentials (lazy loaded)
-        self._twitter_client = None
+        # Shared request/token budget for provider calls
+        self.rate_governor = default_governor()
+        
+        # X accounts: the .env account plus any from X_ACCOUNTS_FILE (clients lazy loaded)
+        self.accounts = AccountPool(default_governor=self.rate_governor)
+        if previous is not None:
+            self.accounts.adopt(previous.accounts)
+        self.publish_max_parallel = int(os.getenv("X_PUBLISH_MAX_PARALLEL", "8"))
+        
+        # Identical concurrent generations share one provider call
+        self._inflight_generations = SingleFlight()
+        
+        # Compiled style packs (built-in styles plus any STYLE_PACKS). A reload compiles
+        # its own copy; ServiceReloader only caches it once this service is swapped in.
+        self.styles = get_style_registry() if previous is None else StyleRegistry(style_pack_paths())
+        
+        # Near-duplicate detection against post history: "flag", "block" or "off"
+        self.dedup_mode = os.getenv("DEDUP_MODE", "flag").lower()
+        self.dedup_path = os.getenv("DEDUP_INDEX_PATH", DEFAULT_INDEX_PATH)
+        self._dedup_index = None
+        
+        # Local content policy, checked before any LLM or X API call (likewise per reload)
+        self.policy = get_policy() if previous is None else load_policy()
+        
+        # Post history store (written off the request path)
+        self.history = get_post_history() if os.getenv("HISTORY_ENABLED", "true").lower() == "true" else None
+        
+        # Engagement metrics are cached in the history store for this many seconds
+        self.metrics_ttl = float(os.getenv("X_METRICS_TTL", "60"))
+        self.metrics_max_parallel = int(os.getenv("X_METRICS_MAX_PARALLEL", "4"))
         
         # LLM clients (lazy loaded)
         self._openai_client = None
         self._anthropic_client = None
+        # Async clients serve MCP requests, so cancelling a request aborts its HTTP call
+        self._openai_async_client = None
+        self._anthropic_async_client = None
+        
+        # Token/cost metering; budgets downgrade to cheaper models, then to simple generation
+        self.usage = get_usage_meter()
         
         # Check which LLM APIs are available
-        self._has_openai = bool(os.getenv("OPENAI_API_KEY"))
-        self._has_anthropic = bool(os.getenv("ANTHROPIC_API_KEY"))
+        self._openai_api_key = os.getenv("OPENAI_API_KEY")
+        self._anthropic_api_key = os.getenv("ANTHROPIC_API_KEY")
+        self._has_openai = bool(self._openai_api_key)
+        self._has_anthropic = bool(self._anthropic_api_key)
+        
+        # Keep warm clients (and their connection pools) when a reload leaves the keys unchanged
+        if previous is not None:
+            if previous._anthropic_api_key == self._anthropic_api_key:
+                self._anthropic_client = previous._anthropic_client
+                self._anthropic_async_client = previous._anthropic_async_client
+            if previous._openai_api_key == self._openai_api_key:
+                self._openai_client = previous._openai_client
+                self._openai_async_client = previous._openai_async_client
     
     def create_post(
         self,
         text: str,
         style: str = "professional",
         include_hashtags: bool = True,
-        max_length: int = 280
+        max_length: int = 280,
+        languages: Optional[List[str]] = None,
+        record: bool = True
     ) -> Dict[str, Any]:
         """
         Create an attractive X/Twitter post from input text.
@@ -46,29 +143,80 @@ class XPostService:
             style: Writing style - "professional", "casual", "witty", "inspirational"
             include_hashtags: Whether to include relevant hashtags
             max_length: Maximum character length (default 280)
+            languages: Language codes (e.g. ["en", "de", "ja"]) to write the post
+                       in, all in one LLM request; max_length then applies to each
+                       post's X-weighted length
+            record: Check the draft for near-duplicates and add it to the post
+                    history; bulk runs turn this off
             
         Returns:
-            Dictionary with post text and metadata
+            Dictionary with post text and metadata. With languages, "posts" maps
+            each language to such a dictionary instead.
         """
+        # Reject or redact policy violations before they reach an LLM provider
+        verdict = self.policy.check(text, redact=True)
+        if not verdict.allowed:
+            return {
+                "success": False,
+                "error": f"Input violates the content policy: {verdict.error}",
+                "policy_violations": verdict.violations
+            }
+        text = verdict.text
+        
+        if languages:
+            return self._create_multilingual_post(
+                text, style, include_hashtags, max_length, languages, verdict.redactions, record
+            )
+
         try:
             # Generate the post based on style
-            post_text = self._generate_post_text(text, style, include_hashtags, max_length)
+            started = time.perf_counter()
+            with profile_phase("generate"):
+                post_text, provider = self._generate_post_text(text, style, include_hashtags, max_length)
+            latency_ms = (time.perf_counter() - started) * 1000
+            check_cancelled()
             
             # Calculate statistics
-            stats = {
-                "character_count": len(post_text),
-                "hashtag_count": len(re.findall(r'#\w+', post_text)),
-                "emoji_count": len(re.findall(r'[\U0001F300-\U0001F9FF]', post_text)),
-                "url_count": len(re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', post_text))
-            }
+            with profile_phase("stats"):
+                stats = self._post_stats(post_text)
             
-            return {
+            result = {
                 "success": True,
                 "post_text": post_text,
                 "stats": stats,
                 "style": style,
                 "ready_to_publish": True
             }
+            if verdict.redactions:
+                result["policy_redactions"] = verdict.redactions
+            
+            # The model can still introduce a link or term the policy rejects
+            output_verdict = self.policy.check(post_text)
+            if not output_verdict.allowed:
+                result["ready_to_publish"] = False
+                result["policy_violations"] = output_verdict.violations
+            
+            if not record:
+                return result
+            
+            # Flag drafts that are close to something already published; drafts are not
+            # indexed, so repeated drafting neither grows the index nor matches itself
+            with profile_phase("dedup"):
+                near_duplicates = self._find_near_duplicates(post_text, kinds=["published"])
+                if near_duplicates:
+                    result["near_duplicates"] = near_duplicates
+            if self.history is not None:
+                self.history.record(
+                    "created",
+                    input_text=text,
+                    post_text=post_text,
+                    style=style,
+                    provider=provider,
+                    latency_ms=latency_ms,
+                    stats=stats
+                )
+            
+            return result
             
         except Exception as e:
             return {
@@ -76,52 +224,235 @@ class XPostService:
                 "error": f"Failed to create post: {str(e)}"
             }
     
+    def _post_stats(self, post_text: str) -> Dict[str, Any]:
+        """Character, weighted length, hashtag, emoji and URL counts of a post."""
+        return {
+            "character_count": len(post_text),
+            "weighted_length": weighted_length(post_text),
+            "hashtag_count": len(re.findall(r'#\w+', post_text)),
+            "emoji_count": len(re.findall(r'[\U0001F300-\U0001F9FF]', post_text)),
+            "url_count": len(re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', post_text))
+        }
+    
+    def _create_multilingual_post(
+        self,
+        text: str,
+        style: str,
+        include_hashtags: bool,
+        max_length: int,
+        languages: List[str],
+        redactions: List[Dict[str, str]],
+        record: bool = True
+    ) -> Dict[str, Any]:
+        """create_post for several languages at once; see create_post."""
+        languages = list(dict.fromkeys(lang.strip() for lang in languages))
+        invalid = [lang for lang in languages if not LANGUAGE_CODE.fullmatch(lang)]
+        if invalid:
+            return {"success": False, "error": f"Invalid language codes: {', '.join(invalid)}"}
+        if len(languages) > MAX_LANGUAGES:
+            return {"success": False, "error": f"At most {MAX_LANGUAGES} languages per request."}
+        if not (self._has_anthropic or self._has_openai):
+            return {
+                "success": False,
+                "error": "Multi-language posts need an LLM. Set ANTHROPIC_API_KEY or OPENAI_API_KEY."
+            }
+        
+        tier = self.usage.tier()
+        if tier != "full":
+            self.usage.record_degraded(tier)
+            logger.info("LLM budget at tier %s for caller %s", tier, current_caller())
+        if tier == "simple":
+            return {
+                "success": False,
+                "error": "LLM budget exhausted. Multi-language posts need an LLM; try again when the budget window rolls over."
+            }
+        
+        try:
+            started = time.perf_counter()
+            with profile_phase("generate"):
+                key = (*self._generation_key(text, style, include_hashtags, max_length), tier, tuple(languages))
+                generated = self._inflight_generations.do(
+                    key,
+                    lambda: self._generate_multilingual(text, style, include_hashtags, max_length, languages, tier)
+                )
+            latency_ms = (time.perf_counter() - started) * 1000
+        except Exception as e:
+            return {"success": False, "error": f"Failed to create posts: {str(e)}"}
+        check_cancelled()
+        
+        posts = {}
+        for language in languages:
+            post_text = generated["posts"][language]
+            with profile_phase("stats"):
+                stats = self._post_stats(post_text)
+            post = {"post_text": post_text, "stats": stats, "ready_to_publish": True}
+            output_verdict = self.policy.check(post_text)
+            if not output_verdict.allowed:
+                post["ready_to_publish"] = False
+                post["policy_violations"] = output_verdict.violations
+            posts[language] = post
+            if not record:
+                continue
+            with profile_phase("dedup"):
+                near_duplicates = self._find_near_duplicates(post_text, kinds=["published"])
+                if near_duplicates:
+                    post["near_duplicates"] = near_duplicates
+            if self.history is not None:
+                self.history.record(
+                    "created",
+                    input_text=text,
+                    post_text=post_text,
+                    style=style,
+                    provider=generated["provider"],
+                    latency_ms=latency_ms,
+                    stats=stats
+                )
+        
+        result = {
+            "success": True,
+            "posts": posts,
+            "style": style,
+            "llm_calls": generated["llm_calls"],
+            "repaired": generated["repaired"],
+            "truncated": generated["truncated"]
+        }
+        if redactions:
+            result["policy_redactions"] = redactions
+        return result
+    
+    def _generate_multilingual(
+        self,
+        text: str,
+        style: str,
+        include_hashtags: bool,
+        max_length: int,
+        languages: List[str],
+        tier: str
+    ) -> Dict[str, Any]:
+        """
+        Write the post in every language with one LLM request.
+        
+        Posts over their X-weighted length limit (or missing from the response)
+        are repaired together in a second request; whatever still does not fit
+        is truncated.
+        
+        Returns:
+            Dictionary with "posts" (language -> text), "provider", "llm_calls",
+            and the "repaired" and "truncated" languages
+        """
+        with profile_phase("build_prompt"):
+            prompt = self._build_multilingual_prompt(text, style, include_hashtags, max_length, languages)
+        raw, provider = self._complete_json(prompt, tier, TOKENS_PER_LANGUAGE * len(languages))
+        posts = self._parse_language_posts(raw, languages)
+        llm_calls = 1
+        
+        failed = [lang for lang in languages if lang not in posts or weighted_length(posts[lang]) > max_length]
+        repaired: List[str] = []
+        if failed:
+            check_cancelled()
+            with profile_phase("build_prompt"):
+                prompt = self._build_repair_prompt(text, max_length, {lang: posts.get(lang) for lang in failed})
+            try:
+                raw, provider = self._complete_json(prompt, tier, TOKENS_PER_LANGUAGE * len(failed))
+                llm_calls += 1
+                fixes = self._parse_language_posts(raw, failed)
+                posts.update(fixes)
+                repaired = [lang for lang in failed if lang in fixes]
+            except Exception as e:
+                logger.warning("Repairing %s failed: %s", ", ".join(failed), e)
+                check_cancelled()
+        
+        missing = [lang for lang in languages if lang not in posts]
+        if missing:
+            raise Exception(f"No post generated for: {', '.join(missing)}")
+        
+        truncated = []
+        for lang in languages:
+            if weighted_length(posts[lang]) > max_length:
+                with profile_phase("truncate"):
+                    posts[lang] = truncate_weighted(posts[lang], max_length)
+                truncated.append(lang)
+        
+        return {
+            "posts": {lang: posts[lang] for lang in languages},
+            "provider": provider,
+            "llm_calls": llm_calls,
+            "repaired": repaired,
+            "truncated": truncated
+        }
+    
     def _generate_post_text(
         self,
         text: str,
         style: str,
         include_hashtags: bool,
         max_length: int
-    ) -> str:
+    ) -> Tuple[str, str]:
         """
         Generate post text based on input and style.
         Uses LLM API if available, falls back to simple formatting.
+        
+        Returns:
+            Tuple of (post text, provider that generated it)
         """
-        # Try to use LLM API for better results
-        if self._has_anthropic or self._has_openai:
+        # Try to use LLM API for better results, within the usage budget
+        tier = self.usage.tier() if self._has_anthropic or self._has_openai else "simple"
+        if tier != "full" and (self._has_anthropic or self._has_openai):
+            self.usage.record_degraded(tier)
+            logger.info("LLM budget at tier %s for caller %s", tier, current_caller())
+        if tier != "simple":
             try:
-                return self._generate_with_llm(text, style, include_hashtags, max_length)
+                key = (*self._generation_key(text, style, include_hashtags, max_length), tier)
+                return self._inflight_generations.do(
+                    key,
+                    lambda: self._generate_with_llm(text, style, include_hashtags, max_length, tier)
+                )
             except Exception as e:
                 # Fall back to simple method if LLM fails
-                print(f"LLM generation failed, using simple method: {str(e)}")
+                logger.warning("LLM generation failed, using simple method: %s", e)
+                check_cancelled()
         
         # Fallback: simple method
-        return self._generate_simple(text, style, include_hashtags, max_length)
+        return self._generate_simple(text, style, include_hashtags, max_length), "simple"
     
-    def _generate_with_llm(
+    def _generation_key(
         self,
         text: str,
         style: str,
         include_hashtags: bool,
         max_length: int
-    ) -> str:
-        """Generate post using LLM API (OpenAI or Anthropic)."""
+    ) -> tuple:
+        """Normalize a request so trivially different duplicates coalesce."""
+        return (" ".join(text.split()), style, bool(include_hashtags), int(max_length))
+    
+    def _generate_with_llm(
+        self,
+        text: str,
+        style: str,
+        include_hashtags: bool,
+        max_length: int,
+        tier: str = "full"
+    ) -> Tuple[str, str]:
+        """Generate post using LLM API (OpenAI or Anthropic). Returns (post text, provider)."""
         
         # Create the prompt
-        prompt = self._build_llm_prompt(text, style, include_hashtags, max_length)
+        with profile_phase("build_prompt"):
+            prompt = self._build_llm_prompt(text, style, include_hashtags, max_length)
         
         # Try Anthropic first (Claude is generally better at creative writing)
         if self._has_anthropic:
             try:
-                return self._generate_with_anthropic(prompt, max_length)
+                model = self.usage.model_for("anthropic", tier)
+                return self._generate_with_anthropic(prompt, max_length, model), "anthropic"
             except Exception as e:
                 if not self._has_openai:
                     raise e
+                check_cancelled()
                 # Fall through to OpenAI
         
         # Try OpenAI
         if self._has_openai:
-            return self._generate_with_openai(prompt, max_length)
+            return self._generate_with_openai(prompt, max_length, self.usage.model_for("openai", tier)), "openai"
         
         raise Exception("No LLM API available")
     
@@ -134,14 +465,7 @@ class XPostService:
     ) -> str:
         """Build the prompt for LLM post generation."""
         
-        style_descriptions = {
-            "professional": "professional, polished, and business-focused. Use appropriate business language and maintain credibility.",
-            "casual": "friendly, conversational, and approachable. Use a relaxed tone like talking to a friend.",
-            "witty": "clever, humorous, and entertaining. Be creative and add personality.",
-            "inspirational": "motivational, uplifting, and encouraging. Inspire and energize the reader."
-        }
-        
-        style_desc = style_descriptions.get(style, "engaging and authentic")
+        style_desc = self.styles.get(style).description
         
         hashtag_instruction = ""
         if include_hashtags:
@@ -164,50 +488,163 @@ OUTPUT ONLY THE POST TEXT, nothing else. No quotes, no explanations."""
 
         return prompt
     
-    def _generate_with_anthropic(self, prompt: str, max_length: int) -> str:
-        """Generate post using Anthropic Claude API."""
-        if self._anthropic_client is None:
-            try:
-                from anthropic import Anthropic
-                self._anthropic_client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
-            except ImportError:
-                raise ImportError("anthropic package not installed. Run: pip install anthropic")
+    def _build_multilingual_prompt(
+        self,
+        text: str,
+        style: str,
+        include_hashtags: bool,
+        max_length: int,
+        languages: List[str]
+    ) -> str:
+        """Build the prompt asking for the post in every language as one JSON object."""
         
-        response = self._anthropic_client.messages.create(
-            model="claude-3-5-sonnet-20241022",
-            max_tokens=300,
-            temperature=0.7,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
+        style_desc = self.styles.get(style).description
         
-        post_text = response.content[0].text.strip()
+        hashtag_instruction = ""
+        if include_hashtags:
+            hashtag_instruction = "\n- Add 2-3 relevant hashtags at the end of each post (on a new line)"
         
-        # Remove quotes if the model added them
-        if post_text.startswith('"') and post_text.endswith('"'):
-            post_text = post_text[1:-1]
-        if post_text.startswith("'") and post_text.endswith("'"):
-            post_text = post_text[1:-1]
+        example = ", ".join(f'"{lang}": "..."' for lang in languages)
+        return f"""Transform the following text into an attractive X/Twitter post in each of these languages: {", ".join(languages)}.
+
+INPUT TEXT:
+{text}
+
+REQUIREMENTS:
+- Style: {style_desc}
+- Write each post natively in its language, not as a word-for-word translation
+- Maximum length per post: {max_length} as X counts it (strict limit!). X counts Chinese,
+  Japanese and Korean characters and emojis as 2, and every link as 23
+- Make it engaging and likely to get interaction
+- Use emojis strategically to add visual appeal (1-2 relevant emojis)
+- Keep it concise and punchy
+- Ensure perfect grammar and spelling{hashtag_instruction}
+
+OUTPUT ONLY A JSON OBJECT mapping each language code to its post text: {{{example}}}"""
+    
+    def _build_repair_prompt(self, text: str, max_length: int, failed: Dict[str, Optional[str]]) -> str:
+        """Build the prompt to rewrite posts that were too long (or missing)."""
         
-        # Ensure we don't exceed max length
-        if len(post_text) > max_length:
-            post_text = self._smart_truncate(post_text, max_length)
+        lines = []
+        for lang, post_text in failed.items():
+            if post_text is None:
+                lines.append(f"- {lang}: missing, write it from the input text")
+            else:
+                lines.append(f"- {lang} (currently {weighted_length(post_text)}): {json.dumps(post_text, ensure_ascii=False)}")
+        example = ", ".join(f'"{lang}": "..."' for lang in failed)
+        return f"""These X/Twitter posts must each fit within {max_length} as X counts it. X counts Chinese,
+Japanese and Korean characters and emojis as 2, and every link as 23. Rewrite them to fit,
+keeping their language, meaning, tone, emojis and hashtags where possible.
+
+INPUT TEXT:
+{text}
+
+POSTS:
+{chr(10).join(lines)}
+
+OUTPUT ONLY A JSON OBJECT mapping each language code to its rewritten post text: {{{example}}}"""
+    
+    def _parse_language_posts(self, raw: str, languages: List[str]) -> Dict[str, str]:
+        """Posts per language from a JSON completion; unparseable or missing languages are left out."""
+        match = re.search(r"\{.*\}", raw, re.DOTALL)
+        try:
+            data = json.loads(match.group(0)) if match else None
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            logger.warning("LLM returned no JSON object for languages %s", ", ".join(languages))
+            return {}
+        by_code = {str(code).lower(): value for code, value in data.items()}
+        posts = {}
+        for lang in languages:
+            value = by_code.get(lang.lower())
+            if isinstance(value, str) and value.strip():
+                posts[lang] = self._clean_post_text(value)
+        return posts
+    
+    def _complete_json(self, prompt: str, tier: str, max_tokens: int) -> Tuple[str, str]:
+        """JSON completion from the first working LLM provider. Returns (raw text, provider)."""
+        max_tokens = min(max_tokens, 4096)
+        if self._has_anthropic:
+            try:
+                model = self.usage.model_for("anthropic", tier)
+                return self._complete_with_anthropic(prompt, model, max_tokens, prefill="{"), "anthropic"
+            except Exception as e:
+                if not self._has_openai:
+                    raise e
+                check_cancelled()
         
-        return post_text
+        if self._has_openai:
+            model = self.usage.model_for("openai", tier)
+            return self._complete_with_openai(prompt, model, max_tokens, json_mode=True), "openai"
+        
+        raise Exception("No LLM API available")
+    
+    def _generate_with_anthropic(self, prompt: str, max_length: int, model: Optional[str] = None) -> str:
+        """Generate post using Anthropic Claude API."""
+        return self._clean_post_text(self._complete_with_anthropic(prompt, model), max_length)
+    
+    def _complete_with_anthropic(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        max_tokens: int = 300,
+        prefill: str = ""
+    ) -> str:
+        """Raw completion from Anthropic Claude API; prefill starts the assistant's reply."""
+        model = model or self.usage.model_for("anthropic", "full")
+        client = self._get_client("anthropic")
+        
+        with profile_phase("rate_limit_wait"):
+            self.rate_governor.acquire("anthropic:messages", tokens=self._estimate_tokens(prompt, max_tokens))
+        messages = [{
+            "role": "user",
+            "content": prompt
+        }]
+        if prefill:
+            messages.append({"role": "assistant", "content": prefill})
+        request = dict(
+            model=model,
+            max_tokens=max_tokens,
+            temperature=0.7,
+            messages=messages
+        )
+        try:
+            with profile_phase("provider_call:anthropic"):
+                headers, response = call_provider(
+                    lambda: _parse_raw(client.messages.with_raw_response.create(**request)),
+                    lambda: _parse_raw_async(
+                        self._get_async_client("anthropic").messages.with_raw_response.create(**request)
+                    )
+                )
+        except Exception as e:
+            self.rate_governor.record_error("anthropic:messages", e)
+            raise
+        self.rate_governor.update_from_headers("anthropic:messages", headers)
+        if getattr(response, "usage", None) is not None:
+            self.usage.record("anthropic", model, response.usage.input_tokens, response.usage.output_tokens)
+        
+        return prefill + response.content[0].text
     
-    def _generate_with_openai(self, prompt: str, max_length: int) -> str:
+    def _generate_with_openai(self, prompt: str, max_length: int, model: Optional[str] = None) -> str:
         """Generate post using OpenAI API."""
-        if self._openai_client is None:
-            try:
-                from openai import OpenAI
-                self._openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-            except ImportError:
-                raise ImportError("openai package not installed. Run: pip install openai")
+        return self._clean_post_text(self._complete_with_openai(prompt, model), max_length)
+    
+    def _complete_with_openai(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        max_tokens: int = 300,
+        json_mode: bool = False
+    ) -> str:
+        """Raw completion from OpenAI API; json_mode constrains the reply to a JSON object."""
+        model = model or self.usage.model_for("openai", "full")
+        client = self._get_client("openai")
         
-        response = self._openai_client.chat.completions.create(
-            model="gpt-4o",
+        with profile_phase("rate_limit_wait"):
+            self.rate_governor.acquire("openai:chat.completions", tokens=self._estimate_tokens(prompt, max_tokens))
+        request = dict(
+            model=model,
             messages=[{
                 "role": "system",
                 "content": "You are an expert social media manager who creates engaging X/Twitter posts. You always follow character limits strictly and create compelling, authentic content."
@@ -216,10 +653,30 @@ OUTPUT ONLY THE POST TEXT, nothing else. No quotes, no explanations."""
                 "content": prompt
             }],
             temperature=0.7,
-            max_tokens=300
+            max_tokens=max_tokens
         )
+        if json_mode:
+            request["response_format"] = {"type": "json_object"}
+        try:
+            with profile_phase("provider_call:openai"):
+                headers, response = call_provider(
+                    lambda: _parse_raw(client.chat.completions.with_raw_response.create(**request)),
+                    lambda: _parse_raw_async(
+                        self._get_async_client("openai").chat.completions.with_raw_response.create(**request)
+                    )
+                )
+        except Exception as e:
+            self.rate_governor.record_error("openai:chat.completions", e)
+            raise
+        self.rate_governor.update_from_headers("openai:chat.completions", headers)
+        if getattr(response, "usage", None) is not None:
+            self.usage.record("openai", model, response.usage.prompt_tokens, response.usage.completion_tokens)
         
-        post_text = response.choices[0].message.content.strip()
+        return response.choices[0].message.content
+    
+    def _clean_post_text(self, post_text: str, max_length: Optional[int] = None) -> str:
+        """Strip whitespace and quotes the model added, and truncate to max_length if given."""
+        post_text = post_text.strip()
         
         # Remove quotes if the model added them
         if post_text.startswith('"') and post_text.endswith('"'):
@@ -228,11 +685,67 @@ OUTPUT ONLY THE POST TEXT, nothing else. No quotes, no explanations."""
             post_text = post_text[1:-1]
         
         # Ensure we don't exceed max length
-        if len(post_text) > max_length:
-            post_text = self._smart_truncate(post_text, max_length)
+        if max_length is not None and len(post_text) > max_length:
+            with profile_phase("truncate"):
+                post_text = self._smart_truncate(post_text, max_length)
         
         return post_text
     
+    def _get_client(self, provider: str):
+        """Sync SDK client for provider calls outside MCP requests (lazy loaded)."""
+        if provider == "anthropic":
+            if self._anthropic_client is None:
+                try:
+                    from anthropic import Anthropic
+                    self._anthropic_client = Anthropic(api_key=self._anthropic_api_key)
+                except ImportError:
+                    raise ImportError("anthropic package not installed. Run: pip install anthropic")
+            return self._anthropic_client
+        if self._openai_client is None:
+            try:
+                from openai import OpenAI
+                self._openai_client = OpenAI(api_key=self._openai_api_key)
+            except ImportError:
+                raise ImportError("openai package not installed. Run: pip install openai")
+        return self._openai_client
+    
+    def _get_async_client(self, provider: str):
+        """Async SDK client for cancellable calls inside MCP requests (lazy loaded)."""
+        if provider == "anthropic":
+            if self._anthropic_async_client is None:
+                from anthropic import AsyncAnthropic
+                self._anthropic_async_client = AsyncAnthropic(api_key=self._anthropic_api_key)
+            return self._anthropic_async_client
+        if self._openai_async_client is None:
+            from openai import AsyncOpenAI
+            self._openai_async_client = AsyncOpenAI(api_key=self._openai_api_key)
+        return self._openai_async_client
+    
+    def warm_up(self) -> None:
+        """
+        Create the LLM and X clients this configuration uses.
+        
+        A config reload calls this before swapping the service in, so the
+        first requests on the new config don't pay for client setup.
+        """
+        providers = [name for name, enabled in (("anthropic", self._has_anthropic), ("openai", self._has_openai)) if enabled]
+        for provider in providers:
+            try:
+                self._get_client(provider)
+                self._get_async_client(provider)
+            except ImportError as e:
+                logger.warning("Cannot create %s client: %s", provider, e)
+        for account in self.accounts:
+            if account.configured:
+                try:
+                    account.client()
+                except Exception as e:
+                    logger.warning("Cannot create X client for account %s: %s", account.name, e)
+    
+    def _estimate_tokens(self, prompt: str, max_tokens: int) -> int:
+        """Rough token estimate (prompt at ~4 chars/token plus the completion budget)."""
+        return len(prompt) // 4 + max_tokens
+    
     def _generate_simple(
         self,
         text: str,
@@ -247,13 +760,15 @@ OUTPUT ONLY THE POST TEXT, nothing else. No quotes, no explanations."""
         cleaned_text = text.strip()
         
         # Style-specific formatting
-        formatted_text = self._apply_style(cleaned_text, style)
+        compiled_style = self.styles.get(style)
+        formatted_text = compiled_style.apply(cleaned_text)
         
         # Add hashtags if requested
         if include_hashtags:
-            hashtags = self._extract_hashtags(cleaned_text, style)
-            if hashtags and len(formatted_text) + len(hashtags) + 2 <= max_length:
-                formatted_text = f"{formatted_text}\n\n{hashtags}"
+            hashtags = compiled_style.hashtags(cleaned_text)
+            separator = compiled_style.hashtag_separator
+            if hashtags and len(formatted_text) + len(hashtags) + len(separator) <= max_length:
+                formatted_text = f"{formatted_text}{separator}{hashtags}"
         
         # Ensure we don't exceed max length
         if len(formatted_text) > max_length:
@@ -262,81 +777,6 @@ OUTPUT ONLY THE POST TEXT, nothing else. No quotes, no explanations."""
         
         return formatted_text
     
-    def _apply_style(self, text: str, style: str) -> str:
-        """Apply style-specific formatting to text."""
-        
-        style_emojis = {
-            "professional": "💼",
-            "casual": "✨",
-            "witty": "😄",
-            "inspirational": "🚀"
-        }
-        
-        style_prefixes = {
-            "professional": "",
-            "casual": "Hey! ",
-            "witty": "",
-            "inspirational": "✨ "
-        }
-        
-        emoji = style_emojis.get(style, "")
-        prefix = style_prefixes.get(style, "")
-        
-        # For inspirational style, add emoji at start
-        if style == "inspirational" and not text.startswith(emoji):
-            return f"{prefix}{text} {emoji}"
-        elif style == "professional":
-            return f"{prefix}{text} {emoji}"
-        elif style == "witty":
-            return f"{prefix}{text} {emoji}"
-        else:
-            return f"{prefix}{text}"
-    
-    def _extract_hashtags(self, text: str, style: str) -> str:
-        """Extract or generate relevant hashtags."""
-        # Simple hashtag extraction/generation
-        # In production, use NLP or LLM to generate better hashtags
-        
-        common_hashtags = {
-            "professional": ["#Business", "#Innovation", "#Leadership"],
-            "casual": ["#Life", "#Daily", "#Thoughts"],
-            "witty": ["#Humor", "#Fun", "#LOL"],
-            "inspirational": ["#Motivation", "#Success", "#Growth"]
-        }
-        
-        # Check for keywords that might indicate topics
-        keywords_to_hashtags = {
-            "ai": "#AI",
-            "artificial intelligence": "#ArtificialIntelligence",
-            "tech": "#Tech",
-            "technology": "#Technology",
-            "business": "#Business",
-            "startup": "#Startup",
-            "product": "#Product",
-            "launch": "#Launch",
-            "innovation": "#Innovation",
-            "marketing": "#Marketing",
-            "development": "#Development",
-            "coding": "#Coding",
-            "design": "#Design"
-        }
-        
-        text_lower = text.lower()
-        found_hashtags = []
-        
-        # Extract hashtags based on keywords
-        for keyword, hashtag in keywords_to_hashtags.items():
-            if keyword in text_lower and hashtag not in found_hashtags:
-                found_hashtags.append(hashtag)
-                if len(found_hashtags) >= 2:
-                    break
-        
-        # If no hashtags found, use style defaults
-        if not found_hashtags:
-            found_hashtags = common_hashtags.get(style, ["#Share"])[:2]
-        
-        return " ".join(found_hashtags[:3])
-    
     def _smart_truncate(self, text: str, max_length: int) -> str:
         """Truncate text smartly, preserving word boundaries."""
         if len(text) <= max_length:
@@ -354,16 +794,26 @@ OUTPUT ONLY THE POST TEXT, nothing else. No quotes, no explanations."""
         else:
             return truncated + "..."
     
-    def publish_post(self, post_text: str, confirm: bool = False) -> Dict[str, Any]:
+    def publish_post(
+        self,
+        post_text: str,
+        confirm: bool = False,
+        media_paths: Optional[List[str]] = None,
+        account: Optional[Union[str, List[str]]] = None
+    ) -> Dict[str, Any]:
         """
         Publish a post to X/Twitter.
         
         Args:
             post_text: The text to publish
             confirm: Must be True to actually publish (safety check)
+            media_paths: Optional local image/video files to attach (up to 4 images, or 1 video/GIF)
+            account: Account name, or a list of account names to publish to
+                     concurrently (default: the X_DEFAULT_ACCOUNT account)
             
         Returns:
-            Dictionary with publish status and post URL if successful
+            Dictionary with publish status and post URL if successful. For a list
+            of accounts, "results" holds one such dictionary per account.
         """
         if not confirm:
             return {
@@ -372,89 +822,318 @@ OUTPUT ONLY THE POST TEXT, nothing else. No quotes, no explanations."""
                 "requires_confirmation": True
             }
 
+        # Confirmed text is never altered, so any violation rejects it
+        verdict = self.policy.check(post_text)
+        if not verdict.allowed:
+            return {
+                "success": False,
+                "error": f"Post violates the content policy: {verdict.error}",
+                "policy_violations": verdict.violations
+            }
+
+        media_paths = media_paths or []
+        media_error = self._validate_media_paths(media_paths)
+        if media_error:
+            return {"success": False, "error": media_error}
+
+        fan_out = isinstance(account, (list, tuple))
+        names = list(dict.fromkeys(account)) if fan_out else [account]
+        if not names:
+            return {"success": False, "error": "No accounts given."}
+        try:
+            targets = [self.accounts.get(name) for name in names]
+        except KeyError as e:
+            return {"success": False, "error": e.args[0]}
+
+        # X suppresses duplicates per account, so each account is checked against its own posts
+        near_duplicates = {
+            target.name: self._find_near_duplicates(post_text, kinds=["published"], account=target.name)
+            for target in targets
+        }
+        
+        if not fan_out:
+            return self._publish_to_account(targets[0], post_text, media_paths, near_duplicates[targets[0].name])
+        
+        # Each account has its own client and rate limits, so publish to all of them at once
+        with ThreadPoolExecutor(max_workers=min(len(targets), self.publish_max_parallel)) as pool:
+            futures = [
+                pool.submit(
+                    contextvars.copy_context().run,
+                    self._publish_to_account, target, post_text, media_paths, near_duplicates[target.name]
+                )
+                for target in targets
+            ]
+            results = [future.result() for future in futures]
+        
+        published = sum(1 for r in results if r["success"])
+        result = {
+            "success": published == len(results),
+            "published": published,
+            "failed": len(results) - published,
+            "results": results
+        }
+        if published < len(results):
+            result["error"] = f"Published to {published} of {len(results)} accounts."
+        return result
+    
+    def _publish_to_account(
+        self,
+        account: XAccount,
+        post_text: str,
+        media_paths: List[str],
+        near_duplicates: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Publish an already validated post as one account, unless DEDUP_MODE=block and it repeats one of its posts."""
+        if near_duplicates and self.dedup_mode == "block":
+            closest = near_duplicates[0]
+            return {
+                "success": False,
+                "account": account.name,
+                "error": f"Post is a near-duplicate ({closest['similarity']:.0%} similar) of a post already published as {account.name}. X may suppress it.",
+                "near_duplicates": near_duplicates
+            }
+        
         # Dry-run mode short-circuits real publishing but confirms the call path
         if self.dry_run:
             return {
                 "success": True,
                 "dry_run": True,
+                "account": account.name,
                 "tweet_id": "dry-run",
                 "tweet_url": "",
                 "message": "Dry-run mode enabled (X_PUBLISH_DRY_RUN=true). No tweet was sent, but publish_post was called.",
-                "post_text_echo": post_text
+                "post_text_echo": post_text,
+                "media_paths_echo": media_paths
+            }
+        
+        # Check if credentials are configured
+        if not account.configured:
+            return {
+                "success": False,
+                "account": account.name,
+                "error": "X/Twitter API credentials not configured. Please set up .env file with your API keys.",
+                "requires_setup": True
             }
         
+        started = time.perf_counter()
+        sent = False  # whether create_tweet was called, after which the outcome may be unknown
         try:
-            # Initialize Twitter client if needed
-            if self._twitter_client is None:
-                self._initialize_twitter_client()
+            client = account.client()
             
-            # Check if credentials are configured
-            if not self._has_twitter_credentials():
-                return {
-                    "success": False,
-                    "error": "X/Twitter API credentials not configured. Please set up .env file with your API keys.",
-                    "requires_setup": True
-                }
+            # Upload attachments first; create_tweet only takes media ids
+            with profile_phase("media_upload"):
+                media_ids = account.media_uploader().upload_many(media_paths) if media_paths else None
             
             # Publish the post
-            response = self._twitter_client.create_tweet(text=post_text)
+            with profile_phase("rate_limit_wait"):
+                account.rate_governor.acquire("x:create_tweet")
+            try:
+                sent = True
+                with profile_phase("provider_call:x"):
+                    response = client.create_tweet(text=post_text, media_ids=media_ids)
+            except Exception as e:
+                account.rate_governor.record_error("x:create_tweet", e)
+                raise
             
             # Get the tweet ID and construct URL
             tweet_id = response.data['id']
-            username = self._get_username()
+            username = account.username()
             tweet_url = f"https://x.com/{username}/status/{tweet_id}"
+            self._record_post(post_text, "published", tweet_id=str(tweet_id), account=account.name)
+            if self.history is not None:
+                self.history.record(
+                    "published",
+                    post_text=post_text,
+                    latency_ms=(time.perf_counter() - started) * 1000,
+                    tweet_id=str(tweet_id),
+                    tweet_url=tweet_url,
+                    account=account.name
+                )
             
-            return {
+            result = {
                 "success": True,
+                "account": account.name,
                 "tweet_id": tweet_id,
                 "tweet_url": tweet_url,
+                "media_ids": media_ids or [],
                 "message": f"Successfully published post! View at: {tweet_url}"
             }
+            if near_duplicates:
+                result["near_duplicates"] = near_duplicates
+            return result
             
         except Exception as e:
+            if self.history is not None:
+                self.history.record(
+                    "published",
+                    post_text=post_text,
+                    latency_ms=(time.perf_counter() - started) * 1000,
+                    success=False,
+                    error=str(e),
+                    account=account.name
+                )
+            # Safe to try again if X never received the post, or refused it with 429
+            rate_limited = getattr(getattr(e, "response", None), "status_code", None) == 429
             return {
                 "success": False,
+                "account": account.name,
                 "error": f"Failed to publish post: {str(e)}",
-                "details": "Check your X/Twitter API credentials and permissions."
+                "details": "Check your X/Twitter API credentials and permissions.",
+                "retryable": not sent or rate_limited
             }
     
-    def _has_twitter_credentials(self) -> bool:
-        """Check if Twitter API credentials are configured."""
-        required_vars = [
-            "X_API_KEY",
-            "X_API_SECRET",
-            "X_ACCESS_TOKEN",
-            "X_ACCESS_TOKEN_SECRET"
-        ]
-        return all(os.getenv(var) for var in required_vars)
-    
-    def _initialize_twitter_client(self):
-        """Initialize the Twitter API client."""
-        try:
-            import tweepy
+    def get_post_metrics(
+        self,
+        tweet_ids: List[str],
+        max_age: Optional[float] = None,
+        account: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Get engagement metrics for published tweets.
+        
+        Cached metrics younger than max_age are served from the history store;
+        the rest are fetched in batches of up to 100 ids, concurrently and
+        within the X rate limits, and cached.
+        
+        Args:
+            tweet_ids: Tweet ids to look up
+            max_age: Accept cached metrics up to this many seconds old (default: X_METRICS_TTL)
+            account: Account whose credentials and rate limits are used for lookups
             
-            api_key = os.getenv("X_API_KEY")
-            api_secret = os.getenv("X_API_SECRET")
-            access_token = os.getenv("X_ACCESS_TOKEN")
-            access_token_secret = os.getenv("X_ACCESS_TOKEN_SECRET")
+        Returns:
+            Dictionary with metrics per tweet id, ids that were not found, and
+            how many were served from cache versus fetched
+        """
+        ids = list(dict.fromkeys(str(tweet_id).strip() for tweet_id in tweet_ids))
+        invalid = [tweet_id for tweet_id in ids if not tweet_id.isdigit()]
+        if invalid:
+            return {"success": False, "error": f"Invalid tweet ids: {', '.join(invalid[:10])}"}
+        max_age = self.metrics_ttl if max_age is None else max_age
+        
+        metrics = self.history.get_metrics(ids, max_age) if self.history is not None and max_age > 0 else {}
+        cached = len(metrics)
+        missing = [tweet_id for tweet_id in ids if tweet_id not in metrics]
+        batches = [missing[i:i + METRICS_BATCH_SIZE] for i in range(0, len(missing), METRICS_BATCH_SIZE)]
+        errors: List[str] = []
+        
+        if batches:
+            try:
+                lookup_account = self.accounts.get(account)
+            except KeyError as e:
+                return {"success": False, "error": e.args[0]}
+            if not lookup_account.configured:
+                return {
+                    "success": False,
+                    "error": "X/Twitter API credentials not configured. Please set up .env file with your API keys.",
+                    "requires_setup": True
+                }
             
-            # Create client
-            self._twitter_client = tweepy.Client(
-                consumer_key=api_key,
-                consumer_secret=api_secret,
-                access_token=access_token,
-                access_token_secret=access_token_secret
-            )
+            fetched: Dict[str, Dict[str, Any]] = {}
+            with ThreadPoolExecutor(max_workers=min(len(batches), self.metrics_max_parallel)) as pool:
+                # Copy the context per batch so profiling and log context follow into the pool
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self._fetch_metrics_batch, lookup_account, batch)
+                    for batch in batches
+                ]
+                for batch, future in zip(batches, futures):
+                    try:
+                        batch_metrics = future.result()
+                    except Exception as e:
+                        logger.warning("Metrics lookup for %s tweets failed: %s", len(batch), e)
+                        errors.append(str(e))
+                        continue
+                    # Deleted or private tweets are cached too, so polling them stays free
+                    fetched.update({tweet_id: batch_metrics.get(tweet_id, {"not_found": True}) for tweet_id in batch})
             
-        except ImportError:
-            raise ImportError("tweepy is not installed. Run: pip install tweepy")
-        except Exception as e:
-            raise Exception(f"Failed to initialize Twitter client: {str(e)}")
+            if errors and not fetched and not metrics:
+                return {"success": False, "error": f"Failed to fetch metrics: {errors[0]}"}
+            now = time.time()
+            if fetched and self.history is not None:
+                self.history.store_metrics(fetched, fetched_at=now)
+            metrics.update({tweet_id: dict(values, fetched_at=now) for tweet_id, values in fetched.items()})
+        
+        result = {
+            "success": True,
+            "metrics": {
+                tweet_id: metrics[tweet_id] for tweet_id in ids
+                if tweet_id in metrics and not metrics[tweet_id].get("not_found")
+            },
+            "not_found": [tweet_id for tweet_id in ids if metrics.get(tweet_id, {}).get("not_found")],
+            "cached": cached,
+            "fetched": len(metrics) - cached,
+            "api_calls": len(batches)
+        }
+        if errors:
+            result["errors"] = errors
+        return result
     
-    def _get_username(self) -> str:
-        """Get the authenticated user's username."""
+    def _fetch_metrics_batch(self, account: XAccount, tweet_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch public metrics for up to 100 tweets in one lookup request."""
+        with profile_phase("rate_limit_wait"):
+            account.rate_governor.acquire("x:tweets_lookup")
         try:
-            user = self._twitter_client.get_me()
-            return user.data.username
-        except:
-            return "user"  # Fallback
+            with profile_phase("provider_call:x"):
+                response = account.client().get_tweets(
+                    ids=tweet_ids,
+                    tweet_fields=["public_metrics", "created_at"],
+                    user_auth=True
+                )
+        except Exception as e:
+            account.rate_governor.record_error("x:tweets_lookup", e)
+            raise
+        
+        metrics = {}
+        for tweet in response.data or []:
+            entry = dict(tweet.public_metrics or {})
+            if tweet.created_at is not None:
+                entry["created_at"] = tweet.created_at.isoformat()
+            metrics[str(tweet.id)] = entry
+        return metrics
+    
+    def _get_dedup_index(self):
+        """Get the near-duplicate index (lazy loaded), or None if DEDUP_MODE=off."""
+        if self.dedup_mode == "off":
+            return None
+        if self._dedup_index is None:
+            self._dedup_index = get_dedup_index(self.dedup_path)
+        return self._dedup_index
+    
+    def _find_near_duplicates(
+        self,
+        post_text: str,
+        kinds: Optional[List[str]] = None,
+        account: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Return up to 3 indexed posts similar to post_text (only those published as `account`, if given)."""
+        index = self._get_dedup_index()
+        if index is None:
+            return []
+        fields = ("kind", "similarity", "text", "tweet_id", "account", "created_at")
+        where = {"account": account} if account else None
+        return [
+            {key: match[key] for key in fields if key in match}
+            for match in index.query(post_text, kinds=kinds, where=where)[:3]
+        ]
+    
+    def _record_post(self, post_text: str, kind: str, **metadata: Any) -> None:
+        """Add a published post to the near-duplicate index."""
+        index = self._get_dedup_index()
+        if index is not None:
+            index.add(post_text, kind, **metadata)
+    
+    def _validate_media_paths(self, media_paths: List[str]) -> Optional[str]:
+        """Check attachments against X's limits. Returns an error message, or None if valid."""
+        if not media_paths:
+            return None
+        
+        for path in media_paths:
+            if not os.path.isfile(path):
+                return f"Media file not found: {path}"
+        
+        media_types = [mimetypes.guess_type(path)[0] or "" for path in media_paths]
+        has_video = any(t.startswith("video/") or t == "image/gif" for t in media_types)
+        if has_video and len(media_paths) > 1:
+            return "A post can include only one video or GIF, with no other media."
+        if len(media_paths) > 4:
+            return "A post can include at most 4 images."
+        return None
@@ -0,0 +1,101 @@
+"""
+Test the multi-account pool and fan-out publishing.
+"""
+
+import sys
+import os
+import json
+import time
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.accounts import AccountConfigError, AccountPool
+from egile_mcp_x_post_creator.x_service import XPostService
+
+
+class FakeTwitterClient:
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+        self.calls = []
+
+    def create_tweet(self, **kwargs):
+        time.sleep(0.2)
+        if self.fail:
+            raise Exception("403 Forbidden")
+        self.calls.append(kwargs)
+        return type("Response", (), {"data": {"id": f"{self.name}-1"}})()
+
+    def get_me(self):
+        return type("Response", (), {"data": type("User", (), {"username": self.name})()})()
+
+
+def write_accounts(tmp_path, names):
+    path = tmp_path / "accounts.json"
+    credentials = {
+        "consumer_key": "k", "consumer_secret": "s", "access_token": "t", "access_token_secret": "ts"
+    }
+    path.write_text(json.dumps({"accounts": {name: credentials for name in names}}))
+    return str(path)
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setenv("X_ACCOUNTS_FILE", write_accounts(tmp_path, ["acme", "globex", "initech"]))
+    monkeypatch.setenv("X_PUBLISH_DRY_RUN", "false")
+    monkeypatch.setenv("DEDUP_MODE", "off")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")
+    service = XPostService()
+    for account in service.accounts:
+        account._client = FakeTwitterClient(account.name, fail=account.name == "initech")
+    return service
+
+
+def test_publish_fans_out_concurrently_with_per_account_results(service):
+    started = time.perf_counter()
+    result = service.publish_post("Launch day!", confirm=True, account=["acme", "globex", "initech"])
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5  # three 0.2s calls ran in parallel
+    assert not result["success"]
+    assert (result["published"], result["failed"]) == (2, 1)
+    by_account = {entry["account"]: entry for entry in result["results"]}
+    assert by_account["acme"]["tweet_url"] == "https://x.com/acme/status/acme-1"
+    assert by_account["globex"]["success"]
+    assert "403" in by_account["initech"]["error"]
+    assert not by_account["initech"]["retryable"]  # X saw the post, so don't retry it
+
+    # Each account has its own rate-limit state
+    assert service.accounts.get("acme").rate_governor is not service.accounts.get("globex").rate_governor
+    assert service.accounts.get("acme").rate_governor.snapshot()["x:create_tweet"]["calls"] == 1
+
+
+def test_single_account_and_unknown_accounts(service):
+    result = service.publish_post("Hello", confirm=True, account="globex")
+    assert result["success"] and result["account"] == "globex"
+    assert "results" not in result
+
+    result = service.publish_post("Hello", confirm=True, account=["acme", "nope"])
+    assert not result["success"]
+    assert "Unknown account 'nope'" in result["error"]
+    assert service.accounts.get("acme")._client.calls == []
+
+
+def test_rate_limited_publish_is_retryable(service):
+    acme = service.accounts.get("acme")
+    acme.rate_governor.update_from_headers("x:create_tweet", {
+        "x-rate-limit-limit": "300", "x-rate-limit-remaining": "0", "x-rate-limit-reset": str(int(time.time()) + 900),
+    })
+    result = service.publish_post("Hello", confirm=True, account="acme")
+    assert not result["success"] and result["retryable"]
+    assert acme._client.calls == []
+
+
+def test_incomplete_accounts_file_is_rejected(tmp_path):
+    path = tmp_path / "accounts.json"
+    path.write_text(json.dumps({"accounts": {"acme": {"consumer_key": "k"}}}))
+    with pytest.raises(AccountConfigError, match="missing consumer_secret"):
+        AccountPool(str(path))
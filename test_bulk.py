@@ -0,0 +1,140 @@
+"""
+Test resumable bulk generation.
+"""
+
+import sys
+import os
+import json
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.bulk import BulkGenerator
+from egile_mcp_x_post_creator.x_service import XPostService
+
+
+class Crash(BaseException):
+    """Stands in for the process dying mid-run."""
+
+
+class FakeService:
+    def __init__(self, crash_on=None, fail_on=None):
+        self.crash_on = crash_on
+        self.fail_on = fail_on
+        self.calls = []
+
+    def create_post(self, text, style, include_hashtags, max_length, record=True):
+        assert not record
+        if text == self.crash_on:
+            raise Crash()
+        if text == self.fail_on:
+            raise RuntimeError("provider exploded")
+        self.calls.append(text)
+        return {"success": True, "post": text.upper()[:max_length]}
+
+
+def read_records(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def make_generator(tmp_path, service, **kwargs):
+    kwargs.setdefault("concurrency", 1)
+    return BulkGenerator(
+        str(tmp_path / "input.jsonl"), str(tmp_path / "output.jsonl"),
+        service=service, progress_stream=None, checkpoint_interval=0, **kwargs
+    )
+
+
+def test_bad_rows_become_failed_records(tmp_path):
+    (tmp_path / "input.jsonl").write_text("\n".join([
+        json.dumps({"id": "a", "text": "first"}),
+        "{not json",
+        "[1, 2]",
+        json.dumps({"id": "d", "text": "fourth", "max_length": "long"}),
+        json.dumps({"id": "e", "text": "boom"}),
+        json.dumps({"id": "f"}),
+        json.dumps({"id": "g", "text": "last", "max_length": 3}),
+    ]) + "\n")
+    service = FakeService(fail_on="boom")
+
+    summary = make_generator(tmp_path, service, concurrency=4).run()
+
+    assert summary["processed"] == 7 and summary["failed"] == 5
+    records = sorted(read_records(tmp_path / "output.jsonl"), key=lambda r: r["row"])
+    assert [r["row"] for r in records] == list(range(7))
+    assert [r["success"] for r in records] == [True, False, False, False, False, False, True]
+    assert "Invalid JSON" in records[1]["error"] and "not an object" in records[2]["error"]
+    assert records[3] == {"row": 3, "id": "d", "success": False, "error": "Invalid max_length: 'long'"}
+    assert "provider exploded" in records[4]["error"] and "no 'text' field" in records[5]["error"]
+    assert records[6]["post"] == "LAS"
+    assert service.calls == ["first", "last"]
+
+
+def test_csv_rows_with_bad_values(tmp_path):
+    (tmp_path / "input.csv").write_text("text,max_length\nhello,10\nworld,ten\n")
+    generator = BulkGenerator(
+        str(tmp_path / "input.csv"), str(tmp_path / "output.jsonl"),
+        service=FakeService(), progress_stream=None
+    )
+    assert generator.run()["failed"] == 1
+    records = read_records(tmp_path / "output.jsonl")
+    assert [r["success"] for r in records] == [True, False]
+
+
+def test_resume_after_crash_truncates_to_checkpoint(tmp_path):
+    texts = [f"post {i}" for i in range(8)]
+    (tmp_path / "input.jsonl").write_text("".join(json.dumps({"text": t}) + "\n" for t in texts))
+
+    with pytest.raises(Crash):
+        make_generator(tmp_path, FakeService(crash_on="post 5")).run()
+    checkpoint = json.loads((tmp_path / "output.jsonl.checkpoint").read_text())
+    assert 0 < checkpoint["watermark"] <= 5
+    # A torn write after the last checkpoint must not survive the resume
+    with open(tmp_path / "output.jsonl", "ab") as f:
+        f.write(b'{"row": 99, "partial')
+
+    service = FakeService()
+    summary = make_generator(tmp_path, service).run()
+
+    assert summary["resumed_from"] == checkpoint["watermark"]
+    assert service.calls == texts[checkpoint["watermark"]:]  # nothing regenerated
+    records = read_records(tmp_path / "output.jsonl")
+    assert sorted(r["row"] for r in records) == list(range(8))  # each row exactly once
+    assert all(r["success"] for r in records)
+
+    # A finished run resumes to a no-op
+    assert make_generator(tmp_path, FakeService()).run()["processed"] == 0
+
+
+def test_existing_output_without_checkpoint_is_protected(tmp_path):
+    (tmp_path / "input.jsonl").write_text(json.dumps({"text": "hi"}) + "\n")
+    (tmp_path / "output.jsonl").write_text("precious\n")
+    with pytest.raises(ValueError, match="no checkpoint"):
+        make_generator(tmp_path, FakeService()).run()
+    assert make_generator(tmp_path, FakeService(), overwrite=True).run()["processed"] == 1
+    assert [r["row"] for r in read_records(tmp_path / "output.jsonl")] == [0]
+
+
+def test_bulk_leaves_dedup_and_history_untouched(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEDUP_MODE", "flag")
+    monkeypatch.setenv("HISTORY_ENABLED", "true")
+    service = XPostService()
+    service._generate_post_text = lambda text, *args: (text, "simple")
+    (tmp_path / "input.jsonl").write_text("".join(json.dumps({"text": f"post {i}"}) + "\n" for i in range(20)))
+
+    index = service._get_dedup_index()
+    index.add("post 0", "published", tweet_id="1")
+
+    assert make_generator(tmp_path, service, concurrency=4).run()["failed"] == 0
+    service.history.flush()
+    assert service.history.search(limit=100)["records"] == []
+    assert len(index) == 1
+    assert not any("near_duplicates" in r for r in read_records(tmp_path / "output.jsonl"))
+
+    # An interactive draft is still checked and recorded
+    assert service.create_post("post 0")["near_duplicates"][0]["tweet_id"] == "1"
+    service.history.flush()
+    assert len(service.history.search(limit=100)["records"]) == 1
@@ -0,0 +1,80 @@
+"""
+Test that cancelling an MCP request aborts its provider call and frees its slot.
+"""
+
+import sys
+import os
+import time
+from types import SimpleNamespace
+
+import anyio
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.cancellation import run_cancellable
+from egile_mcp_x_post_creator.rate_limit import RateGovernor
+from egile_mcp_x_post_creator.x_service import XPostService
+
+
+class HangingAsyncMessages:
+    """An async provider call that only ends when it is cancelled."""
+
+    def __init__(self):
+        self.started = anyio.Event()
+        self.cancelled = False
+        self.with_raw_response = self
+
+    async def create(self, **kwargs):
+        self.started.set()
+        try:
+            await anyio.sleep(30)
+        except anyio.get_cancelled_exc_class():
+            self.cancelled = True
+            raise
+
+
+async def cancel_after_start(started, target, *args):
+    """Run target in a cancellable worker, cancel once started; return seconds from cancel to release."""
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(run_cancellable, target, *args)
+        await started()
+        cancelled_at = time.perf_counter()
+        tg.cancel_scope.cancel()
+    return time.perf_counter() - cancelled_at
+
+
+def test_cancelled_create_post_aborts_the_provider_call(monkeypatch):
+    monkeypatch.setenv("DEDUP_MODE", "off")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")
+    service = XPostService()
+    service._has_anthropic, service._has_openai = True, False
+    service._anthropic_client = SimpleNamespace()  # the sync client must not be used
+    messages = HangingAsyncMessages()
+    service._anthropic_async_client = SimpleNamespace(messages=messages)
+    simple_calls = []
+    service._generate_simple = lambda *args: simple_calls.append(args) or "fallback"
+
+    released_in = anyio.run(cancel_after_start, messages.started.wait, service.create_post, "Big news")
+
+    assert released_in < 0.05
+    assert messages.cancelled
+    assert service._inflight_generations.in_flight() == 0
+    assert simple_calls == []  # no fallback generated for a response nobody reads
+
+
+def test_cancelled_request_leaves_the_rate_limit_queue(monkeypatch):
+    monkeypatch.setenv("RATE_LIMIT_X_RPM", "1")
+    governor = RateGovernor(max_wait=120)
+    governor.acquire("x:create_tweet")  # the next call would queue for a minute
+
+    async def queued():
+        while not governor.snapshot()["x:create_tweet"]["queued"]:
+            await anyio.sleep(0.001)
+
+    released_in = anyio.run(cancel_after_start, queued, governor.acquire, "x:create_tweet")
+
+    assert released_in < 0.05
+    entry = governor.snapshot()["x:create_tweet"]
+    assert entry["queued"] == 0
+    assert entry["requests_available"] > -0.5  # the queued reservation was handed back
@@ -0,0 +1,159 @@
+"""
+Test hot reloading of the service configuration.
+"""
+
+import sys
+import os
+import json
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator import log_config, policy, rate_limit, styles, usage
+from egile_mcp_x_post_creator.config_reload import ServiceReloader
+
+ENV_KEYS = [
+    "DEFAULT_MAX_LENGTH", "X_PUBLISH_DRY_RUN", "ANTHROPIC_API_KEY", "POLICY_FILE", "STYLE_PACKS", "X_ACCOUNTS_FILE",
+    "LLM_BUDGET_USD", "RATE_LIMIT_ANTHROPIC_RPM", "MCP_LOG_FORMAT", "MCP_LOG_SAMPLE_RATE", "X_MEDIA_CHUNK_SIZE",
+]
+
+
+def write_env(path, **values):
+    path.write_text("".join(f"{key}={value}\n" for key, value in values.items()))
+    # Make sure the change is visible even on filesystems with coarse mtimes
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def make_reloader(monkeypatch, tmp_path, interval=0, **values):
+    monkeypatch.setenv("DEDUP_MODE", "off")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")
+    for key in ENV_KEYS:
+        monkeypatch.delenv(key, raising=False)  # restored after the test
+    env_file = tmp_path / ".env"
+    write_env(env_file, **values)
+    for key, value in values.items():
+        monkeypatch.setenv(key, value)  # as load_dotenv did at startup
+    return env_file, ServiceReloader(env_file=str(env_file), interval=interval)
+
+
+def test_reload_swaps_service_and_keeps_warm_clients(monkeypatch, tmp_path):
+    env_file, reloader = make_reloader(
+        monkeypatch, tmp_path, DEFAULT_MAX_LENGTH="200", X_PUBLISH_DRY_RUN="true", ANTHROPIC_API_KEY="key-1"
+    )
+    in_flight = reloader.current()
+    in_flight.warm_up()
+    warm_client = in_flight._anthropic_async_client
+    default_account = in_flight.accounts.get()
+
+    assert reloader.check() is None  # nothing changed
+    write_env(env_file, DEFAULT_MAX_LENGTH="250", X_PUBLISH_DRY_RUN="true", ANTHROPIC_API_KEY="key-1")
+    result = reloader.check()
+
+    assert result["success"] and result["generation"] == 2 and result["changed_env"] == ["DEFAULT_MAX_LENGTH"]
+    service = reloader.current()
+    assert service is not in_flight
+    assert (in_flight.max_length, service.max_length) == (200, 250)  # in-flight calls keep their config
+    assert service._anthropic_async_client is warm_client
+    assert service.accounts.get() is default_account
+
+    # Rotating the key builds fresh clients before the swap
+    write_env(env_file, DEFAULT_MAX_LENGTH="250", X_PUBLISH_DRY_RUN="true", ANTHROPIC_API_KEY="key-2")
+    reloader.reload()
+    rotated = reloader.current()
+    assert rotated._anthropic_async_client is not None and rotated._anthropic_async_client is not warm_client
+    assert rotated._anthropic_async_client.api_key == "key-2"
+    assert os.environ["ANTHROPIC_API_KEY"] == "key-2"
+
+
+def test_failed_reload_keeps_current_config(monkeypatch, tmp_path):
+    env_file, reloader = make_reloader(monkeypatch, tmp_path, DEFAULT_MAX_LENGTH="200")
+    service = reloader.current()
+    monkeypatch.setenv("X_PUBLISH_DRY_RUN", "true")  # set by the process, not .env
+
+    write_env(env_file, DEFAULT_MAX_LENGTH="not-a-number", X_PUBLISH_DRY_RUN="false")
+    result = reloader.check()
+
+    assert not result["success"] and "not-a-number" in result["error"]
+    assert reloader.current() is service
+    assert os.environ["DEFAULT_MAX_LENGTH"] == "200"
+    assert reloader.check() is None  # not retried until the files change again
+
+    write_env(env_file, DEFAULT_MAX_LENGTH="240", X_PUBLISH_DRY_RUN="false")
+    assert reloader.check()["success"]
+    assert reloader.current().max_length == 240
+    assert reloader.current().dry_run  # the process environment wins over .env
+
+
+def test_watcher_picks_up_changes(monkeypatch, tmp_path):
+    env_file, reloader = make_reloader(monkeypatch, tmp_path, interval=0.02, DEFAULT_MAX_LENGTH="200")
+    reloader.start()
+    try:
+        write_env(env_file, DEFAULT_MAX_LENGTH="220")
+        deadline = time.monotonic() + 5
+        while reloader.generation == 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        reloader.stop()
+    assert reloader.current().max_length == 220
+
+
+def test_reload_reconfigures_shared_state(monkeypatch, tmp_path):
+    # Fresh process-wide state, restored after the test
+    monkeypatch.setattr(usage, "_meter", None)
+    monkeypatch.setattr(rate_limit, "_default_governor", None)
+    monkeypatch.setattr(log_config, "_settings", None)
+    env_file, reloader = make_reloader(monkeypatch, tmp_path, LLM_BUDGET_USD="1", MCP_LOG_FORMAT="json")
+    service = reloader.current()
+    meter, governor = service.usage, service.rate_governor
+    meter.record("anthropic", "claude-3-5-haiku-20241022", 1000, 100, caller="tester")
+    governor.acquire("anthropic:messages")
+
+    write_env(env_file, LLM_BUDGET_USD="5", RATE_LIMIT_ANTHROPIC_RPM="10", MCP_LOG_SAMPLE_RATE="0.5", MCP_LOG_FORMAT="text")
+    result = reloader.check()
+
+    assert result["success"] and result["restart_required"] == ["MCP_LOG_FORMAT"]
+    assert os.environ["MCP_LOG_FORMAT"] == "json"  # only read at startup, so not applied
+    # Same objects, new settings, recorded state kept
+    assert reloader.current().usage is meter and meter.budget_usd == 5.0
+    assert meter.snapshot()["by_caller"]["tester"]["calls"] == 1
+    assert reloader.current().rate_governor is governor
+    assert governor.snapshot()["anthropic:messages"]["requests_per_minute"] == 10.0
+    assert log_config._get_settings()["sample_rate"] == 0.5
+
+    # A bad value anywhere keeps every setting, and the environment, as it was
+    write_env(env_file, LLM_BUDGET_USD="9", RATE_LIMIT_ANTHROPIC_RPM="lots", X_MEDIA_CHUNK_SIZE="1")
+    result = reloader.check()
+    assert not result["success"] and "lots" in result["error"]
+    assert meter.budget_usd == 5.0 and os.environ["LLM_BUDGET_USD"] == "5"
+    assert governor.snapshot()["anthropic:messages"]["requests_per_minute"] == 10.0
+
+
+def test_policy_and_styles_change_only_at_the_swap(monkeypatch, tmp_path):
+    monkeypatch.setattr(policy, "_policy", None)
+    monkeypatch.setattr(styles, "_registries", {})
+    policy_file, pack_file = tmp_path / "policy.json", tmp_path / "pack.json"
+    policy_file.write_text(json.dumps({"blocked_terms": ["alpha"]}))
+    pack_file.write_text(json.dumps({"styles": {"terse": {"template": "{text}"}}}))
+    env_file, reloader = make_reloader(
+        monkeypatch, tmp_path, POLICY_FILE=str(policy_file), STYLE_PACKS=str(pack_file), DEFAULT_MAX_LENGTH="200"
+    )
+    assert policy.get_policy() is reloader.current().policy
+
+    # A reload that fails after building the new service leaves the shared instances alone
+    policy_file.write_text(json.dumps({"blocked_terms": ["beta"]}))
+    pack_file.write_text(json.dumps({"styles": {"chatty": {"template": "{text}"}}}))
+    write_env(
+        env_file, POLICY_FILE=str(policy_file), STYLE_PACKS=str(pack_file),
+        DEFAULT_MAX_LENGTH="200", RATE_LIMIT_ANTHROPIC_RPM="lots"
+    )
+    assert not reloader.check()["success"]
+    assert policy.get_policy().check("beta").allowed and not policy.get_policy().check("alpha").allowed
+    assert "terse" in styles.get_style_registry().names()
+
+    write_env(env_file, POLICY_FILE=str(policy_file), STYLE_PACKS=str(pack_file), DEFAULT_MAX_LENGTH="200")
+    assert reloader.check()["success"]
+    service = reloader.current()
+    assert policy.get_policy() is service.policy and not service.policy.check("beta").allowed
+    assert styles.get_style_registry() is service.styles and "chatty" in service.styles.names()
@@ -0,0 +1,137 @@
+"""
+Test near-duplicate detection.
+"""
+
+import sys
+import os
+import json
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.dedup import NearDuplicateIndex
+from egile_mcp_x_post_creator.x_service import XPostService
+
+POST = "We just shipped dark mode for the dashboard, plus faster exports and a new API for webhooks!"
+EDITED = "We just shipped dark mode for the dashboard, plus faster exports and a new API for webhooks!!"
+UNRELATED = "Join our team: we are hiring backend engineers in Lisbon and Berlin, remote friendly."
+
+
+def test_index_replays_its_log(tmp_path):
+    path = str(tmp_path / "index.jsonl")
+    index = NearDuplicateIndex(path)
+    index.add(POST, "published", tweet_id="1")
+    index.add(UNRELATED, "created")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"kind": "published", "text": "torn')  # crash mid-write
+
+    reopened = NearDuplicateIndex(path)
+    assert len(reopened) == 2
+    matches = reopened.query(EDITED)
+    assert [(m["kind"], m["tweet_id"]) for m in matches] == [("published", "1")]
+    assert reopened.query(EDITED, kinds=["created"]) == []
+
+
+def test_threshold(tmp_path):
+    index = NearDuplicateIndex(":memory:", threshold=0.8)
+    index.add(POST, "published")
+    assert index.query(EDITED)[0]["similarity"] >= 0.8
+    assert index.query("https://example.com  " + POST.upper())  # case, spacing and URLs are ignored
+    assert index.query(UNRELATED) == []
+
+    index.apply_settings({"threshold": 1.0})
+    assert index.query(EDITED) == []
+    assert index.query(POST)[0]["similarity"] == 1.0
+
+
+def test_drafts_are_checked_but_not_indexed(monkeypatch, tmp_path):
+    monkeypatch.setenv("X_PUBLISH_DRY_RUN", "true")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")
+    monkeypatch.setenv("DEDUP_MODE", "flag")
+    monkeypatch.setenv("DEDUP_INDEX_PATH", str(tmp_path / "drafts.jsonl"))
+    service = XPostService()
+    service._generate_post_text = lambda text, *args: (text, "simple")
+    index = service._get_dedup_index()
+
+    for _ in range(3):
+        assert "near_duplicates" not in service.create_post(POST)  # not a duplicate of itself
+    assert len(index) == 0
+
+    index.add(POST, "published", tweet_id="1")
+    assert service.create_post(EDITED)["near_duplicates"][0]["tweet_id"] == "1"
+    assert len(index) == 1
+
+
+def test_block_mode_refuses_near_duplicates(monkeypatch):
+    for var in ("X_API_KEY", "X_API_SECRET", "X_ACCESS_TOKEN", "X_ACCESS_TOKEN_SECRET"):
+        monkeypatch.setenv(var, "test")
+    monkeypatch.setenv("X_PUBLISH_DRY_RUN", "false")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")
+    monkeypatch.setenv("DEDUP_MODE", "block")
+
+    class FakeTwitterClient:
+        def __init__(self):
+            self.calls = []
+
+        def create_tweet(self, **kwargs):
+            self.calls.append(kwargs)
+            return type("Response", (), {"data": {"id": str(len(self.calls))}})()
+
+        def get_me(self):
+            raise Exception("offline")
+
+    service = XPostService()
+    client = service.accounts.get()._client = FakeTwitterClient()
+
+    assert service.publish_post(POST, confirm=True)["success"]
+    result = service.publish_post(EDITED, confirm=True)
+    assert not result["success"] and "near-duplicate" in result["error"]
+    assert result["near_duplicates"][0]["tweet_id"] == "1"
+    assert service.publish_post(UNRELATED, confirm=True)["success"]
+    assert len(client.calls) == 2
+
+    # Flag mode publishes anyway and reports the match
+    monkeypatch.setenv("DEDUP_MODE", "flag")
+    flagging = XPostService()
+    flagging.accounts.get()._client = client
+    result = flagging.publish_post(EDITED, confirm=True)
+    assert result["success"] and result["near_duplicates"][0]["tweet_id"] == "1"
+
+
+def test_duplicates_are_checked_per_account(monkeypatch, tmp_path):
+    credentials = {"consumer_key": "k", "consumer_secret": "s", "access_token": "t", "access_token_secret": "ts"}
+    accounts_file = tmp_path / "accounts.json"
+    accounts_file.write_text(json.dumps({"accounts": {"acme": credentials, "globex": credentials}}))
+    monkeypatch.setenv("X_ACCOUNTS_FILE", str(accounts_file))
+    monkeypatch.setenv("X_PUBLISH_DRY_RUN", "false")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")
+    monkeypatch.setenv("DEDUP_MODE", "block")
+
+    class FakeTwitterClient:
+        def __init__(self, name):
+            self.name = name
+            self.calls = []
+
+        def create_tweet(self, **kwargs):
+            self.calls.append(kwargs)
+            return type("Response", (), {"data": {"id": f"{self.name}-{len(self.calls)}"}})()
+
+        def get_me(self):
+            raise Exception("offline")
+
+    service = XPostService()
+    for account in service.accounts:
+        account._client = FakeTwitterClient(account.name)
+
+    assert service.publish_post(POST, confirm=True, account="acme")["success"]
+    # The same post is new for globex
+    result = service.publish_post(EDITED, confirm=True, account="globex")
+    assert result["success"] and "near_duplicates" not in result
+
+    service.publish_post(UNRELATED, confirm=True, account="acme")
+    result = service.publish_post(UNRELATED + " ", confirm=True, account=["acme", "globex"])
+    acme, globex = result["results"]
+    assert not acme["success"] and "published as acme" in acme["error"]
+    assert acme["near_duplicates"][0]["account"] == "acme"
+    assert globex["success"] and result["published"] == 1
+    assert len(service.accounts.get("acme")._client.calls) == 2
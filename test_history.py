@@ -0,0 +1,92 @@
+"""
+Test the post-history store.
+"""
+
+import sys
+import os
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.history import PostHistory
+
+
+class CountingConnection:
+    """Wraps the writer connection to record the size of each committed batch."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.batches = []
+
+    def executemany(self, sql, rows):
+        rows = list(rows)
+        self.batches.append(len(rows))
+        return self.conn.executemany(sql, rows)
+
+    def __enter__(self):
+        return self.conn.__enter__()
+
+    def __exit__(self, *exc_info):
+        return self.conn.__exit__(*exc_info)
+
+
+def test_writes_are_batched_and_flushed(tmp_path):
+    history = PostHistory(str(tmp_path / "history.db"), batch_size=100, flush_interval=0.3)
+    writer = history._writer_conn = CountingConnection(history._writer_conn)
+
+    for i in range(250):
+        history.record("created", input_text=f"input {i}", post_text=f"post {i}", style="casual")
+    assert history.flush()
+    assert writer.batches == [100, 100, 50]
+    assert history.search(limit=1000)["records"][0]["post_text"] == "post 249"
+
+    history.record("published", post_text="last", tweet_id="7", stats={"characters": 4})
+    history.close()  # commits what is still queued
+    reopened = PostHistory(str(tmp_path / "history.db"))
+    assert reopened.search(tweet_id="7")["records"][0]["stats"] == {"characters": 4}
+    assert len(reopened.search(limit=1000)["records"]) == 251
+
+
+def test_search_pages_by_keyset(tmp_path):
+    history = PostHistory(str(tmp_path / "history.db"), flush_interval=0.01)
+    for i in range(25):
+        history.record("created", post_text=f"post {i}")
+    history.flush()
+
+    first = history.search(limit=10)
+    assert [r["post_text"] for r in first["records"]] == [f"post {i}" for i in range(24, 14, -1)]
+
+    # New posts don't shift later pages, since the cursor is the last id seen
+    history.record("created", post_text="newer")
+    history.flush()
+    seen, cursor = [], first["next_cursor"]
+    while cursor is not None:
+        page = history.search(limit=10, cursor=cursor)
+        seen += [r["post_text"] for r in page["records"]]
+        cursor = page["next_cursor"]
+    assert seen == [f"post {i}" for i in range(14, -1, -1)]
+    assert history.search(limit=25, cursor=first["records"][-1]["id"])["next_cursor"] is None
+
+
+def test_search_filters(tmp_path):
+    history = PostHistory(str(tmp_path / "history.db"), flush_interval=0.01)
+    day = 86400.0
+    history.record("created", input_text="launch plans", post_text="Launch day!", style="casual", created_at=1000 * day)
+    history.record("published", post_text="Launch recap", style="professional", account="acme", created_at=1001 * day)
+    history.record("created", post_text="Hiring", style="professional", success=False, error="boom", created_at=1002 * day)
+    history.flush()
+
+    def texts(**filters):
+        return [r["post_text"] for r in history.search(**filters)["records"]]
+
+    assert texts(style="professional") == ["Hiring", "Launch recap"]
+    assert texts(since=1001 * day) == ["Hiring", "Launch recap"]
+    assert texts(since=1000 * day, until=1001 * day) == ["Launch day!"]  # until is exclusive
+    assert texts(query="launch") == ["Launch recap", "Launch day!"]
+    assert texts(query="plans") == ["Launch day!"]  # input text is searched too
+    assert texts(kind="published", account="acme") == ["Launch recap"]
+    assert texts(style="professional", since=1002 * day) == ["Hiring"]
+
+    record = history.search(style="professional", limit=1)["records"][0]
+    assert record["success"] is False and record["error"] == "boom"
+    assert record["created_at"] == "1972-09-29T00:00:00+00:00"
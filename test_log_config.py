@@ -0,0 +1,72 @@
+"""
+Test non-blocking, sampled logging and log redaction.
+"""
+
+import sys
+import os
+import contextvars
+import json
+import logging
+import queue
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator import log_config
+from egile_mcp_x_post_creator.log_config import (
+    DroppingQueueHandler, JsonFormatter, RequestContextFilter, redact_text, start_request
+)
+
+
+def make_record(level=logging.INFO, **extra):
+    record = logging.LogRecord("test", level, __file__, 1, "hello %s", ("world",), None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = DroppingQueueHandler(queue.Queue(maxsize=2))
+    for _ in range(5):
+        handler.handle(make_record())
+    assert handler.queue.qsize() == 2 and handler.dropped == 3
+
+
+def test_sampling_keeps_warnings_of_unsampled_requests(monkeypatch):
+    log_filter = RequestContextFilter()
+
+    def kept(sample_rate, level):
+        def run():
+            request_id = start_request("create_post", sample_rate=sample_rate)
+            record = make_record(level)
+            return log_filter.filter(record) and record.request_id == request_id and record.tool == "create_post"
+        return contextvars.copy_context().run(run)
+
+    assert kept(1.0, logging.INFO)
+    assert not kept(0.0, logging.INFO)
+    assert kept(0.0, logging.WARNING)
+    assert log_filter.filter(make_record())  # outside a request nothing is filtered
+
+    # The rate comes from MCP_LOG_SAMPLE_RATE by default
+    monkeypatch.setattr(log_config, "_settings", {"sample_rate": 0.0, "text_chars": 40})
+    assert not kept(None, logging.DEBUG)
+
+
+def test_json_formatter_includes_context_and_extra_fields():
+    line = JsonFormatter().format(make_record(request_id="abc", latency_ms=1.5))
+    entry = json.loads(line)
+    assert entry["message"] == "hello world" and entry["level"] == "INFO"
+    assert entry["request_id"] == "abc" and entry["latency_ms"] == 1.5
+
+
+def test_redact_text():
+    assert redact_text(None) == "<none>"
+    assert redact_text("short", max_chars=40) == "short"
+    assert redact_text("x" * 50, max_chars=10) == "xxxxxxxxxx… <50 chars>"
+    assert redact_text("secret plans", max_chars=0) == "<12 chars>"
+
+    # Secrets are masked before truncation, so the kept prefix can't leak them
+    key = "sk-ant-" + "a1B2" * 10
+    for text in [f"key {key}", f"use {key} to deploy the new release tonight please"]:
+        logged = redact_text(text, max_chars=40)
+        assert "a1B2" not in logged and "[anthropic_api_key" in logged
+    assert redact_text(f"AWS AKIA{'A' * 16} rotated", max_chars=40) == "AWS [aws_access_key redacted] rotated"
@@ -0,0 +1,222 @@
+"""
+Test chunked media upload against a local stand-in for X's upload endpoint.
+"""
+
+import sys
+import os
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.media_upload import MediaUploader, MediaUploadError
+from egile_mcp_x_post_creator.x_service import XPostService
+
+CREDENTIALS = {
+    "consumer_key": "key",
+    "consumer_secret": "secret",
+    "access_token": "token",
+    "access_token_secret": "token-secret"
+}
+
+
+class FakeUploadServer(ThreadingHTTPServer):
+    """Minimal INIT/APPEND/FINALIZE/STATUS implementation that reassembles uploads."""
+
+    daemon_threads = True
+
+    def __init__(self, processing_polls=0, fail_segment=None):
+        super().__init__(("127.0.0.1", 0), FakeUploadHandler)
+        self.fail_segment = fail_segment
+        self.lock = threading.Lock()
+        self.media = {}
+        self.commands = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.processing_polls = processing_polls
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/1.1/media/upload.json"
+
+
+class FakeUploadHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, payload=None):
+        body = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        server = self.server
+        media = server.media[params["media_id"]]
+        with server.lock:
+            server.commands.append("STATUS")
+            media["polls"] += 1
+            done = media["polls"] >= server.processing_polls
+        state = "succeeded" if done else "in_progress"
+        self._reply(200, {"media_id_string": params["media_id"],
+                          "processing_info": {"state": state, "check_after_secs": 0}})
+
+    def do_POST(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        server = self.server
+        assert self.headers["Authorization"].startswith("OAuth ")
+        body = self.rfile.read(int(self.headers["Content-Length"] or 0))
+        command = params["command"]
+        with server.lock:
+            server.commands.append(command)
+
+        if command == "INIT":
+            media_id = str(1000 + len(server.media))
+            server.media[media_id] = {
+                "total_bytes": int(params["total_bytes"]),
+                "media_category": params["media_category"],
+                "segments": {},
+                "polls": 0
+            }
+            self._reply(202, {"media_id_string": media_id})
+        elif command == "APPEND":
+            if int(params["segment_index"]) == server.fail_segment:
+                self._reply(400, {"error": "bad segment"})
+                return
+            with server.lock:
+                server.in_flight += 1
+                server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            threading.Event().wait(0.02)  # keep segments overlapping
+            boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+            payload = body.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n--" + boundary + b"--", 1)[0]
+            server.media[params["media_id"]]["segments"][int(params["segment_index"])] = payload
+            with server.lock:
+                server.in_flight -= 1
+            self._reply(204)
+        elif command == "FINALIZE":
+            media = server.media[params["media_id"]]
+            data = b"".join(media["segments"][i] for i in sorted(media["segments"]))
+            if len(data) != media["total_bytes"]:
+                self._reply(400, {"error": "size mismatch"})
+                return
+            media["data"] = data
+            payload = {"media_id_string": params["media_id"]}
+            if media["media_category"] == "tweet_video" and server.processing_polls:
+                payload["processing_info"] = {"state": "pending", "check_after_secs": 0}
+            self._reply(201, payload)
+
+
+@pytest.fixture
+def upload_server():
+    server = FakeUploadServer(processing_polls=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_chunked_parallel_upload(upload_server, tmp_path):
+    """A multi-segment video is reassembled byte-for-byte, with segments uploaded in parallel."""
+    video = tmp_path / "clip.mp4"
+    data = os.urandom(10 * 64 * 1024 + 123)
+    video.write_bytes(data)
+
+    uploader = MediaUploader(CREDENTIALS, upload_url=upload_server.url, chunk_size=64 * 1024, max_parallel=3)
+    media_id = uploader.upload(str(video))
+
+    media = upload_server.media[media_id]
+    assert media["data"] == data
+    assert media["media_category"] == "tweet_video"
+    assert len(media["segments"]) == 11
+    assert 1 < upload_server.max_in_flight <= 3
+    assert upload_server.commands.count("STATUS") == 2
+
+
+def test_upload_errors(upload_server, tmp_path):
+    """Empty files and HTTP errors surface as MediaUploadError."""
+    empty = tmp_path / "empty.png"
+    empty.write_bytes(b"")
+    image = tmp_path / "photo.png"
+    image.write_bytes(b"x" * 10)
+
+    uploader = MediaUploader(CREDENTIALS, upload_url=upload_server.url)
+    with pytest.raises(MediaUploadError):
+        uploader.upload(str(empty))
+
+    broken = MediaUploader(CREDENTIALS, upload_url=upload_server.url, chunk_size=4)
+    upload_server.media.clear()
+    # Drop a segment on the floor so FINALIZE sees a size mismatch
+    original = broken._append
+
+    async def lossy_append(client, media_id, segment_index, segment):
+        if segment_index != 1:
+            await original(client, media_id, segment_index, segment)
+
+    broken._append = lossy_append
+    with pytest.raises(MediaUploadError, match="FINALIZE failed with HTTP 400"):
+        broken.upload(str(image))
+
+
+def test_publish_post_attaches_media(upload_server, tmp_path, monkeypatch):
+    for var in ("X_API_KEY", "X_API_SECRET", "X_ACCESS_TOKEN", "X_ACCESS_TOKEN_SECRET"):
+        monkeypatch.setenv(var, "test")
+    monkeypatch.setenv("X_MEDIA_UPLOAD_URL", upload_server.url)
+    monkeypatch.setenv("X_PUBLISH_DRY_RUN", "false")
+
+    class FakeTwitterClient:
+        def __init__(self):
+            self.calls = []
+
+        def create_tweet(self, **kwargs):
+            self.calls.append(kwargs)
+            return type("Response", (), {"data": {"id": "42"}})()
+
+        def get_me(self):
+            raise Exception("offline")
+
+    images = []
+    for i in range(2):
+        image = tmp_path / f"photo{i}.png"
+        image.write_bytes(os.urandom(2048))
+        images.append(str(image))
+
+    service = XPostService()
+    service.accounts.get()._client = FakeTwitterClient()
+    result = service.publish_post("Look at these!", confirm=True, media_paths=images)
+
+    assert result["success"], result
+    assert service.accounts.get()._client.calls == [{"text": "Look at these!", "media_ids": result["media_ids"]}]
+    assert [upload_server.media[m]["data"] for m in result["media_ids"]] == [
+        open(p, "rb").read() for p in images
+    ]
+
+
+def test_publish_post_validates_media(tmp_path):
+    service = XPostService()
+    result = service.publish_post("text", confirm=True, media_paths=[str(tmp_path / "missing.png")])
+    assert not result["success"]
+    assert "not found" in result["error"]
+
+
+def test_failed_segment_stops_the_upload(upload_server, tmp_path):
+    """One rejected APPEND cancels the segments still in flight and surfaces as MediaUploadError."""
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(os.urandom(8 * 64 * 1024))
+    upload_server.fail_segment = 0
+
+    uploader = MediaUploader(CREDENTIALS, upload_url=upload_server.url, chunk_size=64 * 1024, max_parallel=3)
+    with pytest.raises(MediaUploadError, match="APPEND failed with HTTP 400"):
+        uploader.upload(str(video))
+
+    assert "FINALIZE" not in upload_server.commands
+    assert upload_server.commands.count("APPEND") < 8  # queued segments were never sent
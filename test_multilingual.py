@@ -0,0 +1,83 @@
+"""
+Test multi-language post generation in one LLM request.
+"""
+
+import sys
+import os
+import json
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.text_length import truncate_weighted, weighted_length
+from egile_mcp_x_post_creator.x_service import XPostService
+
+JAPANESE = "新しいダッシュボードを公開しました。" * 10  # 180 characters, weighted 360
+
+
+class ScriptedMessages:
+    """Answers each call with the next scripted JSON reply, continuing the "{" prefill."""
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.prompts = []
+        self.with_raw_response = self
+
+    def create(self, messages, **kwargs):
+        self.prompts.append(messages[0]["content"])
+        assert messages[-1] == {"role": "assistant", "content": "{"}
+        reply = json.dumps(self.replies.pop(0), ensure_ascii=False)[1:]
+        response = SimpleNamespace(content=[SimpleNamespace(text=reply)], usage=None)
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+
+def make_service(monkeypatch, messages):
+    monkeypatch.setenv("DEDUP_MODE", "off")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")
+    service = XPostService()
+    service._has_anthropic, service._has_openai = True, False
+    service._anthropic_client = SimpleNamespace(messages=messages)
+    return service
+
+
+def test_weighted_length():
+    assert weighted_length("Launch day 🚀") == 13
+    assert weighted_length("公開") == 4
+    assert weighted_length("Read https://example.com/" + "x" * 100) == 28
+    shortened = truncate_weighted(JAPANESE, 280)
+    assert weighted_length(shortened) <= 280 and shortened.endswith("...")
+
+
+def test_only_failed_languages_are_repaired(monkeypatch):
+    messages = ScriptedMessages(
+        {"en": "🚀 Our new dashboard is live! #Launch", "ja": JAPANESE},
+        {"ja": "🚀 新しいダッシュボードを公開しました！ #Launch", "de": "🚀 Unser neues Dashboard ist live! #Launch"},
+    )
+    service = make_service(monkeypatch, messages)
+
+    result = service.create_post("New dashboard is live", languages=["en", "ja", "de"])
+
+    assert result["success"]
+    assert result["llm_calls"] == 2
+    assert result["repaired"] == ["ja", "de"] and result["truncated"] == []
+    assert list(result["posts"]) == ["en", "ja", "de"]
+    assert result["posts"]["en"]["post_text"] == "🚀 Our new dashboard is live! #Launch"
+    assert result["posts"]["ja"]["stats"]["weighted_length"] <= 280
+    repair_prompt = messages.prompts[1]
+    assert "- ja (currently 360)" in repair_prompt and "- de: missing" in repair_prompt
+    assert "- en" not in repair_prompt
+
+
+def test_posts_that_fit_cost_one_request_and_unfixable_ones_are_truncated(monkeypatch):
+    messages = ScriptedMessages({"en": "Short and sweet", "ja": JAPANESE}, {"ja": JAPANESE})
+    service = make_service(monkeypatch, messages)
+
+    result = service.create_post("News", languages=["en", "ja"])
+
+    assert result["llm_calls"] == 2 and result["truncated"] == ["ja"]
+    assert result["posts"]["ja"]["stats"]["weighted_length"] <= 280
+
+    messages.replies.append({"en": "Short and sweet", "ja": "短いお知らせ"})
+    result = service.create_post("Other news", languages=["en", "ja"])
+    assert result["llm_calls"] == 1 and result["repaired"] == []
@@ -0,0 +1,92 @@
+"""
+Test the text/json/terse tool response formats.
+"""
+
+import sys
+import os
+import asyncio
+import json
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+PAYLOAD = {"success": True, "post_text": "Hello ✨", "stats": {"weighted_length": 8}}
+
+
+@pytest.fixture
+def server(monkeypatch):
+    # Importing the server builds the service; keep it from starting background work
+    monkeypatch.setenv("SCHEDULER_ENABLED", "false")
+    monkeypatch.setenv("CONFIG_RELOAD_INTERVAL", "0")
+    from egile_mcp_x_post_creator import server
+    service = server.services.current()
+    monkeypatch.setattr(service, "_has_anthropic", False)
+    monkeypatch.setattr(service, "_has_openai", False)
+    monkeypatch.setattr(service, "dedup_mode", "off")
+    monkeypatch.setattr(service, "history", None)
+    return server
+
+
+def build(server, output_format):
+    rendered = []
+
+    def render(name):
+        def renderer():
+            rendered.append(name)
+            return f"{name} output"
+        return renderer
+
+    result = server._tool_result(output_format, PAYLOAD, render("text"), render("terse"))
+    assert len(result.content) == 1
+    return result, rendered
+
+
+def test_formats(server):
+    result, rendered = build(server, "text")
+    assert result.content[0].text == "text output" and result.structuredContent is None
+    assert rendered == ["text"]
+
+    result, rendered = build(server, "json")
+    assert json.loads(result.content[0].text) == PAYLOAD
+    assert "\n" not in result.content[0].text and "✨" in result.content[0].text  # compact, not escaped
+    assert result.structuredContent == PAYLOAD and rendered == []
+
+    result, rendered = build(server, "TERSE")
+    assert result.content[0].text == "terse output" and result.structuredContent == PAYLOAD
+    assert rendered == ["terse"]
+
+
+def test_default_and_invalid_formats(server, monkeypatch):
+    monkeypatch.setattr(server, "default_output_format", "json")  # MCP_OUTPUT_FORMAT
+    result, _ = build(server, None)
+    assert result.structuredContent == PAYLOAD
+    result, _ = build(server, "text")  # an explicit format wins
+    assert result.structuredContent is None
+
+    # Unknown formats fall back to text rather than failing the call
+    result, rendered = build(server, "xml")
+    assert result.content[0].text == "text output" and result.structuredContent is None
+    monkeypatch.setattr(server, "default_output_format", "yaml")
+    result, rendered = build(server, None)
+    assert rendered == ["text"]
+
+
+def test_create_post_formats(server):
+    def call(output_format):
+        arguments = {"text": "Launching our AI product today", "output_format": output_format}
+        return asyncio.run(server.mcp.call_tool("create_post", arguments))
+
+    result = call("json")
+    data = json.loads(result.content[0].text)
+    assert data == result.structuredContent
+    assert data["success"] and data["post_text"].startswith("Launching our AI product today")
+    assert data["stats"]["weighted_length"] <= data["max_length"]
+
+    terse = call("terse")
+    assert terse.structuredContent["post_text"] == data["post_text"]
+    assert data["post_text"].split("\n")[0] in terse.content[0].text
+
+    text = call("text")
+    assert text.structuredContent is None and "Launching our AI product today" in text.content[0].text
@@ -0,0 +1,108 @@
+"""
+Test the local pre-publish content policy.
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.policy import ContentPolicy
+from egile_mcp_x_post_creator.x_service import XPostService
+
+POLICY = {
+    "blocked_terms": ["confidential", "internal only", "project falcon", "project falconer"],
+    "blocked_domains": ["bit.ly"],
+    "url_action": "redact",
+    "secret_rules": {"email": True},
+}
+
+
+def make_service(monkeypatch, config):
+    monkeypatch.setenv("DEDUP_MODE", "off")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")
+    service = XPostService()
+    service.policy = ContentPolicy(config)
+    return service
+
+
+def test_policy_rules():
+    policy = ContentPolicy(POLICY)
+
+    verdict = policy.check("Sneak peek at Project Falconer, CONFIDENTIAL!")
+    assert not verdict.allowed
+    assert [v["match"] for v in verdict.violations] == ["Project Falconer", "CONFIDENTIAL"]
+    assert policy.check("Our confidentiality promise").allowed  # whole words only
+
+    key = "sk-ant-" + "a1B2" * 10
+    verdict = policy.check(f"Use {key} or mail ops@example.com, see https://bit.ly/x1 and https://docs.example.com/a", redact=True)
+    assert verdict.allowed
+    assert key not in verdict.text and key not in str(verdict.redactions)
+    assert "[anthropic_api_key redacted]" in verdict.text
+    assert "[email redacted]" in verdict.text
+    assert "[link removed]" in verdict.text and "https://docs.example.com/a" in verdict.text
+    assert {r["rule"] for r in verdict.redactions} == {"anthropic_api_key", "email", "domain"}
+
+    # Without redaction (publishing) the same text is rejected
+    assert not policy.check(f"Use {key}").allowed
+    allow_only = ContentPolicy({"allowed_domains": ["example.com"]})
+    assert allow_only.check("https://www.example.com and https://blog.example.com").allowed
+    assert not allow_only.check("https://example.com.evil.io").allowed
+
+
+def test_links_without_scheme_or_behind_userinfo():
+    policy = ContentPolicy({"blocked_domains": ["bit.ly"], "blocked_terms": ["internal only"]})
+
+    # X links bare domains, so a missing scheme is no way around the domain rules
+    assert not policy.check("see bit.ly/abc").allowed
+    assert not policy.check("see go.bit.ly").allowed
+    assert policy.check("see bit.ly").allowed  # a bare ccTLD name without a path is not linked
+    # The host is what follows user@, not what comes before it
+    verdict = policy.check("https://google.com@bit.ly/x")
+    assert not verdict.allowed and verdict.violations[0]["match"] == "bit.ly"
+    assert policy.check("https://google.com/x and mail ops@bit.ly").allowed
+
+    # Whitespace between the words of a term is not significant
+    assert not policy.check("internal  only").allowed
+    assert not policy.check("Internal\nonly").allowed
+
+    allow_only = ContentPolicy({"allowed_domains": ["example.com"]})
+    assert allow_only.check("Node.js 1.2, e.g. file.txt or example.com/docs").allowed
+    assert not allow_only.check("try evil.com").allowed
+
+
+def test_ordinary_text_is_not_a_secret():
+    policy = ContentPolicy()
+    for text in [
+        "Our new task-management-software-platform is live!",
+        "desk-booking-application-for-teams",
+        "Try our risk-assessment-toolkit-for-small-businesses today",
+        "Contact hello@acme.com for a demo",  # emails are opt-in
+        "RAKIAABCDEFGHIJKLMNOP is not a key",
+    ]:
+        verdict = policy.check(text, redact=True)
+        assert verdict.allowed and verdict.text == text and not verdict.redactions, text
+
+    assert not policy.check("sk-" + "a1B2" * 10).allowed
+    assert not policy.check("export KEY=sk-proj-" + "x9_Y" * 8).allowed
+
+
+def test_violations_stop_before_any_network_call(monkeypatch):
+    service = make_service(monkeypatch, POLICY)
+    calls = []
+    service._generate_post_text = lambda *args: calls.append(args) or ("Draft", "simple")
+    service.accounts.get()._client = SimpleNamespace(create_tweet=lambda **kwargs: calls.append(kwargs))
+
+    result = service.create_post("Internal only: launch dates")
+    assert not result["success"] and result["policy_violations"][0]["category"] == "blocked_term"
+
+    result = service.publish_post("Mail me at ceo@example.com", confirm=True)
+    assert not result["success"] and "email" in result["error"]
+    assert calls == []
+
+    # Drafting redacts instead, so the secret never reaches the LLM
+    result = service.create_post("Contact ceo@example.com for details")
+    assert result["success"] and result["policy_redactions"][0]["rule"] == "email"
+    assert "ceo@example.com" not in calls[0][0]
@@ -0,0 +1,81 @@
+"""
+Test batched, cached engagement-metrics lookups.
+"""
+
+import sys
+import os
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.history import PostHistory
+from egile_mcp_x_post_creator.x_service import XPostService
+
+
+class FakeTwitterClient:
+    """Answers tweet lookups for every id except those in `missing`."""
+
+    def __init__(self, missing=()):
+        self.missing = set(missing)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get_tweets(self, ids, tweet_fields, user_auth):
+        assert len(ids) <= 100 and user_auth
+        with self.lock:
+            self.calls.append(list(ids))
+        tweets = [
+            SimpleNamespace(
+                id=int(tweet_id),
+                public_metrics={"like_count": int(tweet_id) % 7, "retweet_count": 1, "reply_count": 0, "quote_count": 0},
+                created_at=datetime(2025, 1, 1, tzinfo=timezone.utc)
+            )
+            for tweet_id in ids if tweet_id not in self.missing
+        ]
+        return SimpleNamespace(data=tweets or None)
+
+
+def make_service(tmp_path, monkeypatch, client):
+    for var in ("X_API_KEY", "X_API_SECRET", "X_ACCESS_TOKEN", "X_ACCESS_TOKEN_SECRET"):
+        monkeypatch.setenv(var, "test")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")  # don't open the default store
+    service = XPostService()
+    service.history = PostHistory(str(tmp_path / "history.db"))
+    service.accounts.get()._client = client
+    return service
+
+
+def test_ids_are_batched_and_served_from_cache_on_the_next_poll(tmp_path, monkeypatch):
+    client = FakeTwitterClient(missing={"1000"})
+    service = make_service(tmp_path, monkeypatch, client)
+    ids = [str(1000 + i) for i in range(250)]
+
+    first = service.get_post_metrics(ids + ["1001"])
+    assert first["success"]
+    assert first["api_calls"] == 3 and len(client.calls) == 3
+    assert sorted(len(batch) for batch in client.calls) == [50, 100, 100]
+    assert first["not_found"] == ["1000"]
+    assert first["fetched"] == 250 and first["cached"] == 0
+    assert first["metrics"]["1006"]["like_count"] == 1006 % 7
+
+    second = service.get_post_metrics(ids)
+    assert second["api_calls"] == 0 and second["cached"] == 250
+    assert second["not_found"] == ["1000"] and len(second["metrics"]) == 249
+    assert len(client.calls) == 3
+    assert second["metrics"]["1006"]["created_at"].startswith("2025-01-01")
+
+    fresh = service.get_post_metrics(ids[:10], max_age=0)
+    assert fresh["api_calls"] == 1 and fresh["fetched"] == 10
+
+
+def test_invalid_ids_are_rejected_without_api_calls(tmp_path, monkeypatch):
+    client = FakeTwitterClient()
+    service = make_service(tmp_path, monkeypatch, client)
+
+    result = service.get_post_metrics(["123", "dry-run"])
+    assert not result["success"]
+    assert "dry-run" in result["error"]
+    assert client.calls == []
@@ -0,0 +1,121 @@
+"""
+Test on-demand profiling of tool calls.
+"""
+
+import asyncio
+import contextvars
+import sys
+import os
+import threading
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator import profiling
+from egile_mcp_x_post_creator.profiling import Profiler, _current, profile_phase
+
+
+def test_phases_nest_across_threads_and_export_folded_stacks():
+    profiler = Profiler(sample_rate=1.0, interval_ms=1)
+
+    def worker():
+        with profiler.phase("generate"):
+            with profiler.phase("provider_call"):
+                time.sleep(0.05)
+
+    with profiler.request("create_post"):
+        # Worker threads see the request through the copied context, as with anyio.to_thread
+        thread = threading.Thread(target=contextvars.copy_context().run, args=(worker,))
+        thread.start()
+        thread.join()
+        with profiler.phase("format"):
+            pass
+
+    phases = dict(line.rsplit(" ", 1) for line in profiler.folded("phases").splitlines())
+    assert set(phases) == {
+        "create_post", "create_post;generate", "create_post;generate;provider_call", "create_post;format"
+    }
+    assert int(phases["create_post;generate;provider_call"]) >= 45000
+    assert int(phases["create_post;generate"]) < 10000  # self time excludes the child
+
+    samples = profiler.folded("samples")
+    assert "create_post;generate;provider_call;" in samples
+    assert "test_profiling.py:worker" in samples
+
+    summary = profiler.summary()
+    assert summary["requests"]["create_post"]["profiled"] == 1
+    assert not profiler._active and _current.get() is None
+
+
+def test_unsampled_requests_record_nothing():
+    profiler = Profiler(sample_rate=0)
+    with profiler.request("create_post"):
+        with profiler.phase("generate"):
+            pass
+    assert profiler.folded("phases").strip() == ""
+    assert profiler.summary()["requests"] == {}
+
+    profiler.configure(1.0)
+    with profiler.request("create_post"):
+        pass
+    assert profiler.summary()["requests"]["create_post"]["profiled"] == 1
+
+
+def test_phases_take_no_lock_outside_sampled_requests(monkeypatch):
+    class NoLock:
+        def __enter__(self):
+            raise AssertionError("lock taken on the hot path")
+
+        def __exit__(self, *exc):
+            return False
+
+    profiling.get_profiler()  # created once, under the lock
+    monkeypatch.setattr(profiling, "_profiler_lock", NoLock())
+    with profile_phase("generate"):
+        pass
+    assert profiling.get_profiler() is profiling._profiler
+
+
+def test_profile_route_is_local_only_without_a_token(monkeypatch):
+    monkeypatch.setenv("SCHEDULER_ENABLED", "false")
+    monkeypatch.setenv("CONFIG_RELOAD_INTERVAL", "0")
+    from starlette.requests import Request
+    from egile_mcp_x_post_creator import server
+
+    def status(client_host, query=b"kind=summary"):
+        scope = {
+            "type": "http", "method": "GET", "path": "/profile", "headers": [],
+            "query_string": query, "client": (client_host, 50000) if client_host else None,
+        }
+        return asyncio.run(server.profile_route(Request(scope))).status_code
+
+    monkeypatch.delenv("PROFILE_ROUTE_TOKEN", raising=False)
+    assert status("127.0.0.1") == 200 and status("::1") == 200
+    assert status("203.0.113.7") == 403 and status(None) == 403
+
+    monkeypatch.setenv("PROFILE_ROUTE_TOKEN", "s3cret")
+    assert status("203.0.113.7", b"kind=summary&token=s3cret") == 200
+    assert status("203.0.113.7", b"kind=summary&token=wrong") == 403
+    assert status("127.0.0.1") == 403  # a configured token is required from everywhere
+
+
+def test_metrics_route_is_local_only_without_a_token(monkeypatch):
+    monkeypatch.setenv("SCHEDULER_ENABLED", "false")
+    monkeypatch.setenv("CONFIG_RELOAD_INTERVAL", "0")
+    from starlette.requests import Request
+    from egile_mcp_x_post_creator import server
+
+    def status(client_host, query=b""):
+        scope = {
+            "type": "http", "method": "GET", "path": "/metrics", "headers": [],
+            "query_string": query, "client": (client_host, 50000),
+        }
+        return asyncio.run(server.metrics_route(Request(scope))).status_code
+
+    monkeypatch.delenv("METRICS_ROUTE_TOKEN", raising=False)
+    assert status("127.0.0.1") == 200 and status("203.0.113.7") == 403
+
+    monkeypatch.setenv("METRICS_ROUTE_TOKEN", "s3cret")
+    assert status("203.0.113.7", b"token=s3cret") == 200
+    assert status("203.0.113.7", b"token=wrong") == 403
@@ -0,0 +1,104 @@
+"""
+Test the token-bucket rate governor.
+"""
+
+import sys
+import os
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator import rate_limit
+from egile_mcp_x_post_creator.rate_limit import RateGovernor, RateLimitExceeded, _parse_seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """A fake monotonic clock that cancellation.sleep advances instead of sleeping."""
+    state = SimpleNamespace(now=1000.0, sleeps=[])
+
+    def sleep(seconds):
+        state.sleeps.append(round(seconds, 6))
+        state.now += seconds
+
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: state.now)
+    monkeypatch.setattr(rate_limit.cancellation, "sleep", sleep)
+    return state
+
+
+def test_bursts_queue_and_refill(monkeypatch, clock):
+    monkeypatch.setenv("RATE_LIMIT_TEST_RPM", "60")
+    monkeypatch.setenv("RATE_LIMIT_TEST_TPM", "600")
+    governor = RateGovernor(max_wait=10)
+
+    # The full bucket is available at once, then calls queue one refill interval apart
+    waits = [governor.acquire("test:call") for _ in range(62)]
+    assert waits[:60] == [0.0] * 60
+    assert waits[60:] == pytest.approx([1.0, 1.0])  # each caller waits its own turn
+    assert clock.sleeps == pytest.approx([1.0, 1.0])
+
+    clock.now += 30
+    snapshot = governor.snapshot()["test:call"]
+    assert snapshot["requests_available"] == pytest.approx(30.0)
+    assert snapshot["calls"] == 62 and snapshot["throttled"] == 2 and snapshot["queued"] == 0
+
+    # Token reservations queue on the token bucket too
+    assert governor.acquire("test:tokens", tokens=600) == 0.0
+    assert governor.acquire("test:tokens", tokens=300, max_wait=60) == pytest.approx(30.0)
+
+
+def test_max_wait_rejects_without_reserving(monkeypatch, clock):
+    monkeypatch.setenv("RATE_LIMIT_TEST_RPM", "6")  # one call every 10 seconds
+    governor = RateGovernor(max_wait=5)
+
+    for _ in range(6):
+        governor.acquire("test:call")
+    with pytest.raises(RateLimitExceeded):
+        governor.acquire("test:call")
+    assert governor.acquire("test:call", max_wait=10) == pytest.approx(10.0)
+    assert governor.snapshot()["test:call"]["rejected"] == 1
+
+
+def test_x_limits_are_per_15_minute_window(clock):
+    governor = RateGovernor(max_wait=1000)
+    reset = str(int(time.time()) + 600)
+
+    # 300 requests per 15 minutes is 20 per minute, not 300
+    governor.update_from_headers("x:create_tweet", {
+        "x-rate-limit-limit": "300", "x-rate-limit-remaining": "299", "x-rate-limit-reset": reset,
+    })
+    assert governor.snapshot()["x:create_tweet"]["requests_per_minute"] == pytest.approx(20.0)
+
+    governor.update_from_headers("anthropic:messages", {
+        "anthropic-ratelimit-requests-limit": "50", "anthropic-ratelimit-requests-remaining": "49",
+    })
+    assert governor.snapshot()["anthropic:messages"]["requests_per_minute"] == 50.0
+
+    # An exhausted window blocks the endpoint until it resets
+    governor.update_from_headers("x:create_tweet", {
+        "X-Rate-Limit-Limit": "300", "X-Rate-Limit-Remaining": "0", "X-Rate-Limit-Reset": reset,
+    })
+    assert governor.snapshot()["x:create_tweet"]["blocked_for_seconds"] == pytest.approx(600, abs=2)
+    with pytest.raises(RateLimitExceeded):
+        governor.acquire("x:create_tweet", max_wait=60)
+
+
+def test_parse_seconds_formats():
+    assert _parse_seconds(None) is None
+    assert _parse_seconds("30") == 30.0
+    assert _parse_seconds(str(int(time.time()) + 120)) == pytest.approx(120, abs=2)  # X epoch
+    assert _parse_seconds(str(int(time.time()) - 5)) == 0.0
+    assert _parse_seconds("6m0s") == pytest.approx(360.0)  # OpenAI durations
+    assert _parse_seconds("1h2m3.5s") == pytest.approx(3723.5)
+    assert _parse_seconds("20ms") == pytest.approx(0.02)
+
+    later = datetime.now(timezone.utc) + timedelta(seconds=90)
+    assert _parse_seconds(later.isoformat().replace("+00:00", "Z")) == pytest.approx(90, abs=2)  # Anthropic
+    assert _parse_seconds(format_datetime(later, usegmt=True)) == pytest.approx(90, abs=2)  # HTTP date
+    assert _parse_seconds("soon") is None
@@ -0,0 +1,155 @@
+"""
+Test the persistent post scheduler.
+"""
+
+import sys
+import os
+import time
+import threading
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.scheduler import PostScheduler, parse_publish_at
+
+
+class RecordingPublisher:
+    """Stand-in for XPostService.publish_post that records what was sent."""
+
+    def __init__(self):
+        self.published = []
+        self.event = threading.Event()
+
+    def __call__(self, post_text):
+        self.published.append(post_text)
+        self.event.set()
+        return {"success": True, "tweet_id": str(len(self.published)), "tweet_url": ""}
+
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_publishes_in_due_order(tmp_path):
+    """Entries fire in publish_at order, even when scheduled out of order."""
+    publisher = RecordingPublisher()
+    scheduler = PostScheduler(publisher, db_path=str(tmp_path / "s.db"), heap_window=2)
+    scheduler.start()
+    try:
+        now = time.time()
+        scheduler.schedule("third", now + 0.3)
+        scheduler.schedule("first", now + 0.1)
+        scheduler.schedule("second", now + 0.2)
+        scheduler.schedule("fourth", now + 0.4)
+        scheduler.schedule("fifth", now + 0.5)
+
+        assert wait_for(lambda: len(publisher.published) == 5)
+        assert publisher.published == ["first", "second", "third", "fourth", "fifth"]
+        assert len(scheduler.list(status="published")) == 5
+    finally:
+        scheduler.stop()
+
+
+def test_cancelled_entries_are_skipped(tmp_path):
+    publisher = RecordingPublisher()
+    scheduler = PostScheduler(publisher, db_path=str(tmp_path / "s.db"))
+    scheduler.start()
+    try:
+        now = time.time()
+        cancelled = scheduler.schedule("cancel me", now + 0.1)
+        scheduler.schedule("keep me", now + 0.2)
+        assert scheduler.cancel(cancelled["schedule_id"])["success"]
+
+        assert wait_for(lambda: len(publisher.published) == 1)
+        time.sleep(0.1)
+        assert publisher.published == ["keep me"]
+        assert not scheduler.cancel(cancelled["schedule_id"])["success"]
+    finally:
+        scheduler.stop()
+
+
+def test_catches_up_after_restart(tmp_path):
+    """Entries that fell due while the process was down are published on start."""
+    db_path = str(tmp_path / "s.db")
+    offline = PostScheduler(RecordingPublisher(), db_path=db_path)
+    for i in range(10):
+        offline.schedule(f"missed {i}", time.time() - 60 + i)
+    offline.schedule("later", time.time() + 3600)
+
+    publisher = RecordingPublisher()
+    scheduler = PostScheduler(publisher, db_path=db_path, heap_window=3)
+    scheduler.start()
+    try:
+        assert wait_for(lambda: len(publisher.published) == 10)
+        assert publisher.published == [f"missed {i}" for i in range(10)]
+        assert [e["post_text"] for e in scheduler.list()] == ["later"]
+    finally:
+        scheduler.stop()
+
+
+def test_heap_stays_within_window(tmp_path):
+    """Posts scheduled after the window was exhausted don't grow the heap past heap_window."""
+    publisher = RecordingPublisher()
+    scheduler = PostScheduler(publisher, db_path=str(tmp_path / "s.db"), heap_window=3)
+    scheduler.start()
+    try:
+        assert wait_for(lambda: scheduler._exhausted)  # the empty table has been loaded
+        now = time.time()
+        for i in reversed(range(10)):
+            scheduler.schedule(f"post {i}", now + 0.3 + i * 0.02)
+            assert len(scheduler._heap) <= 3
+        assert not scheduler._exhausted
+
+        assert wait_for(lambda: len(publisher.published) == 10)
+        assert publisher.published == [f"post {i}" for i in range(10)]
+    finally:
+        scheduler.stop()
+
+
+def test_retries_failures_before_reaching_x(tmp_path):
+    """Posts that never reached X are retried with backoff; X rejections are not."""
+    outcomes = {
+        "limited": [RuntimeError("Rate limit for x:create_tweet exceeded"),
+                    {"success": False, "error": "Failed to publish post: 429", "retryable": True}],
+        "rejected": [{"success": False, "error": "Failed to publish post: 403 Forbidden", "retryable": False}],
+        "hopeless": [RuntimeError("still limited")] * 3,
+    }
+    calls = []
+
+    def publish(post_text):
+        calls.append(post_text)
+        pending = outcomes[post_text]
+        if not pending:
+            return {"success": True, "tweet_id": "1", "tweet_url": ""}
+        outcome = pending.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    scheduler = PostScheduler(publish, db_path=str(tmp_path / "s.db"), max_attempts=3, retry_delay=0.05)
+    scheduler.start()
+    try:
+        ids = {text: scheduler.schedule(text, time.time())["schedule_id"] for text in outcomes}
+        settled = lambda: all(scheduler.get(i)["status"] in ("published", "failed") for i in ids.values())
+        assert wait_for(settled)
+        entries = {text: scheduler.get(schedule_id) for text, schedule_id in ids.items()}
+    finally:
+        scheduler.stop()
+
+    assert (entries["limited"]["status"], entries["limited"]["attempts"]) == ("published", 3)
+    assert entries["limited"]["error"] is None
+    assert (entries["rejected"]["status"], entries["rejected"]["attempts"]) == ("failed", 1)
+    assert (entries["hopeless"]["status"], entries["hopeless"]["attempts"]) == ("failed", 3)
+    assert "still limited" in entries["hopeless"]["error"]
+    assert len(calls) == 7
+
+
+def test_parse_publish_at():
+    assert parse_publish_at("1970-01-01T00:01:00Z") == 60
+    assert parse_publish_at("1970-01-01T00:01:00") == 60
+    assert parse_publish_at("1970-01-01T01:01:00+01:00") == 60
@@ -0,0 +1,91 @@
+"""
+Test single-flight coalescing of identical generations.
+"""
+
+import sys
+import os
+import threading
+import time
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.single_flight import SingleFlight
+from egile_mcp_x_post_creator.x_service import XPostService
+
+
+def run_concurrently(count, target):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(target())
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results, errors
+
+
+def test_identical_requests_share_one_llm_call():
+    service = XPostService()
+    service._has_anthropic = True
+    calls = []
+
+    def fake_llm(text, style, include_hashtags, max_length, tier):
+        calls.append(text)
+        time.sleep(0.2)
+        return "🚀 Shipped it! #Launch", "anthropic"
+
+    service._generate_with_llm = fake_llm
+    results, errors = run_concurrently(
+        8, lambda: service.create_post("We   shipped it!", "casual")["post_text"]
+    )
+
+    assert not errors
+    assert results == ["🚀 Shipped it! #Launch"] * 8
+    assert len(calls) == 1
+    assert service._inflight_generations.in_flight() == 0
+
+
+def test_errors_propagate_to_all_waiters_and_are_not_cached():
+    flight = SingleFlight()
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.1)
+        raise ValueError("provider down")
+
+    results, errors = run_concurrently(5, lambda: flight.do("key", failing))
+    assert not results
+    assert len(errors) == 5 and all(isinstance(e, ValueError) for e in errors)
+    assert len(calls) == 1
+
+    assert flight.do("key", lambda: "recovered") == "recovered"
+
+
+def test_cancelled_leader_hands_over_to_a_waiter():
+    flight = SingleFlight()
+    leader_started = threading.Event()
+
+    def cancelled_leader():
+        leader_started.set()
+        time.sleep(0.1)
+        raise KeyboardInterrupt()
+
+    leader = threading.Thread(target=lambda: pytest.raises(KeyboardInterrupt, flight.do, "key", cancelled_leader))
+    leader.start()
+    leader_started.wait()
+
+    results, errors = run_concurrently(3, lambda: flight.do("key", lambda: (time.sleep(0.05), "fresh")[1]))
+    leader.join()
+
+    assert not errors
+    assert results == ["fresh"] * 3
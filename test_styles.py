@@ -0,0 +1,128 @@
+"""
+Test the compiled style packs.
+"""
+
+import sys
+import os
+import json
+
+import pytest
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.styles import StylePackError, StyleRegistry
+
+TEXTS = [
+    "Just launched our new AI-powered customer support feature!",
+    "🚀 Liftoff: our startup product is live",
+    "Having an amazing day building cool stuff with Python!",
+    "Design and development of our marketing technology stack",
+    "",
+]
+
+
+def legacy_apply(text, style):
+    """XPostService._apply_style before styles moved into packs."""
+    emoji = {"professional": "💼", "casual": "✨", "witty": "😄", "inspirational": "🚀"}.get(style, "")
+    prefix = {"professional": "", "casual": "Hey! ", "witty": "", "inspirational": "✨ "}.get(style, "")
+    if style == "inspirational" and not text.startswith(emoji):
+        return f"{prefix}{text} {emoji}"
+    elif style in ("professional", "witty"):
+        return f"{prefix}{text} {emoji}"
+    return f"{prefix}{text}"
+
+
+def legacy_hashtags(text, style):
+    """XPostService._extract_hashtags before styles moved into packs."""
+    common = {
+        "professional": ["#Business", "#Innovation", "#Leadership"],
+        "casual": ["#Life", "#Daily", "#Thoughts"],
+        "witty": ["#Humor", "#Fun", "#LOL"],
+        "inspirational": ["#Motivation", "#Success", "#Growth"],
+    }
+    keywords = {
+        "ai": "#AI", "artificial intelligence": "#ArtificialIntelligence", "tech": "#Tech",
+        "technology": "#Technology", "business": "#Business", "startup": "#Startup", "product": "#Product",
+        "launch": "#Launch", "innovation": "#Innovation", "marketing": "#Marketing",
+        "development": "#Development", "coding": "#Coding", "design": "#Design",
+    }
+    found = []
+    for keyword, hashtag in keywords.items():
+        if keyword in text.lower() and hashtag not in found:
+            found.append(hashtag)
+            if len(found) >= 2:
+                break
+    return " ".join((found or common.get(style, ["#Share"])[:2])[:3])
+
+
+@pytest.mark.parametrize("style", ["professional", "casual", "witty", "inspirational", "unknown"])
+def test_builtin_styles_match_the_old_output(style):
+    registry = StyleRegistry()
+    compiled = registry.get(style)
+    for text in TEXTS:
+        assert compiled.apply(text) == legacy_apply(text, style), text
+        assert compiled.hashtags(text) == legacy_hashtags(text, style), text
+    assert registry.get("inspirational").apply("🚀 Go") == "✨ 🚀 Go"  # no second rocket
+    assert registry.get("casual").hashtag_separator == "\n\n"
+
+
+def write_pack(path, pack):
+    path.write_text(json.dumps(pack), encoding="utf-8")
+    return str(path)
+
+
+def test_packs_are_layered_in_order(tmp_path):
+    brand_dir = tmp_path / "brand"
+    brand_dir.mkdir()
+    write_pack(brand_dir / "a.json", {
+        "defaults": {"hashtags": ["#Acme"]},
+        "keyword_hashtags": {"rocket": "#Rockets"},
+        "styles": {
+            "casual": {"prefix": "Yo! "},  # merged into the built-in style
+            "acme": {"template": "ACME: {text}", "description": "on brand", "hashtags": ["#AcmeCorp"]},
+        },
+    })
+    write_pack(brand_dir / "b.json", {"styles": {"acme": {"template": "{text} -- Acme"}}})
+    (brand_dir / "notes.txt").write_text("ignored")
+
+    registry = StyleRegistry([str(brand_dir)])
+    assert registry.get("casual").apply("hi") == "Yo! hi"
+    assert registry.get("casual").hashtags("nothing to see") == "#Life #Daily"
+    assert registry.get("acme").apply("hi") == "hi -- Acme"  # b.json is applied after a.json
+    assert registry.get("acme").description == "on brand"
+    assert registry.get("acme").hashtags("our rocket") == "#Rockets"
+    assert registry.get("nope").hashtags("nothing") == "#Acme"  # pack defaults replace the built-in ones
+    assert "acme" in registry.names() and "witty" in registry.names()
+
+
+@pytest.mark.parametrize("pack, message", [
+    ({"styles": {"bad": {"template": "{prefix}"}}}, "exactly once"),
+    ({"styles": {"bad": {"template": "{text} {text}"}}}, "exactly once"),
+    ({"styles": {"bad": {"template": "{text} {unknown}"}}}, "Invalid template"),
+])
+def test_invalid_packs_raise(tmp_path, pack, message):
+    with pytest.raises(StylePackError, match=message):
+        StyleRegistry([write_pack(tmp_path / "pack.json", pack)])
+
+
+@pytest.mark.parametrize("pack, message", [
+    (["not", "an", "object"], "must contain a JSON object"),
+    ({"styles": ["casual"]}, "'styles' must be an object"),
+    ({"defaults": "none"}, "'defaults' must be an object"),
+    ({"styles": {"bad": "casual"}}, "style 'bad' must be an object"),
+])
+def test_misshapen_packs_raise(tmp_path, pack, message):
+    path = write_pack(tmp_path / "pack.json", pack)
+    with pytest.raises(StylePackError, match=message) as excinfo:
+        StyleRegistry([path])
+    assert path in str(excinfo.value)
+
+
+def test_unreadable_pack_raises(tmp_path):
+    broken = tmp_path / "broken.json"
+    broken.write_text("{not json")
+    with pytest.raises(StylePackError, match="Could not load"):
+        StyleRegistry([str(broken)])
+    with pytest.raises(StylePackError, match="Could not load"):
+        StyleRegistry([str(tmp_path / "missing.json")])
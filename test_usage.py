@@ -0,0 +1,87 @@
+"""
+Test token metering and budget-driven downgrades.
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
+
+from egile_mcp_x_post_creator.usage import OTHER_CALLER, UsageMeter, set_caller
+from egile_mcp_x_post_creator.x_service import XPostService
+
+
+class FakeAnthropicMessages:
+    """Every call uses 1000 input and 100 output tokens."""
+
+    def __init__(self):
+        self.models = []
+        self.with_raw_response = self
+
+    def create(self, model, **kwargs):
+        self.models.append(model)
+        response = SimpleNamespace(
+            content=[SimpleNamespace(text=f"Post #{len(self.models)}")],
+            usage=SimpleNamespace(input_tokens=1000, output_tokens=100)
+        )
+        return SimpleNamespace(headers={}, parse=lambda: response)
+
+
+def make_service(monkeypatch, meter):
+    monkeypatch.setenv("DEDUP_MODE", "off")
+    monkeypatch.setenv("HISTORY_ENABLED", "false")
+    service = XPostService()
+    service.usage = meter
+    service._has_anthropic, service._has_openai = True, False
+    service._anthropic_client = SimpleNamespace(messages=FakeAnthropicMessages())
+    return service
+
+
+def test_budget_downgrades_to_cheaper_model_then_simple(monkeypatch):
+    # Sonnet: 1000 * $3/M + 100 * $15/M = $0.0045 per call
+    meter = UsageMeter(budget_usd=0.01, downgrade_at=0.5)
+    service = make_service(monkeypatch, meter)
+    calls = service._anthropic_client.messages
+
+    posts = [service.create_post(f"Update number {i}")["post_text"] for i in range(4)]
+
+    assert calls.models == ["claude-3-5-sonnet-20241022", "claude-3-5-sonnet-20241022", "claude-3-5-haiku-20241022"]
+    assert posts[:3] == ["Post #1", "Post #2", "Post #3"]
+    assert "Update number 3" in posts[3]  # simple generation, no LLM call
+
+    snapshot = meter.snapshot()
+    assert snapshot["tier"] == "simple"
+    assert snapshot["degraded_calls"] == {"cheap": 1, "simple": 1}
+    assert snapshot["by_model"]["anthropic/claude-3-5-haiku-20241022"]["input_tokens"] == 1000
+    assert abs(snapshot["cost_usd"] - (0.0045 * 2 + 0.0012)) < 1e-9
+    assert 'llm_tokens_total{provider="anthropic",model="claude-3-5-sonnet-20241022",caller="local",direction="input"} 2000' in meter.prometheus()
+
+
+def test_caller_budgets_are_independent(monkeypatch):
+    meter = UsageMeter(caller_budget_usd=0.004)
+    service = make_service(monkeypatch, meter)
+
+    set_caller("runaway-agent")
+    service.create_post("First")
+    assert meter.tier() == "simple"
+    service.create_post("Second")
+
+    set_caller("dashboard")
+    assert meter.tier() == "full"
+    service.create_post("Third")
+
+    assert len(service._anthropic_client.messages.models) == 2
+    assert set(meter.snapshot()["by_caller"]) == {"runaway-agent", "dashboard"}
+
+
+def test_caller_labels_are_capped():
+    meter = UsageMeter(max_callers=2)
+    for caller in ("alpha", "beta", "gamma", "delta", "alpha"):
+        meter.record("anthropic", "claude-3-5-haiku-20241022", 1000, 100, caller=caller)
+
+    by_caller = meter.snapshot()["by_caller"]
+    assert set(by_caller) == {"alpha", "beta", OTHER_CALLER}
+    assert by_caller["alpha"]["calls"] == 2 and by_caller[OTHER_CALLER]["calls"] == 2
+    assert 'caller="gamma"' not in meter.prometheus()